@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class BaselineConfig(AppConfig):
+    name = "baseline"
+
+    def ready(self):
+        super().ready()
+
+        # connect the signals that keep the caches in sync in every process
+        from . import authentication, modelversions
+        from .backends import auth
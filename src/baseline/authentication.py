@@ -0,0 +1,268 @@
+"""
+token authentication backed by a short-lived token to user id cache
+
+Looking up a token costs a cache read instead of a query, and the result is memoized
+on the request, so `AuthParamMiddleware` and `CachedTokenAuthentication` share one
+lookup.  Entries are dropped when a token is created or deleted and when a user's
+active flag may have changed, both right away and once the transaction commits;
+`AUTH_TOKEN_CACHE_TIMEOUT` bounds how long a change made elsewhere, e.g. with a
+queryset update that sends no signals, can go unnoticed.
+
+Only the tokens of active users are valid lookups, so `AuthParamMiddleware` does not
+set the Authorization header for an inactive user's token; the request is made
+anonymously instead of failing with "User inactive or deleted.".
+"""
+import hashlib
+import typing
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from baseline import signedtokens
+
+if typing.TYPE_CHECKING:
+    from django.http import HttpRequest
+
+AUTH_TOKEN_CACHE_KEY = "auth-token-{key_hash}"
+
+# the number of seconds a token lookup is cached for
+AUTH_TOKEN_CACHE_TIMEOUT = 60
+
+# cached for tokens that do not exist, so bad tokens are not looked up over and over
+INVALID_TOKEN = 0
+
+User = get_user_model()
+
+
+def get_token_cache_key(key: str) -> str:
+    """
+    Returns the cache key for the given token
+
+    The token is hashed so that credentials are not stored in the cache in the clear.
+    """
+    key_hash = hashlib.sha256(key.encode()).hexdigest()
+
+    return AUTH_TOKEN_CACHE_KEY.format(key_hash=key_hash)
+
+
+def get_token_cache_timeout() -> int:
+    return getattr(settings, "AUTH_TOKEN_CACHE_TIMEOUT", AUTH_TOKEN_CACHE_TIMEOUT)
+
+
+def _get_memo(request: "HttpRequest") -> dict:
+    # DRF wraps the Django request; memoize on the Django one so both layers share it
+    request = getattr(request, "_request", request)
+
+    memo = getattr(request, "_auth_token_user_ids", None)
+    if memo is None:
+        memo = request._auth_token_user_ids = {}
+
+    return memo
+
+
+def _query_user_id(key: str) -> int:
+    user_id = (
+        Token.objects.filter(key=key, user__is_active=True)
+        .values_list("user_id", flat=True)
+        .first()
+    )
+
+    return INVALID_TOKEN if user_id is None else user_id
+
+
+async def _aquery_user_id(key: str) -> int:
+    user_id = await (
+        Token.objects.filter(key=key, user__is_active=True)
+        .values_list("user_id", flat=True)
+        .afirst()
+    )
+
+    return INVALID_TOKEN if user_id is None else user_id
+
+
+def get_token_user_id(
+    key: str, request: "HttpRequest" = None
+) -> typing.Optional[typing.Any]:
+    """
+    Returns the id of the active user the given token belongs to
+
+    Args:
+        key: the token
+        request: the request to memoize the result on
+
+    Returns:
+        the user id or None when the token is not valid
+    """
+    memo = _get_memo(request) if request is not None else {}
+    if key in memo:
+        return memo[key] or None
+
+    if signedtokens.uses_signed_token(key):
+        user_id = signedtokens.get_token_user_id(key) or INVALID_TOKEN
+    else:
+        cache_key = get_token_cache_key(key)
+
+        user_id = cache.get(cache_key)
+        if user_id is None:
+            user_id = _query_user_id(key)
+            cache.set(cache_key, user_id, get_token_cache_timeout())
+
+    memo[key] = user_id
+
+    return user_id or None
+
+
+async def aget_token_user_id(
+    key: str, request: "HttpRequest" = None
+) -> typing.Optional[typing.Any]:
+    """
+    Async version of get_token_user_id()
+    """
+    memo = _get_memo(request) if request is not None else {}
+    if key in memo:
+        return memo[key] or None
+
+    if signedtokens.uses_signed_token(key):
+        user_id = await sync_to_async(signedtokens.get_token_user_id)(key)
+        user_id = user_id or INVALID_TOKEN
+    else:
+        cache_key = get_token_cache_key(key)
+
+        user_id = await cache.aget(cache_key)
+        if user_id is None:
+            user_id = await _aquery_user_id(key)
+            await cache.aset(cache_key, user_id, get_token_cache_timeout())
+
+    memo[key] = user_id
+
+    return user_id or None
+
+
+def get_signed_token_user(key: str, request: "HttpRequest" = None):
+    """
+    Returns the user the given signed token belongs to, memoized on the request
+
+    The user is only loaded from the database when its fields are used, see
+    `signedtokens.LazyTokenUser`.
+
+    Returns:
+        the user or None when the token is not valid
+    """
+    memo = _get_memo(request) if request is not None else {}
+
+    memo_key = ("user", key)
+    if memo_key not in memo:
+        user = None
+
+        user_id = get_token_user_id(key, request)
+        if user_id is not None:
+            user = signedtokens.LazyTokenUser(user_id)
+
+        memo[memo_key] = user
+
+    return memo[memo_key]
+
+
+def invalidate_token(key: str) -> None:
+    """
+    Drops the cached lookup for the given token
+    """
+    cache.delete(get_token_cache_key(key))
+
+
+def invalidate_tokens_on_commit(keys: typing.Iterable[str], using: str = None) -> None:
+    """
+    Drops the cached lookups for the given tokens now and again once the current
+    transaction commits
+
+    A request that runs before the commit still reads the old rows and can cache
+    them again; the second delete drops those entries.
+    """
+    cache_keys = [get_token_cache_key(key) for key in keys]
+    if not cache_keys:
+        return
+
+    cache.delete_many(cache_keys)
+
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: cache.delete_many(cache_keys), using=using)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that resolves the token through the token cache
+
+    Bad tokens are turned away from cache; a good one is loaded with its user in one
+    query, and `request.auth` is the Token row like with TokenAuthentication.
+
+    Signed tokens, see `baseline.signedtokens`, are verified without the database
+    and the user is only loaded when its fields are used; for those `request.auth` is
+    the token itself.
+    """
+
+    def authenticate(self, request):
+        # authentication classes are instantiated per request
+        self.request = request
+
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        if signedtokens.uses_signed_token(key):
+            user = get_signed_token_user(key, getattr(self, "request", None))
+            if user is None:
+                raise exceptions.AuthenticationFailed("Invalid token.")
+
+            return user, key
+
+        user_id = get_token_user_id(key, getattr(self, "request", None))
+        if user_id is None:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        try:
+            token = Token.objects.select_related("user").get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+
+        return token.user, token
+
+
+def handle_token_changed(sender, instance, using=None, **kwargs) -> None:
+    invalidate_tokens_on_commit([instance.key], using=using)
+
+
+def handle_user_saved(
+    sender, instance, update_fields=None, using=None, **kwargs
+) -> None:
+    # e.g. saving only last_login cannot change which tokens are valid
+    if update_fields is not None and "is_active" not in update_fields:
+        return
+
+    if not instance.is_active:
+        signedtokens.revoke_user_tokens(instance.pk)
+
+    # the user may have been deactivated or reactivated
+    invalidate_tokens_on_commit(
+        Token.objects.using(using).filter(user=instance).values_list("key", flat=True),
+        using=using,
+    )
+
+
+post_save.connect(
+    handle_token_changed, sender=Token, dispatch_uid="baseline-auth-token-save"
+)
+post_delete.connect(
+    handle_token_changed, sender=Token, dispatch_uid="baseline-auth-token-delete"
+)
+post_save.connect(
+    handle_user_saved, sender=User, dispatch_uid="baseline-auth-token-user-save"
+)
@@ -0,0 +1,154 @@
+"""
+Authentication backends
+"""
+import typing
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from baseline.cachetags import (
+    get_tag_version_key,
+    get_tag_versions,
+    get_user_tag,
+    invalidate_tag_on_commit,
+)
+from baseline.passwords import PooledPasswordMixin
+
+USER_PERMISSIONS_CACHE_KEY = "user-permissions-{user_id}"
+
+# the number of seconds a user's permissions are cached for
+PERMISSIONS_CACHE_TIMEOUT = 300
+
+# bumped whenever a group's permissions change, which affects any number of users
+PERMISSIONS_TAG = "permissions"
+
+User = get_user_model()
+
+
+def get_permission_tags(user_id) -> typing.List[str]:
+    """
+    Returns the tags a user's cached permissions are stored with
+    """
+    return [PERMISSIONS_TAG, get_user_tag(user_id)]
+
+
+def invalidate_user_permissions(user_id, using: str = None) -> None:
+    """
+    Drops the cached permissions of the given user, again once the transaction commits
+    """
+    invalidate_tag_on_commit(get_user_tag(user_id), using=using)
+
+
+class CachedModelBackend(PooledPasswordMixin, ModelBackend):
+    """
+    ModelBackend that caches each user's flattened permission set
+
+    Passwords are verified in the hash pool when `PASSWORD_HASH_POOL` is set, see
+    `baseline.passwords`.
+
+    The permission set is stored together with the versions of the global permissions
+    tag and the user's tag.  The entry and both versions are read in one round-trip,
+    and the entry is only used when the versions still match, so a check on a freshly
+    loaded user is one cache read and a set lookup.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+
+        if not hasattr(user_obj, "_perm_cache"):
+            user_obj._perm_cache = self.get_cached_permissions(user_obj)
+
+        return user_obj._perm_cache
+
+    def get_cached_permissions(self, user_obj) -> typing.Set[str]:
+        """
+        Returns the user's permissions from cache, loading them on a miss
+        """
+        tags = get_permission_tags(user_obj.pk)
+        version_keys = [get_tag_version_key(tag) for tag in tags]
+        cache_key = USER_PERMISSIONS_CACHE_KEY.format(user_id=user_obj.pk)
+
+        data = cache.get_many([cache_key] + version_keys)
+
+        versions = [data.get(k) for k in version_keys]
+        if None in versions:
+            versions = [get_tag_versions(tags)[tag] for tag in tags]
+
+        entry = data.get(cache_key)
+        if entry is not None and entry[0] == versions:
+            return entry[1]
+
+        perms = super().get_all_permissions(user_obj)
+
+        timeout = getattr(
+            settings, "PERMISSIONS_CACHE_TIMEOUT", PERMISSIONS_CACHE_TIMEOUT
+        )
+        cache.set(cache_key, (versions, perms), timeout)
+
+        return perms
+
+
+def handle_user_saved(sender, instance, using=None, **kwargs) -> None:
+    # is_active and is_superuser change what the user is allowed to do
+    invalidate_user_permissions(instance.pk, using=using)
+
+
+def handle_user_groups_changed(
+    sender, instance, action, pk_set, using=None, **kwargs
+) -> None:
+    if not action.startswith("post_"):
+        return
+
+    if isinstance(instance, User):
+        invalidate_user_permissions(instance.pk, using=using)
+    elif action == "post_clear":
+        # the members of the group are not known after a clear
+        invalidate_tag_on_commit(PERMISSIONS_TAG, using=using)
+    else:
+        for pk in pk_set or ():
+            invalidate_user_permissions(pk, using=using)
+
+
+def handle_permissions_changed(sender, action, using=None, **kwargs) -> None:
+    # group permission changes, which includes roles, affect all of their members
+    if action.startswith("post_"):
+        invalidate_tag_on_commit(PERMISSIONS_TAG, using=using)
+
+
+def handle_group_or_permission_deleted(sender, using=None, **kwargs) -> None:
+    invalidate_tag_on_commit(PERMISSIONS_TAG, using=using)
+
+
+post_save.connect(
+    handle_user_saved, sender=User, dispatch_uid="baseline-permissions-user-save"
+)
+m2m_changed.connect(
+    handle_user_groups_changed,
+    sender=User.groups.through,
+    dispatch_uid="baseline-permissions-user-groups",
+)
+m2m_changed.connect(
+    handle_user_groups_changed,
+    sender=User.user_permissions.through,
+    dispatch_uid="baseline-permissions-user-permissions",
+)
+m2m_changed.connect(
+    handle_permissions_changed,
+    sender=Group.permissions.through,
+    dispatch_uid="baseline-permissions-group-permissions",
+)
+post_delete.connect(
+    handle_group_or_permission_deleted,
+    sender=Group,
+    dispatch_uid="baseline-permissions-group-delete",
+)
+post_delete.connect(
+    handle_group_or_permission_deleted,
+    sender=Permission,
+    dispatch_uid="baseline-permissions-permission-delete",
+)
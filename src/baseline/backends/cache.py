@@ -0,0 +1,897 @@
+"""
+Cache backends
+"""
+import atexit
+import collections
+import json
+import logging
+import math
+import os
+import threading
+import time
+import typing
+import uuid
+import weakref
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.redis import RedisCache, RedisCacheClient
+
+from baseline.cachestats import CacheStatsRecorder
+
+Any = typing.Any
+Iterable = typing.Iterable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INVALIDATION_CHANNEL = "baseline:cache:invalidate"
+
+# returned by the local cache when a key is not found
+MISSING = object()
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe, in-process cache that expires its entries
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        """
+        Returns the value for the key or MISSING when not found or expired
+        """
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                return MISSING
+
+            if expires <= time.monotonic():
+                del self._data[key]
+
+                return MISSING
+
+            self._data.move_to_end(key)
+
+            return value
+
+    def set(self, key: str, value: Any, timeout: float) -> None:
+        """
+        Stores the value for `timeout` seconds, evicting the least recently used entry when full
+        """
+        if timeout is not None and timeout <= 0:
+            self.delete(key)
+
+            return
+
+        expires = math.inf if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# the OPTIONS of RedisCacheClient that only apply to the sync client
+SYNC_CLIENT_OPTIONS = ("serializer", "pool_class", "parser_class")
+
+# the `redis.asyncio` clients of each event loop, by server and pool options
+_async_clients = weakref.WeakKeyDictionary()
+
+
+class AsyncRedisCacheMixin:
+    """
+    Native async cache methods for the Redis backends
+
+    Django's RedisCache inherits the async methods from BaseCache, which run the sync
+    methods in a thread.  These use `redis.asyncio` instead, so an async view or
+    middleware can read and write the cache without leaving the event loop.  A client
+    is created for each event loop because connections cannot be shared across loops,
+    and it is shared by every backend Django creates for the same cache.
+    """
+
+    def get_async_pool_options(self) -> dict:
+        """
+        Returns the connection pool options from the cache's OPTIONS
+
+        The pool and parser classes are left out since the sync ones cannot be used
+        with `redis.asyncio`.
+        """
+        return {
+            key: value
+            for key, value in self._options.items()
+            if key not in SYNC_CLIENT_OPTIONS
+        }
+
+    def get_async_client(self):
+        """
+        Returns the `redis.asyncio` client for the running event loop
+        """
+        import asyncio
+
+        import redis.asyncio
+
+        server = self._servers[0]
+        options = self.get_async_pool_options()
+
+        clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+        key = (server, repr(sorted(options.items())))
+
+        client = clients.get(key)
+        if client is None:
+            pool = redis.asyncio.ConnectionPool.from_url(server, **options)
+            client = clients[key] = redis.asyncio.Redis(connection_pool=pool)
+
+        return client
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self.get_backend_timeout(timeout)
+        client = self.get_async_client()
+
+        value = self._cache._serializer.dumps(value)
+        if timeout == 0:
+            if added := bool(await client.set(key, value, nx=True)):
+                await client.delete(key)
+
+            return added
+
+        return bool(await client.set(key, value, ex=timeout, nx=True))
+
+    async def aget(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+
+        value = await self.get_async_client().get(key)
+
+        return default if value is None else self._cache._serializer.loads(value)
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self.get_backend_timeout(timeout)
+        client = self.get_async_client()
+
+        if timeout == 0:
+            await client.delete(key)
+        else:
+            await client.set(key, self._cache._serializer.dumps(value), ex=timeout)
+
+    async def adelete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+
+        return bool(await self.get_async_client().delete(key))
+
+    async def aget_many(self, keys, version=None):
+        key_map = {
+            self.make_and_validate_key(key, version=version): key for key in keys
+        }
+        if not key_map:
+            return {}
+
+        values = await self.get_async_client().mget(list(key_map))
+
+        return {
+            key_map[k]: self._cache._serializer.loads(v)
+            for k, v in zip(key_map, values)
+            if v is not None
+        }
+
+
+class AsyncRedisCache(AsyncRedisCacheMixin, RedisCache):
+    """
+    RedisCache with native async methods
+    """
+
+
+class SizeRecordingSerializer:
+    """
+    Wraps a serializer to keep track of the number of bytes it processes
+
+    The size is tracked per thread (or greenlet, under gevent) so that it can be
+    attributed to the cache operation running in that thread.
+    """
+
+    def __init__(self, serializer):
+        self.serializer = serializer
+
+        self._local = threading.local()
+
+    @property
+    def size(self) -> int:
+        return getattr(self._local, "size", 0)
+
+    def reset(self) -> None:
+        self._local.size = 0
+
+    def _add(self, data) -> None:
+        if isinstance(data, bytes):
+            self._local.size = self.size + len(data)
+
+    def dumps(self, obj: Any) -> Any:
+        data = self.serializer.dumps(obj)
+        self._add(data)
+
+        return data
+
+    def loads(self, data: Any) -> Any:
+        self._add(data)
+
+        return self.serializer.loads(data)
+
+
+class InstrumentedRedisCacheClient(RedisCacheClient):
+    """
+    RedisCacheClient that records hits, misses, bytes and latency per key prefix
+    """
+
+    def __init__(self, *args, recorder: CacheStatsRecorder = None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self._serializer = SizeRecordingSerializer(self._serializer)
+        self.recorder = recorder or CacheStatsRecorder(
+            lambda: self.get_client(write=True)
+        )
+
+    def _call(self, fn, *args, **kwargs):
+        """
+        Calls the given function, recording the time it takes and the bytes processed
+
+        Returns:
+            tuple: the function's return value, the elapsed time and the number of bytes
+        """
+        self._serializer.reset()
+
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        latency = time.perf_counter() - start
+
+        return value, latency, self._serializer.size
+
+    def add(self, key, value, timeout):
+        added, latency, size = self._call(super().add, key, value, timeout)
+        self.recorder.record("add", [key], latency, bytes_written=size)
+
+        return added
+
+    def get(self, key, default):
+        value, latency, size = self._call(super().get, key, MISSING)
+
+        found = value is not MISSING
+        self.recorder.record(
+            "get",
+            [key],
+            latency,
+            hits=int(found),
+            misses=int(not found),
+            bytes_read=size,
+        )
+
+        return value if found else default
+
+    def set(self, key, value, timeout):
+        _, latency, size = self._call(super().set, key, value, timeout)
+        self.recorder.record("set", [key], latency, bytes_written=size)
+
+    def delete(self, key):
+        deleted, latency, _ = self._call(super().delete, key)
+        self.recorder.record("delete", [key], latency)
+
+        return deleted
+
+    def get_many(self, keys):
+        keys = list(keys)
+
+        found, latency, size = self._call(super().get_many, keys)
+        self.recorder.record(
+            "get_many",
+            keys,
+            latency,
+            hits=len(found),
+            misses=len(keys) - len(found),
+            bytes_read=size,
+        )
+
+        return found
+
+    def incr(self, key, delta):
+        value, latency, _ = self._call(super().incr, key, delta)
+        self.recorder.record("incr", [key], latency)
+
+        return value
+
+    def set_many(self, data, timeout):
+        _, latency, size = self._call(super().set_many, data, timeout)
+        self.recorder.record("set_many", data, latency, bytes_written=size)
+
+    def get_prefix_stats(self) -> dict:
+        """
+        Returns the counters per key prefix, aggregated across processes
+        """
+        return self.recorder.get_stats()
+
+
+class InstrumentedRedisCache(AsyncRedisCacheMixin, RedisCache):
+    """
+    AsyncRedisCache that records hits, misses, bytes and latency per key prefix
+
+    See `baseline.cachestats`.  The native async methods are not recorded.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+
+        self._class = InstrumentedRedisCacheClient
+
+    def get_prefix_stats(self) -> dict:
+        return self._cache.get_prefix_stats()
+
+
+class LocalTier:
+    """
+    The in-process state of a two-tier cache: the L1 entries, the hit counts and the
+    invalidation listener
+
+    Django creates a cache backend for every thread and asyncio task, so this state
+    is kept per process, see get_local_tier(), and shared by every backend configured
+    with the same location.
+    """
+
+    def __init__(self, max_entries: int, channel: str):
+        self.channel = channel
+
+        self.l1 = LRUCache(max_entries)
+        self.stats = collections.Counter()
+        self.node_id = str(uuid.uuid4())
+
+        self.pid = None
+
+        self._lock = threading.Lock()
+        self._listener = None
+        self._stopped = threading.Event()
+
+    def ensure_listener(self, get_client: typing.Callable) -> None:
+        """
+        Starts the invalidation listener for this process
+
+        Gunicorn forks workers after the app is loaded, so the listener is started
+        lazily and restarted when the process id changes.
+
+        Args:
+            get_client: returns the Redis client to subscribe with
+        """
+        pid = os.getpid()
+        if self.pid == pid:
+            return
+
+        with self._lock:
+            if self.pid == pid:
+                return
+
+            # anything in L1 came from the parent process and may be stale
+            self.l1.clear()
+            self.node_id = str(uuid.uuid4())
+
+            self._stopped = threading.Event()
+            self._listener = threading.Thread(
+                target=self._listen,
+                args=(get_client, self._stopped),
+                name="baseline-cache-invalidation",
+                daemon=True,
+            )
+            self._listener.start()
+
+            self.pid = pid
+
+    def _listen(self, get_client: typing.Callable, stopped: threading.Event) -> None:
+        """
+        Drops local entries as invalidation messages arrive, until stopped
+        """
+        while not stopped.is_set():
+            pubsub = None
+            try:
+                pubsub = get_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+
+                while not stopped.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        self.handle_invalidation(message["data"])
+            except Exception:
+                logger.exception("cache invalidation listener error")
+
+                # the connection may have dropped; entries may be stale now
+                self.l1.clear()
+
+                stopped.wait(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.unsubscribe()
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def handle_invalidation(self, data: typing.Union[str, bytes]) -> None:
+        """
+        Processes a message published on the invalidation channel
+
+        Args:
+            data: the JSON encoded message
+        """
+        message = json.loads(data)
+
+        # this process already updated its own L1
+        if message.get("origin") == self.node_id:
+            return
+
+        if message.get("clear"):
+            self.l1.clear()
+        else:
+            for key in message.get("keys", []):
+                self.l1.delete(key)
+
+        self.stats["invalidations"] += 1
+
+    def close(self, timeout: float = None) -> None:
+        """
+        Stops the listener, which unsubscribes and closes its connection
+        """
+        with self._lock:
+            self._stopped.set()
+
+            listener, self._listener = self._listener, None
+            self.pid = None
+
+        if listener is not None and listener is not threading.current_thread():
+            listener.join(timeout)
+
+
+# (location, channel, serializer) -> LocalTier
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+
+def get_local_tier(key: tuple, max_entries: int, channel: str) -> LocalTier:
+    """
+    Returns the process's local tier for the given cache configuration
+    """
+    tier = _local_tiers.get(key)
+    if tier is None:
+        with _local_tiers_lock:
+            tier = _local_tiers.get(key)
+            if tier is None:
+                tier = _local_tiers[key] = LocalTier(max_entries, channel)
+
+    return tier
+
+
+def close_local_tiers(timeout: float = None) -> None:
+    """
+    Stops every invalidation listener in this process and forgets the local tiers
+    """
+    with _local_tiers_lock:
+        tiers = list(_local_tiers.values())
+        _local_tiers.clear()
+
+    for tier in tiers:
+        tier.close(timeout)
+
+
+atexit.register(close_local_tiers, 1)
+
+
+class TwoTierRedisCache(AsyncRedisCacheMixin, RedisCache):
+    """
+    RedisCache with an in-process LRU cache in front of it
+
+    Reads are served from the local (L1) cache when possible.  Writes go to Redis (L2)
+    and a message is published on a Redis pub/sub channel so that every other process
+    drops its local copy of the changed keys.  L1 entries are kept for at most
+    `L1_TIMEOUT` seconds, which bounds staleness if an invalidation message is missed.
+
+    L1 stores the serialized value so that callers never share a mutable object.  It
+    and the listener are kept per process rather than per backend instance, which
+    Django creates for every thread and asyncio task; see `LocalTier`.
+
+    Configured with the following keys in OPTIONS:
+
+        L1_MAX_ENTRIES: the maximum number of entries kept in process (default 1000)
+        L1_TIMEOUT: the maximum number of seconds an entry is kept in process (default 5)
+        INVALIDATION_CHANNEL: the pub/sub channel used for invalidation messages
+    """
+
+    def __init__(self, server, params):
+        params = params.copy()
+        options = params["OPTIONS"] = params.get("OPTIONS", {}).copy()
+
+        self.l1_max_entries = int(options.pop("L1_MAX_ENTRIES", 1000))
+        self.l1_timeout = float(options.pop("L1_TIMEOUT", 5))
+        self.invalidation_channel = options.pop(
+            "INVALIDATION_CHANNEL", DEFAULT_INVALIDATION_CHANNEL
+        )
+
+        super().__init__(server, params)
+
+        self._tier = get_local_tier(
+            (server, self.invalidation_channel, options.get("serializer")),
+            self.l1_max_entries,
+            self.invalidation_channel,
+        )
+
+    @property
+    def _l1(self) -> LRUCache:
+        return self._tier.l1
+
+    @property
+    def stats(self) -> collections.Counter:
+        return self._tier.stats
+
+    @property
+    def node_id(self) -> str:
+        return self._tier.node_id
+
+    def _ensure_listener(self) -> None:
+        # hold on to the client only, not this backend instance
+        client = self._cache
+        self._tier.ensure_listener(lambda: client.get_client(write=False))
+
+    def handle_invalidation(self, data: typing.Union[str, bytes]) -> None:
+        """
+        Processes a message published on the invalidation channel
+        """
+        self._tier.handle_invalidation(data)
+
+    def _publish(self, keys: Iterable[str] = None, clear: bool = False) -> None:
+        """
+        Tells the other processes to drop their local copy of the given keys
+        """
+        message = {"origin": self.node_id}
+        if clear:
+            message["clear"] = True
+        else:
+            message["keys"] = list(keys)
+
+        client = self._cache.get_client(write=True)
+        client.publish(self.invalidation_channel, json.dumps(message))
+
+    def drop_local(self, keys: Iterable[str]) -> None:
+        """
+        Drops the local copy of the given full keys in every process
+
+        Used when keys are removed from Redis directly, bypassing the cache API.
+        """
+        self._ensure_listener()
+
+        keys = list(keys)
+        for key in keys:
+            self._l1.delete(key)
+
+        self._publish(keys)
+
+    def _l1_get(self, key: str) -> Any:
+        data = self._l1.get(key)
+        if data is MISSING:
+            return MISSING
+
+        return self._cache._serializer.loads(data)
+
+    def _l1_set(self, key: str, value: Any, timeout) -> None:
+        timeout = self.get_backend_timeout(timeout)
+        l1_timeout = (
+            self.l1_timeout if timeout is None else min(timeout, self.l1_timeout)
+        )
+
+        self._l1.set(key, self._cache._serializer.dumps(value), l1_timeout)
+
+    def get_stats(self) -> dict:
+        """
+        Returns the hit counts and ratios for each tier
+
+        The L2 hit ratio is relative to the requests that missed L1.
+        """
+        stats = dict(self.stats)
+
+        l1_hits = self.stats["l1_hits"]
+        l2_hits = self.stats["l2_hits"]
+        misses = self.stats["misses"]
+
+        total = l1_hits + l2_hits + misses
+        l2_total = l2_hits + misses
+
+        stats.update(
+            {
+                "l1_entries": len(self._l1),
+                "l1_hit_ratio": l1_hits / total if total else 0.0,
+                "l2_hit_ratio": l2_hits / l2_total if l2_total else 0.0,
+                "hit_ratio": (l1_hits + l2_hits) / total if total else 0.0,
+            }
+        )
+
+        return stats
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_listener()
+
+        added = super().add(key, value, timeout=timeout, version=version)
+        if added:
+            full_key = self.make_and_validate_key(key, version=version)
+            self._l1_set(full_key, value, timeout)
+            self._publish([full_key])
+
+        return added
+
+    def get(self, key, default=None, version=None):
+        self._ensure_listener()
+
+        full_key = self.make_and_validate_key(key, version=version)
+
+        value = self._l1_get(full_key)
+        if value is not MISSING:
+            self.stats["l1_hits"] += 1
+
+            return value
+
+        value = self._cache.get(full_key, MISSING)
+        if value is MISSING:
+            self.stats["misses"] += 1
+
+            return default
+
+        self.stats["l2_hits"] += 1
+        self._l1_set(full_key, value, DEFAULT_TIMEOUT)
+
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_listener()
+
+        super().set(key, value, timeout=timeout, version=version)
+
+        full_key = self.make_and_validate_key(key, version=version)
+        self._l1_set(full_key, value, timeout)
+        self._publish([full_key])
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_listener()
+
+        touched = super().touch(key, timeout=timeout, version=version)
+
+        # the other processes' copies have the old expiry
+        full_key = self.make_and_validate_key(key, version=version)
+        self._l1.delete(full_key)
+        self._publish([full_key])
+
+        return touched
+
+    def delete(self, key, version=None):
+        self._ensure_listener()
+
+        deleted = super().delete(key, version=version)
+
+        full_key = self.make_and_validate_key(key, version=version)
+        self._l1.delete(full_key)
+        self._publish([full_key])
+
+        return deleted
+
+    def get_many(self, keys, version=None):
+        self._ensure_listener()
+
+        found = {}
+        key_map = {}
+        for key in keys:
+            full_key = self.make_and_validate_key(key, version=version)
+
+            value = self._l1_get(full_key)
+            if value is MISSING:
+                key_map[full_key] = key
+            else:
+                found[key] = value
+
+        self.stats["l1_hits"] += len(found)
+
+        if key_map:
+            fetched = self._cache.get_many(key_map.keys())
+            for full_key, value in fetched.items():
+                self._l1_set(full_key, value, DEFAULT_TIMEOUT)
+                found[key_map[full_key]] = value
+
+            self.stats["l2_hits"] += len(fetched)
+            self.stats["misses"] += len(key_map) - len(fetched)
+
+        return found
+
+    def pop(self, key, default=None, version=None):
+        """
+        Atomically gets and deletes the given key
+        """
+        self._ensure_listener()
+
+        full_key = self.make_and_validate_key(key, version=version)
+        self._l1.delete(full_key)
+
+        data = self._cache.get_client(full_key, write=True).getdel(full_key)
+        if data is not None:
+            self._publish([full_key])
+
+            return self._cache._serializer.loads(data)
+
+        return default
+
+    async def _apublish(self, keys: Iterable[str]) -> None:
+        message = {"origin": self.node_id, "keys": list(keys)}
+
+        await self.get_async_client().publish(
+            self.invalidation_channel, json.dumps(message)
+        )
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_listener()
+
+        added = await super().aadd(key, value, timeout=timeout, version=version)
+        if added:
+            full_key = self.make_and_validate_key(key, version=version)
+            self._l1_set(full_key, value, timeout)
+            await self._apublish([full_key])
+
+        return added
+
+    async def aget(self, key, default=None, version=None):
+        self._ensure_listener()
+
+        full_key = self.make_and_validate_key(key, version=version)
+
+        value = self._l1_get(full_key)
+        if value is not MISSING:
+            self.stats["l1_hits"] += 1
+
+            return value
+
+        value = await super().aget(key, MISSING, version=version)
+        if value is MISSING:
+            self.stats["misses"] += 1
+
+            return default
+
+        self.stats["l2_hits"] += 1
+        self._l1_set(full_key, value, DEFAULT_TIMEOUT)
+
+        return value
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_listener()
+
+        await super().aset(key, value, timeout=timeout, version=version)
+
+        full_key = self.make_and_validate_key(key, version=version)
+        self._l1_set(full_key, value, timeout)
+        await self._apublish([full_key])
+
+    async def adelete(self, key, version=None):
+        self._ensure_listener()
+
+        deleted = await super().adelete(key, version=version)
+
+        full_key = self.make_and_validate_key(key, version=version)
+        self._l1.delete(full_key)
+        await self._apublish([full_key])
+
+        return deleted
+
+    async def aget_many(self, keys, version=None):
+        self._ensure_listener()
+
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._l1_get(self.make_and_validate_key(key, version=version))
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+
+        self.stats["l1_hits"] += len(found)
+
+        if missing:
+            fetched = await super().aget_many(missing, version=version)
+            for key, value in fetched.items():
+                full_key = self.make_and_validate_key(key, version=version)
+                self._l1_set(full_key, value, DEFAULT_TIMEOUT)
+
+            found.update(fetched)
+
+            self.stats["l2_hits"] += len(fetched)
+            self.stats["misses"] += len(missing) - len(fetched)
+
+        return found
+
+    def has_key(self, key, version=None):
+        self._ensure_listener()
+
+        full_key = self.make_and_validate_key(key, version=version)
+        if self._l1.get(full_key) is not MISSING:
+            return True
+
+        return super().has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._ensure_listener()
+
+        value = super().incr(key, delta=delta, version=version)
+
+        full_key = self.make_and_validate_key(key, version=version)
+        self._l1.delete(full_key)
+        self._publish([full_key])
+
+        return value
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_listener()
+
+        failed = super().set_many(data, timeout=timeout, version=version)
+
+        full_keys = []
+        for key, value in data.items():
+            full_key = self.make_and_validate_key(key, version=version)
+            self._l1_set(full_key, value, timeout)
+            full_keys.append(full_key)
+
+        if full_keys:
+            self._publish(full_keys)
+
+        return failed
+
+    def delete_many(self, keys, version=None):
+        self._ensure_listener()
+
+        super().delete_many(keys, version=version)
+
+        full_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        for full_key in full_keys:
+            self._l1.delete(full_key)
+
+        if full_keys:
+            self._publish(full_keys)
+
+    def clear(self):
+        self._ensure_listener()
+
+        cleared = super().clear()
+
+        self._l1.clear()
+        self._publish(clear=True)
+
+        return cleared
+
+
+class InstrumentedTwoTierRedisCache(TwoTierRedisCache):
+    """
+    TwoTierRedisCache that records hits, misses, bytes and latency per key prefix
+
+    Only the sync operations that reach Redis are recorded; L1 hits are in
+    `get_stats()`.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+
+        self._class = InstrumentedRedisCacheClient
+
+    def get_prefix_stats(self) -> dict:
+        return self._cache.get_prefix_stats()
@@ -0,0 +1,128 @@
+"""
+Serializers for the Redis cache backends
+"""
+import collections
+import lzma
+import pickle
+import time
+import typing
+import zlib
+
+from django.conf import settings
+from django.core.cache.backends.redis import RedisSerializer
+
+# the first byte of a compressed value; pickles always start with b"\x80", so values
+# written before compression was enabled are still read as plain pickles
+ZLIB_HEADER = b"Z"
+LZMA_HEADER = b"X"
+
+# counters for the compression, see `get_compression_stats()`
+compression_stats = collections.Counter()
+
+
+def get_compression_stats() -> dict:
+    """
+    Returns the compression counters for this process
+
+    Returns:
+        dict: with the following keys
+            compressed: the number of values that were compressed
+            bytes_in: the size of the values before compression
+            bytes_out: the size of the values after compression
+            bytes_saved: the difference between the two
+            compress_time: the number of seconds spent compressing
+            decompress_time: the number of seconds spent decompressing
+    """
+    stats = dict(compression_stats)
+    stats["bytes_saved"] = stats.get("bytes_in", 0) - stats.get("bytes_out", 0)
+
+    return stats
+
+
+class CompressedPickleSerializer(RedisSerializer):
+    """
+    Pickle serializer that compresses values above a size threshold
+
+    Configured with the following settings:
+
+        CACHE_COMPRESS_MIN_SIZE: values with a pickled size at or above this many bytes are compressed (default 1024)
+        CACHE_COMPRESS_ALGORITHM: `zlib` or `lzma` (default `zlib`)
+        CACHE_COMPRESS_LEVEL: the compression level (default 6 for zlib, 0 for lzma)
+
+    Integers are not pickled so that `incr()` and `decr()` keep working.
+    """
+
+    compressors = {
+        "zlib": (ZLIB_HEADER, lambda data, level: zlib.compress(data, level)),
+        "lzma": (
+            LZMA_HEADER,
+            lambda data, level: lzma.compress(data, preset=level),
+        ),
+    }
+
+    default_levels = {
+        "zlib": 6,
+        "lzma": 0,
+    }
+
+    def __init__(
+        self,
+        protocol: int = 5,
+        min_size: int = None,
+        algorithm: str = None,
+        level: int = None,
+    ):
+        super().__init__(protocol=protocol)
+
+        if min_size is None:
+            min_size = getattr(settings, "CACHE_COMPRESS_MIN_SIZE", 1024)
+
+        if algorithm is None:
+            algorithm = getattr(settings, "CACHE_COMPRESS_ALGORITHM", "zlib")
+
+        if level is None:
+            level = getattr(
+                settings, "CACHE_COMPRESS_LEVEL", self.default_levels[algorithm]
+            )
+
+        self.min_size = int(min_size)
+        self.algorithm = algorithm
+        self.level = int(level)
+
+        self.header, self.compress = self.compressors[algorithm]
+
+    def dumps(self, obj: typing.Any) -> typing.Union[bytes, int]:
+        data = super().dumps(obj)
+        if not isinstance(data, bytes) or len(data) < self.min_size:
+            return data
+
+        start = time.process_time()
+        compressed = self.header + self.compress(data, self.level)
+        compression_stats["compress_time"] += time.process_time() - start
+
+        # not everything compresses well; keep the original when it doesn't
+        if len(compressed) >= len(data):
+            compression_stats["incompressible"] += 1
+
+            return data
+
+        compression_stats["compressed"] += 1
+        compression_stats["bytes_in"] += len(data)
+        compression_stats["bytes_out"] += len(compressed)
+
+        return compressed
+
+    def loads(self, data: typing.Union[bytes, int]) -> typing.Any:
+        if isinstance(data, bytes):
+            header = data[:1]
+            if header == ZLIB_HEADER or header == LZMA_HEADER:
+                start = time.process_time()
+                if header == ZLIB_HEADER:
+                    data = zlib.decompress(data[1:])
+                else:
+                    data = lzma.decompress(data[1:])
+                compression_stats["decompress_time"] += time.process_time() - start
+
+                return pickle.loads(data)
+
+        return super().loads(data)
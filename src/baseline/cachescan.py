@@ -0,0 +1,220 @@
+"""
+helpers for deleting the cache entries that share a key prefix
+
+Keys are walked with an incremental `SCAN` and removed with `UNLINK` in batches, so
+Redis never blocks on a large keyspace the way it does with `KEYS` or `FLUSHDB`, and
+the memory is reclaimed in a background thread on the server.  The walk itself runs
+in a thread in this process, so the request that started it returns right away.
+"""
+import re
+import threading
+import time
+import typing
+import uuid
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+if typing.TYPE_CHECKING:
+    import redis
+
+    from django.core.cache.backends.base import BaseCache
+
+DELETE_PREFIX_JOB_KEY = "cache-delete-prefix-{job_id}"
+
+# how long the status of a job is kept around
+DELETE_PREFIX_JOB_TIMEOUT = 3600
+
+# glob characters that have to be escaped in a SCAN MATCH pattern
+GLOB_RE = re.compile(r"([\\*?\[\]])")
+
+
+class UnsupportedBackend(ImproperlyConfigured):
+    """
+    Raised when the cache backend cannot delete keys by prefix
+    """
+
+
+def get_redis_client(cache: "BaseCache") -> typing.Optional["redis.Redis"]:
+    """
+    Returns the Redis client behind the given cache or None when it's not a Redis cache
+    """
+    client = getattr(cache, "_cache", None)
+    if not hasattr(client, "get_client"):
+        return None
+
+    return client.get_client(write=True)
+
+
+def get_scan_client(cache: "BaseCache") -> "redis.Redis":
+    """
+    Returns the Redis client used to walk and delete the keys of the given cache
+
+    Raises:
+        UnsupportedBackend: when it's not a Redis cache
+    """
+    client = get_redis_client(cache)
+    if client is None:
+        raise UnsupportedBackend(
+            f"backend={cache.__class__.__name__} does not support deleting by prefix"
+        )
+
+    return client
+
+
+def get_match_pattern(cache: "BaseCache", prefix: str) -> str:
+    """
+    Returns the SCAN MATCH pattern for the keys starting with the given prefix
+
+    Args:
+        cache: the cache the keys were stored in
+        prefix: the key prefix, as passed to the cache API, e.g. `views.decorators.cache`
+
+    Returns:
+        str: the pattern, including the cache's own key prefix and version
+    """
+    return GLOB_RE.sub(r"\\\1", cache.make_key(prefix)) + "*"
+
+
+def get_job_key(job_id: str) -> str:
+    return DELETE_PREFIX_JOB_KEY.format(job_id=job_id)
+
+
+def get_delete_prefix_job(
+    job_id: str, cache_name: str = "default"
+) -> typing.Optional[dict]:
+    """
+    Returns the status of the given delete prefix job
+    """
+    return caches[cache_name].get(get_job_key(job_id))
+
+
+def delete_prefix(
+    prefix: str,
+    dry_run: bool = False,
+    batch_size: int = 500,
+    pause: float = 0.01,
+    cache: "BaseCache" = None,
+    on_batch: typing.Callable[[int], None] = None,
+) -> int:
+    """
+    Deletes the cache entries whose key starts with the given prefix
+
+    Args:
+        prefix: the key prefix, as passed to the cache API
+        dry_run: only count the matching keys
+        batch_size: the number of keys to ask for per SCAN and to delete per UNLINK
+        pause: the number of seconds to wait between batches
+        cache: the cache to delete from; defaults to the default cache
+        on_batch: called with the running count after each batch
+
+    Returns:
+        int: the number of keys matched
+
+    Raises:
+        UnsupportedBackend: when the cache is not a Redis cache
+    """
+    if cache is None:
+        cache = caches["default"]
+
+    client = get_scan_client(cache)
+
+    count = 0
+
+    def process(batch: list) -> None:
+        nonlocal count
+
+        if not dry_run:
+            client.unlink(*batch)
+
+            # the two-tier backend also has to drop its local copies
+            if hasattr(cache, "drop_local"):
+                cache.drop_local(
+                    [k.decode() if isinstance(k, bytes) else k for k in batch]
+                )
+
+        count += len(batch)
+        if on_batch:
+            on_batch(count)
+
+        if pause:
+            time.sleep(pause)
+
+    batch = []
+    for key in client.scan_iter(
+        match=get_match_pattern(cache, prefix), count=batch_size
+    ):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            process(batch)
+            batch = []
+
+    if batch:
+        process(batch)
+
+    return count
+
+
+def start_delete_prefix(
+    prefix: str, dry_run: bool = False, cache_name: str = "default", **kwargs
+) -> str:
+    """
+    Runs `delete_prefix()` in a background thread
+
+    The job's progress is stored in cache; see `get_delete_prefix_job()`.  The cache
+    is resolved in the calling thread, so the two-tier backend's local entries are
+    dropped from the instance serving requests.
+
+    Args:
+        prefix: the key prefix, as passed to the cache API
+        dry_run: only count the matching keys
+        cache_name: the cache to delete from
+        **kwargs: passed along to `delete_prefix()`
+
+    Returns:
+        str: the job id
+
+    Raises:
+        UnsupportedBackend: when the cache is not a Redis cache
+    """
+    cache = caches[cache_name]
+
+    # fail here rather than in the job, so the caller can tell the request was wrong
+    get_scan_client(cache)
+
+    job_id = str(uuid.uuid4())
+    job_key = get_job_key(job_id)
+
+    job = {
+        "job_id": job_id,
+        "prefix": prefix,
+        "dry_run": dry_run,
+        "status": "running",
+        "count": 0,
+    }
+    cache.set(job_key, job, timeout=DELETE_PREFIX_JOB_TIMEOUT)
+
+    def update(**fields) -> None:
+        job.update(fields)
+        cache.set(job_key, job, timeout=DELETE_PREFIX_JOB_TIMEOUT)
+
+    def run() -> None:
+        try:
+            count = delete_prefix(
+                prefix,
+                dry_run=dry_run,
+                cache=cache,
+                on_batch=lambda count: update(count=count),
+                **kwargs,
+            )
+        except Exception as exc:
+            update(status="error", error=repr(exc))
+        else:
+            update(status="done", count=count)
+
+    thread = threading.Thread(
+        target=run, name=f"baseline-cache-delete-prefix-{job_id}", daemon=True
+    )
+    thread.start()
+
+    return job_id
@@ -0,0 +1,199 @@
+"""
+helpers for recording cache hits, misses, bytes and latency per key prefix
+
+Each process keeps its counters in memory and periodically adds them to a Redis
+hash per prefix, so the numbers read back are aggregated across every worker.
+"""
+import collections
+import re
+import threading
+import time
+import typing
+
+from django.conf import settings
+
+if typing.TYPE_CHECKING:
+    import redis
+
+STATS_KEY = "baseline:cache:stats:{prefix}"
+STATS_PREFIXES_KEY = "baseline:cache:stats:prefixes"
+
+# logical prefixes of the keys written by baseline and by Django
+KNOWN_PREFIXES = (
+    "cache-tag-version",
+    "user-mfa-state",
+    "views.decorators.cache.cache_header",
+    "views.decorators.cache.cache_page",
+)
+
+# the part Django adds in front of every key, `<KEY_PREFIX>:<version>:`
+VERSIONED_KEY_RE = re.compile(r"^[^:]*:\d+:")
+
+UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+SEPARATOR_RE = re.compile(r"[:.\-]")
+
+
+def get_key_prefix(key: typing.Union[str, bytes]) -> str:
+    """
+    Returns the logical prefix of the given cache key
+
+    Args:
+        key: the full key, as sent to the cache server
+
+    Returns:
+        str: the prefix
+    """
+    if isinstance(key, bytes):
+        key = key.decode()
+
+    key = VERSIONED_KEY_RE.sub("", key, count=1)
+
+    # CacheStore nonces are bare UUIDs
+    if UUID_RE.match(key):
+        return "cachestore"
+
+    prefixes = KNOWN_PREFIXES + tuple(getattr(settings, "CACHE_STATS_PREFIXES", ()))
+    for prefix in prefixes:
+        if key.startswith(prefix):
+            return prefix
+
+    return SEPARATOR_RE.split(key, 1)[0]
+
+
+def get_summary(counters: typing.Dict[str, float]) -> typing.Dict[str, float]:
+    """
+    Adds the hit ratio and average latency to the given counters
+    """
+    summary = dict(counters)
+
+    hits = summary.get("hits", 0)
+    lookups = hits + summary.get("misses", 0)
+    ops = summary.get("ops", 0)
+
+    summary["hit_ratio"] = hits / lookups if lookups else 0.0
+    summary["avg_latency_ms"] = summary.get("latency", 0) * 1000 / ops if ops else 0.0
+
+    return summary
+
+
+class CacheStatsRecorder:
+    """
+    Records cache operations per key prefix
+
+    Args:
+        get_client: returns the Redis client used to aggregate the counters
+        flush_interval: the number of seconds between writes to Redis
+    """
+
+    def __init__(
+        self,
+        get_client: typing.Callable[[], "redis.Redis"] = None,
+        flush_interval: float = 10,
+    ):
+        self.get_client = get_client
+        self.flush_interval = flush_interval
+
+        self.counters = collections.defaultdict(collections.Counter)
+
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(
+        self,
+        op: str,
+        keys: typing.Iterable[typing.Union[str, bytes]],
+        latency: float,
+        hits: int = 0,
+        misses: int = 0,
+        bytes_read: int = 0,
+        bytes_written: int = 0,
+    ) -> None:
+        """
+        Records a single round-trip to the cache server
+
+        When the operation involves keys with different prefixes, the latency and
+        bytes are attributed to each of the prefixes.
+
+        Args:
+            op: the operation, e.g. `get`, `set`
+            keys: the keys involved in the operation
+            latency: the number of seconds the round-trip took
+            hits: the number of keys found
+            misses: the number of keys not found
+            bytes_read: the size of the values read
+            bytes_written: the size of the values written
+        """
+        prefixes = {get_key_prefix(key) for key in keys}
+
+        with self._lock:
+            for prefix in prefixes:
+                counter = self.counters[prefix]
+                counter["ops"] += 1
+                counter[op] += 1
+                counter["latency"] += latency
+                counter["hits"] += hits
+                counter["misses"] += misses
+                counter["bytes_read"] += bytes_read
+                counter["bytes_written"] += bytes_written
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Adds the counters recorded in this process to the aggregate in Redis
+        """
+        # without Redis the counters stay in this process
+        if not self.get_client:
+            return
+
+        with self._lock:
+            counters, self.counters = self.counters, collections.defaultdict(
+                collections.Counter
+            )
+            self._last_flush = time.monotonic()
+
+        if not counters:
+            return
+
+        try:
+            pipeline = self.get_client().pipeline(transaction=False)
+            for prefix, counter in counters.items():
+                pipeline.sadd(STATS_PREFIXES_KEY, prefix)
+
+                stats_key = STATS_KEY.format(prefix=prefix)
+                for name, value in counter.items():
+                    pipeline.hincrbyfloat(stats_key, name, value)
+
+            pipeline.execute()
+        except Exception as exc:
+            print(f"unable to flush cache stats, exc={exc!r}")
+
+    def get_stats(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        """
+        Returns the counters per prefix, aggregated across processes when possible
+        """
+        if not self.get_client:
+            with self._lock:
+                return {
+                    prefix: get_summary(counter)
+                    for prefix, counter in self.counters.items()
+                }
+
+        self.flush()
+
+        client = self.get_client()
+
+        prefixes = sorted(p.decode() for p in client.smembers(STATS_PREFIXES_KEY))
+
+        pipeline = client.pipeline(transaction=False)
+        for prefix in prefixes:
+            pipeline.hgetall(STATS_KEY.format(prefix=prefix))
+
+        stats = {}
+        for prefix, counters in zip(prefixes, pipeline.execute()):
+            counters = {k.decode(): float(v) for k, v in counters.items()}
+            stats[prefix] = get_summary(counters)
+
+        return stats
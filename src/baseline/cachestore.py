@@ -1,13 +1,25 @@
 """
 helpers for dealing with temporary storage in cache
 """
+import pickle
 import typing
 import uuid
 
-from django.core.cache import cache
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.redis import RedisCache
 
 Nonce = typing.AnyStr
 
+# the default amount of time (in seconds) data is kept when no timeout is given
+CACHESTORE_TIMEOUT = 86400
+
+
+class PayloadTooLarge(ValueError):
+    """
+    Raised when the data to store is larger than the configured maximum
+    """
+
 
 def get_nonce() -> Nonce:
     """
@@ -16,11 +28,69 @@ def get_nonce() -> Nonce:
     return str(uuid.uuid4())
 
 
+def cache_pop(key: str, default: typing.Any = None) -> typing.Any:
+    """
+    Gets and deletes the given key from the default cache
+
+    When the backend is Redis this is a single atomic GETDEL; otherwise the key is
+    deleted after it is read and the value is only returned to the caller that
+    actually deleted it, so it's still only handed out once.
+
+    Args:
+        key: the cache key
+        default: returned when the key is not in cache
+    """
+    backend = caches[DEFAULT_CACHE_ALIAS]
+
+    # the two-tier backend also has to drop its local copy
+    if hasattr(backend, "pop"):
+        return backend.pop(key, default)
+
+    if isinstance(backend, RedisCache):
+        full_key = backend.make_and_validate_key(key)
+        data = backend._cache.get_client(full_key, write=True).getdel(full_key)
+
+        return default if data is None else backend._cache._serializer.loads(data)
+
+    value = backend.get(key, default)
+    if not backend.delete(key):
+        return default
+
+    return value
+
+
 class CacheStore:
     """
     Class to store and retrieve data in cache using a nonce
+
+    Data is kept for `CACHESTORE_TIMEOUT` seconds unless a timeout is given.  The
+    `CACHESTORE_MAX_SIZE` setting caps the size, in pickled bytes, of the data that
+    can be stored.
     """
 
+    @staticmethod
+    def get_timeout(timeout: int = None) -> int:
+        """
+        Returns the given timeout or the configured default
+        """
+        if timeout is None:
+            timeout = getattr(settings, "CACHESTORE_TIMEOUT", CACHESTORE_TIMEOUT)
+
+        return timeout
+
+    @staticmethod
+    def check_size(data: typing.Any) -> None:
+        """
+        Raises PayloadTooLarge when the data is larger than the configured maximum
+        """
+        max_size = getattr(settings, "CACHESTORE_MAX_SIZE", None)
+        if not max_size:
+            return
+
+        size = len(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+        if size > max_size:
+            raise PayloadTooLarge(f"size={size} is larger than max_size={max_size}")
+
     @staticmethod
     def get(nonce: Nonce) -> typing.Any:
         """
@@ -29,18 +99,64 @@ class CacheStore:
         return cache.get(nonce)
 
     @staticmethod
-    def set(data: typing.Any) -> Nonce:
+    def get_many(nonces: typing.Iterable[Nonce]) -> typing.Dict[Nonce, typing.Any]:
+        """
+        Returns the items stored at the given nonce addresses in a single round-trip
+
+        Nonces that are not found are not in the returned dictionary.
+        """
+        return cache.get_many(nonces)
+
+    @staticmethod
+    def pop(nonce: Nonce) -> typing.Any:
+        """
+        Returns the item stored at the nonce address and removes it
+
+        Use this for true one-time use; only one caller will ever get the data.
+        """
+        return cache_pop(nonce)
+
+    @classmethod
+    def set(cls, data: typing.Any, timeout: int = None) -> Nonce:
         """
         Places the given data into cache using a unique nonce
 
         Args:
             data: the data to store
+            timeout: the amount of time (in seconds) to keep the data
 
         Returns:
             Nonce: the key where the data is stored
         """
+        cls.check_size(data)
+
         nonce = get_nonce()
 
-        cache.set(nonce, data)
+        cache.set(nonce, data, timeout=cls.get_timeout(timeout))
 
         return nonce
+
+    @classmethod
+    def set_many(
+        cls, items: typing.Iterable[typing.Any], timeout: int = None
+    ) -> typing.List[Nonce]:
+        """
+        Places each of the given items into cache in a single round-trip
+
+        Args:
+            items: the data to store
+            timeout: the amount of time (in seconds) to keep the data
+
+        Returns:
+            list: the nonces where the items are stored, in the same order
+        """
+        data = {}
+        for item in items:
+            cls.check_size(item)
+
+            data[get_nonce()] = item
+
+        if data:
+            cache.set_many(data, timeout=cls.get_timeout(timeout))
+
+        return list(data)
@@ -0,0 +1,154 @@
+"""
+helpers for invalidating groups of cache entries by tag
+
+Every tag has a version number stored in cache.  Tagged keys embed the current
+version of each of their tags, so bumping a tag's version makes every entry that
+was stored under the old version unreachable without scanning for keys.  The
+orphaned entries age out on their own timeout.
+"""
+import time
+import typing
+
+from django.core.cache import cache
+from django.db import transaction
+
+if typing.TYPE_CHECKING:
+    from django.db.models import Model
+
+StringList = typing.Iterable[str]
+
+CACHE_TAG_VERSION_KEY = "cache-tag-version-{tag}"
+
+
+def get_model_tag(model: typing.Union["Model", typing.Type["Model"]]) -> str:
+    """
+    Returns the tag for the given model class or instance
+    """
+    meta = model._meta
+
+    return f"model:{meta.app_label}.{meta.model_name}"
+
+
+def get_user_tag(user) -> str:
+    """
+    Returns the tag for the given user or user id
+    """
+    user_id = getattr(user, "pk", user)
+
+    return f"user:{user_id}"
+
+
+def get_tag_version_key(tag: str) -> str:
+    """
+    Returns the cache key holding the version for the given tag
+    """
+    return CACHE_TAG_VERSION_KEY.format(tag=tag)
+
+
+def new_version() -> int:
+    """
+    Returns a version number for a tag that does not have one
+
+    The version is time-based rather than starting at 1 so that a version key that
+    is evicted from cache does not resurrect entries stored under an old version.
+    """
+    return time.time_ns()
+
+
+def get_tag_versions(tags: StringList) -> typing.Dict[str, int]:
+    """
+    Returns the current version of each of the given tags
+
+    Args:
+        tags: the tags to look up
+
+    Returns:
+        dict: a mapping of tag to its version
+    """
+    tags = sorted(set(tags))
+    version_keys = {get_tag_version_key(tag): tag for tag in tags}
+
+    versions = {
+        version_keys[k]: v for k, v in cache.get_many(list(version_keys)).items()
+    }
+
+    for tag in tags:
+        if tag in versions:
+            continue
+
+        version = new_version()
+        version_key = get_tag_version_key(tag)
+
+        # another process may have initialized the tag in the meantime
+        if not cache.add(version_key, version, timeout=None):
+            version = cache.get(version_key, version)
+
+        versions[tag] = version
+
+    return versions
+
+
+def get_tagged_key(
+    key: str, tags: StringList, versions: typing.Dict[str, int] = None
+) -> str:
+    """
+    Returns the given key with the current version of each tag embedded in it
+
+    Args:
+        key: the cache key
+        tags: the tags the cache entry belongs to
+        versions: tag versions that were already looked up with `get_tag_versions()`
+
+    Returns:
+        str: the versioned cache key
+    """
+    if not tags:
+        return key
+
+    tags = sorted(set(tags))
+    if versions is None:
+        versions = get_tag_versions(tags)
+
+    tags_s = ",".join(f"{tag}={versions[tag]}" for tag in tags)
+
+    return f"{key}:tags[{tags_s}]"
+
+
+def invalidate_tag(tag: str) -> int:
+    """
+    Invalidates every cache entry stored with the given tag
+
+    Args:
+        tag: the tag to invalidate
+
+    Returns:
+        int: the tag's new version
+    """
+    version_key = get_tag_version_key(tag)
+
+    try:
+        return cache.incr(version_key)
+    except ValueError:
+        # the tag was never used or its version was evicted
+        version = new_version()
+        cache.set(version_key, version, timeout=None)
+
+        return version
+
+
+def invalidate_tag_on_commit(tag: str, using: str = None) -> None:
+    """
+    Invalidates the given tag now and again once the current transaction commits
+
+    A request that runs before the commit still reads the old rows and can cache
+    them under the version bumped now; the bump after the commit drops them.  Outside
+    of a transaction the tag is only invalidated once.
+
+    Args:
+        tag: the tag to invalidate
+        using: the database the transaction is on
+    """
+    invalidate_tag(tag)
+
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: invalidate_tag(tag), using=using)
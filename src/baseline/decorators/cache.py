@@ -1,4 +1,9 @@
+import collections
 import functools
+import math
+import random
+import time
+import typing
 
 from django.core.cache import cache
 from django.utils.decorators import method_decorator
@@ -6,33 +11,401 @@ from django.views.decorators.cache import cache_control
 from django.views.decorators.http import condition
 from django.views.decorators.vary import vary_on_headers
 
+from baseline.cachetags import get_tag_versions, get_tagged_key
 
-def cached(name: str = None, timeout=None):
+
+# returned by lookups when nothing is stored for a key
+NOT_CACHED = object()
+
+# counters for the single-flight mode, keyed by the cache name
+single_flight_stats = collections.defaultdict(collections.Counter)
+
+
+class CacheEntry(typing.NamedTuple):
+    """
+    A cached value along with the bookkeeping needed for early refresh
+
+    Attributes:
+        value: the cached value
+        delta: the number of seconds it took to compute the value
+        expires: the timestamp at which the value is considered stale
+    """
+
+    value: typing.Any
+    delta: float
+    expires: float
+
+
+class NegativeResult(typing.NamedTuple):
+    """
+    Wrapper to cache a falsy value or an expected exception
+
+    A tuple with items is always truthy, so wrapping the value makes a cached
+    `None`, `0`, `[]`, etc. distinguishable from a key that is not in cache.
+
+    Attributes:
+        value: the falsy value returned by the cached function
+        exception: the exception raised by the cached function
+    """
+
+    value: typing.Any = None
+    exception: BaseException = None
+
+    def unwrap(self) -> typing.Any:
+        """
+        Returns the original value or raises the original exception
+        """
+        if self.exception is not None:
+            raise self.exception
+
+        return self.value
+
+
+def decode(value: typing.Any) -> typing.Any:
+    """
+    Returns the stored value as the `cached` decorator sees it
+
+    Every mode of `cached` and `cached_many` reads entries through this, so entries
+    written by one are served by the others.
+
+    Args:
+        value: the raw value from cache, a `CacheEntry` in single-flight mode
+
+    Returns:
+        `NOT_CACHED` when the decorator would call the function, a `NegativeResult`
+        for a cached miss, and the value otherwise
+    """
+    if isinstance(value, CacheEntry):
+        value = value.value
+
+    # falsy values that are not wrapped are never served by the decorator
+    if not isinstance(value, NegativeResult) and not value:
+        return NOT_CACHED
+
+    return value
+
+
+def get_single_flight_stats() -> dict:
+    """
+    Returns a copy of the single-flight counters for every cache name
+    """
+    return {name: dict(counter) for name, counter in single_flight_stats.items()}
+
+
+def should_refresh(entry: CacheEntry, beta: float, now: float = None) -> bool:
+    """
+    Returns whether the given entry should be recomputed
+
+    This is the XFetch algorithm; the closer an entry is to its expiration, and
+    the longer it took to compute, the more likely it will be refreshed early.
+
+    Args:
+        entry: the cache entry to check
+        beta: values greater than 1.0 favor earlier refreshes, 0 disables early refresh
+        now: the current timestamp
+    """
+    now = now or time.time()
+
+    # use 1 - random() to keep the value in (0, 1] so that log() is defined
+    early = entry.delta * beta * -math.log(1.0 - random.random())
+
+    return now + early >= entry.expires
+
+
+def unwrap(value: typing.Any) -> typing.Any:
+    """
+    Returns the value that was originally returned by a cached function
+    """
+    if isinstance(value, NegativeResult):
+        return value.unwrap()
+
+    return value
+
+
+def cached(
+    name: str = None,
+    timeout=None,
+    negative_timeout=None,
+    negative_exceptions: typing.Tuple[typing.Type[BaseException], ...] = (),
+    tags: typing.Union[typing.Iterable[str], typing.Callable] = None,
+    single_flight: bool = False,
+    lease_timeout: int = 10,
+    stale_timeout: int = 60,
+    wait_timeout: float = 2.0,
+    poll_interval: float = 0.05,
+    early_refresh_beta: float = 1.0,
+):
     """
     Cache decorator
 
+    The wrapped function gets a `get_cached(self, *args, **kwargs)` attribute that
+    returns what is stored without calling the function: `NOT_CACHED` when the key is
+    not in cache, a `NegativeResult` for a cached miss, and the value otherwise.
+
     Args:
         name: the name to use, otherwise the function name is used
         timeout: the amount of time (in seconds) to persist the data in
         the cache
+        negative_timeout: when set, falsy results are cached for this amount of time
+        (in seconds); otherwise they are recomputed on every call
+        negative_exceptions: exceptions that are cached like falsy results and
+        re-raised on a hit, e.g. `ObjectDoesNotExist`; requires `negative_timeout`
+        tags: a list of tags, or a callable taking the method's arguments that returns
+        them; entries are dropped when one of their tags is invalidated, see
+        `baseline.cachetags`
+        single_flight: when True, only one caller recomputes an expired value
+        while the others wait for it or get the stale value
+        lease_timeout: the maximum amount of time (in seconds) the recompute lease is held
+        stale_timeout: the amount of time (in seconds) a stale value is kept around
+        after it expires in order to be served while it's recomputed
+        wait_timeout: the amount of time (in seconds) to wait for another caller's
+        recompute when there is no stale value to serve
+        poll_interval: the amount of time (in seconds) between checks while waiting
+        early_refresh_beta: how eagerly to recompute a value before it expires; 0 disables
     """
 
     def decorator(fn):
+        cache_name = name or fn.__name__
+        stats = single_flight_stats[cache_name]
+
+        def get_key(self, *args, **kwargs):
+            cache_key = self.get_cache_key(cache_name, *args, **kwargs)
+
+            entry_tags = tags(self, *args, **kwargs) if callable(tags) else tags
+
+            return get_tagged_key(cache_key, entry_tags)
+
+        def get_timeout(result):
+            if isinstance(result, NegativeResult):
+                return negative_timeout
+
+            return timeout or cache.default_timeout
+
+        def call(self, *args, **kwargs):
+            """
+            Calls the function, wrapping negative results when they are cached
+            """
+            if not negative_timeout:
+                return fn(self, *args, **kwargs)
+
+            try:
+                result = fn(self, *args, **kwargs)
+            except negative_exceptions as exc:
+                return NegativeResult(exception=exc)
+
+            if not result:
+                result = NegativeResult(result)
+
+            return result
+
+        def compute(self, cache_key, *args, **kwargs):
+            start = time.time()
+            result = call(self, *args, **kwargs)
+            delta = time.time() - start
+
+            # falsy results are recomputed on every call unless they are negative cached
+            if not result:
+                return result
+
+            entry_timeout = get_timeout(result)
+            expires = start + entry_timeout if entry_timeout else math.inf
+            entry = CacheEntry(result, delta, expires)
+
+            # keep the entry around past its expiration so it can be served stale
+            cache.set(
+                cache_key,
+                entry,
+                timeout=entry_timeout + stale_timeout if entry_timeout else None,
+            )
+
+            return unwrap(result)
+
+        def single_flight_wrapper(self, cache_key, *args, **kwargs):
+            entry = cache.get(cache_key, NOT_CACHED)
+            if isinstance(entry, CacheEntry):
+                if not should_refresh(entry, early_refresh_beta):
+                    return unwrap(entry.value)
+
+                if time.time() < entry.expires:
+                    stats["early_refreshes"] += 1
+            else:
+                # written by `cached_many` or without single-flight; there is no
+                # expiration to refresh early against
+                value = decode(entry)
+                if value is not NOT_CACHED:
+                    return unwrap(value)
+
+            lease_key = f"{cache_key}:lease"
+            if cache.add(lease_key, 1, timeout=lease_timeout):
+                stats["leases"] += 1
+                start = time.time()
+                try:
+                    return compute(self, cache_key, *args, **kwargs)
+                finally:
+                    cache.delete(lease_key)
+                    stats["lease_hold_time"] += time.time() - start
+
+            # another caller is recomputing; serve what is already there
+            if isinstance(entry, CacheEntry):
+                stats["stale_serves"] += 1
+
+                return unwrap(entry.value)
+
+            # nothing to serve, wait for the caller holding the lease
+            stats["waits"] += 1
+            start = time.monotonic()
+            deadline = start + wait_timeout
+            try:
+                while time.monotonic() < deadline:
+                    time.sleep(poll_interval)
+
+                    value = decode(cache.get(cache_key, NOT_CACHED))
+                    if value is not NOT_CACHED:
+                        return unwrap(value)
+            finally:
+                stats["wait_time"] += time.monotonic() - start
+
+            # the lease holder did not finish in time; compute without the lease
+            stats["wait_timeouts"] += 1
+
+            return compute(self, cache_key, *args, **kwargs)
+
         @functools.wraps(fn)
         def wrapper(self, *args, **kwargs):
-            cache_key = self.get_cache_key(name or fn.__name__, *args, **kwargs)
-            result = cache.get(cache_key)
+            cache_key = get_key(self, *args, **kwargs)
+            if single_flight:
+                return single_flight_wrapper(self, cache_key, *args, **kwargs)
 
-            if result:
-                return result
+            result = decode(cache.get(cache_key, NOT_CACHED))
+            if result is not NOT_CACHED:
+                return unwrap(result)
 
-            result = fn(self, *args, **kwargs)
+            result = call(self, *args, **kwargs)
             timeout_arg = {}
-            if timeout:
+            if isinstance(result, NegativeResult):
+                timeout_arg["timeout"] = negative_timeout
+            elif timeout:
                 timeout_arg["timeout"] = timeout
             cache.set(cache_key, result, **timeout_arg)
 
-            return result
+            return unwrap(result)
+
+        def get_cached(self, *args, **kwargs):
+            """
+            Returns what is stored in cache without calling the function
+            """
+            cache_key = get_key(self, *args, **kwargs)
+
+            return decode(cache.get(cache_key, NOT_CACHED))
+
+        wrapper.get_cached = get_cached
+
+        return wrapper
+
+    return decorator
+
+
+def cached_many(
+    name: str = None,
+    timeout=None,
+    negative_timeout=None,
+    tags: typing.Union[typing.Iterable[str], typing.Callable] = None,
+):
+    """
+    Batch companion to the `cached` decorator
+
+    The decorated method is called with the list of argument tuples that are not
+    in cache and must return one result per tuple, in the same order.  Keys are
+    generated with `self.get_cache_key(name, *args)`, so a method decorated with
+    `cached(name)` shares its entries with one decorated with `cached_many(name)`.
+
+    For example:
+
+    ```
+    @cached_many("widget")
+    def get_widgets(self, args_list):
+        pks = [pk for (pk,) in args_list]
+        widgets = Widget.objects.in_bulk(pks)
+
+        return [widgets.get(pk) for pk in pks]
+
+    widgets = self.get_widgets([(1,), (2,), (3,)])
+    ```
+
+    Args:
+        name: the name to use, otherwise the function name is used
+        timeout: the amount of time (in seconds) to persist the data in
+        the cache
+        negative_timeout: when set, falsy results are cached for this amount of time
+        (in seconds); otherwise they are recomputed on every call
+        tags: a list of tags, or a callable taking one argument tuple that returns them;
+        must match the tags given to the `cached` decorator sharing the entries
+    """
+
+    def decorator(fn):
+        cache_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(self, args_list: typing.Iterable[tuple]) -> list:
+            args_list = [tuple(args) for args in args_list]
+            cache_keys = [self.get_cache_key(cache_name, *args) for args in args_list]
+
+            if tags:
+                if callable(tags):
+                    args_tags = [tags(self, *args) for args in args_list]
+                else:
+                    args_tags = [tags] * len(args_list)
+
+                # look up the versions for all the tags in one round-trip
+                versions = get_tag_versions(
+                    tag for entry_tags in args_tags for tag in entry_tags
+                )
+                cache_keys = [
+                    get_tagged_key(cache_key, entry_tags, versions=versions)
+                    for cache_key, entry_tags in zip(cache_keys, args_tags)
+                ]
+
+            found = cache.get_many(cache_keys)
+
+            results = {}
+            misses = {}
+            for cache_key, args in zip(cache_keys, args_list):
+                value = decode(found.get(cache_key, NOT_CACHED))
+                if value is NOT_CACHED:
+                    misses[cache_key] = args
+                else:
+                    results[cache_key] = value
+
+            if misses:
+                computed = list(fn(self, list(misses.values())))
+                if len(computed) != len(misses):
+                    raise ValueError(
+                        f"{fn.__name__} returned {len(computed)} results for {len(misses)} arguments"
+                    )
+
+                data = {}
+                negative_data = {}
+                for cache_key, result in zip(misses, computed):
+                    if result:
+                        data[cache_key] = result
+                    elif negative_timeout:
+                        result = NegativeResult(result)
+                        negative_data[cache_key] = result
+
+                    # falsy results are not stored when negative caching is off
+                    # because the decorators would never serve them
+                    results[cache_key] = result
+
+                if data:
+                    timeout_arg = {}
+                    if timeout:
+                        timeout_arg["timeout"] = timeout
+                    cache.set_many(data, **timeout_arg)
+
+                if negative_data:
+                    cache.set_many(negative_data, timeout=negative_timeout)
+
+            return [unwrap(results[cache_key]) for cache_key in cache_keys]
 
         return wrapper
 
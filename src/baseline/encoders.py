@@ -0,0 +1,355 @@
+"""
+JSON encoder backends for the baseline renderers
+
+Every backend produces the same bytes as DRF's `JSONRenderer`:
+
+    stdlib: the stdlib C encoder, built once per set of options instead of on every
+        call, with a `default` hook that dispatches on the exact type before falling
+        back to DRF's isinstance chain
+    orjson: the native encoder, used when it's installed; payloads it cannot render
+        identically are handed to the stdlib backend
+
+Select the backend with the `JSON_ENCODER_BACKEND` setting: `auto` (the default)
+uses orjson when it's installed, or give a backend name or a dotted path to a
+backend class.
+
+orjson writes NaN and infinite floats as `null` where DRF's strict renderer raises
+ValueError, so when orjson output has a `null` the data is checked for them and,
+when found, encoded by the stdlib backend, which raises the same way DRF does.
+Iterators can only be read once, so the values orjson's `default` hook made of
+them are kept and given to the stdlib backend in place of the spent iterators.
+
+`python manage.py benchmark_json` compares the backends with DRF's renderer.
+"""
+import datetime
+import decimal
+import functools
+import ipaddress
+import json
+import math
+import re
+import typing
+import uuid
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+SHORT_SEPARATORS = (",", ":")
+LONG_SEPARATORS = (", ", ": ")
+INDENT_SEPARATORS = (",", ": ")
+
+# orjson writes very large and very small floats differently than `float.__repr__()`,
+# e.g. `1e16` instead of `1e+16` and `0.00001` instead of `1e-05`; these find the
+# candidates, which are checked to be numbers with has_float_mismatch()
+FLOAT_MISMATCH_RES = (re.compile(rb"e[-0-9]"), re.compile(rb"0\.0000"))
+
+NUMBER_BYTES = b"0123456789.-"
+
+# the bytes that precede a value in compact JSON
+VALUE_START_BYTES = b":,["
+
+CONTAINER_TYPES = (dict, list, tuple)
+
+_drf_encoder = JSONEncoder()
+
+
+def encode_datetime(obj: datetime.datetime) -> str:
+    representation = obj.isoformat()
+    if representation.endswith("+00:00"):
+        representation = representation[:-6] + "Z"
+
+    return representation
+
+
+def encode_time(obj: datetime.time) -> str:
+    if timezone.is_aware(obj):
+        raise ValueError("JSON can't represent timezone-aware times.")
+
+    return obj.isoformat()
+
+
+# exact type -> converter for the types DRF's encoder handles; subclasses go
+# through DRF's encoder so they are treated exactly the same way
+DEFAULT_DISPATCH = {
+    datetime.datetime: encode_datetime,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: encode_time,
+    datetime.timedelta: lambda obj: str(obj.total_seconds()),
+    decimal.Decimal: float,
+    uuid.UUID: str,
+    ipaddress.IPv4Address: str,
+    ipaddress.IPv6Address: str,
+    ipaddress.IPv4Network: str,
+    ipaddress.IPv6Network: str,
+    ipaddress.IPv4Interface: str,
+    ipaddress.IPv6Interface: str,
+    bytes: bytes.decode,
+}
+
+
+def default(obj: typing.Any) -> typing.Any:
+    """
+    Converts the given object into something JSON can represent
+    """
+    converter = DEFAULT_DISPATCH.get(type(obj))
+    if converter is not None:
+        return converter(obj)
+
+    return _drf_encoder.default(obj)
+
+
+def has_float_mismatch(rendered: bytes) -> bool:
+    """
+    Returns whether orjson wrote a float that `float.__repr__()` writes differently
+
+    Matches inside strings can be mistaken for floats, which only costs a fallback
+    to the stdlib backend.
+    """
+    for regex in FLOAT_MISMATCH_RES:
+        for match in regex.finditer(rendered):
+            start = match.start()
+            while start and rendered[start - 1] in NUMBER_BYTES:
+                start -= 1
+
+            if not start or rendered[start - 1] in VALUE_START_BYTES:
+                return True
+
+    return False
+
+
+def has_non_finite(data: typing.Any) -> bool:
+    """
+    Returns whether the given data holds a NaN or infinite float or Decimal
+    """
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+
+        values = obj.values() if isinstance(obj, dict) else obj
+        for value in values:
+            value_type = type(value)
+            if value_type is float:
+                # nan for NaN and infinities, 0.0 otherwise
+                if value - value:
+                    return True
+            elif value_type is str or value is None or value_type is int:
+                continue
+            elif isinstance(value, CONTAINER_TYPES):
+                stack.append(value)
+            elif isinstance(value, float):
+                if not math.isfinite(value):
+                    return True
+            elif isinstance(value, decimal.Decimal):
+                if not value.is_finite():
+                    return True
+
+    return False
+
+
+def escape_line_separators(data: str) -> str:
+    # DRF fully escapes these so that the output is a strict javascript subset
+    if "\u2028" in data or "\u2029" in data:
+        data = data.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+
+    return data
+
+
+class StdlibBackend:
+    """
+    Encodes with the stdlib encoder
+    """
+
+    name = "stdlib"
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def get_encoder(
+        indent: typing.Optional[int],
+        ensure_ascii: bool,
+        allow_nan: bool,
+        separators: typing.Tuple[str, str],
+    ) -> json.JSONEncoder:
+        """
+        Returns an encoder for the given options, built once
+        """
+        return json.JSONEncoder(
+            ensure_ascii=ensure_ascii,
+            allow_nan=allow_nan,
+            indent=indent,
+            separators=separators,
+            default=default,
+        )
+
+    def encode(
+        self,
+        data: typing.Any,
+        indent: int = None,
+        ensure_ascii: bool = False,
+        allow_nan: bool = False,
+        separators: typing.Tuple[str, str] = SHORT_SEPARATORS,
+    ) -> bytes:
+        encoder = self.get_encoder(indent, ensure_ascii, allow_nan, tuple(separators))
+
+        return escape_line_separators(encoder.encode(data)).encode()
+
+
+class OrjsonBackend(StdlibBackend):
+    """
+    Encodes with orjson, falling back to the stdlib encoder
+
+    orjson is only used for compact, unicode output; other options and payloads
+    orjson rejects or would write differently are encoded with the stdlib encoder.
+    """
+
+    name = "orjson"
+
+    options = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if orjson
+        else 0
+    )
+
+    def encode(
+        self,
+        data: typing.Any,
+        indent: int = None,
+        ensure_ascii: bool = False,
+        allow_nan: bool = False,
+        separators: typing.Tuple[str, str] = SHORT_SEPARATORS,
+    ) -> bytes:
+        if (
+            indent is None
+            and not ensure_ascii
+            and not allow_nan
+            and tuple(separators) == SHORT_SEPARATORS
+        ):
+            # what DRF's `default` made of each object, e.g. the tuple of an iterator
+            converted = {}
+
+            def orjson_default(obj: typing.Any) -> typing.Any:
+                converter = DEFAULT_DISPATCH.get(type(obj))
+                if converter is not None:
+                    return converter(obj)
+
+                value = _drf_encoder.default(obj)
+                # the object is kept so that its id is not reused
+                converted[id(obj)] = (obj, value)
+
+                return value
+
+            try:
+                rendered = orjson.dumps(
+                    data, default=orjson_default, option=self.options
+                )
+            except orjson.JSONEncodeError:
+                # e.g. integers larger than 64 bits, non-string keys
+                pass
+            else:
+                # orjson writes NaN and infinities as null rather than raising
+                if not has_float_mismatch(rendered) and not (
+                    b"null" in rendered
+                    and has_non_finite((data, *(x[1] for x in converted.values())))
+                ):
+                    if b"\xe2\x80\xa8" in rendered or b"\xe2\x80\xa9" in rendered:
+                        rendered = rendered.replace(
+                            b"\xe2\x80\xa8", b"\\u2028"
+                        ).replace(b"\xe2\x80\xa9", b"\\u2029")
+
+                    return rendered
+
+            if converted:
+                return self.encode_converted(data, converted)
+
+        return super().encode(
+            data,
+            indent=indent,
+            ensure_ascii=ensure_ascii,
+            allow_nan=allow_nan,
+            separators=separators,
+        )
+
+    @staticmethod
+    def encode_converted(data: typing.Any, converted: dict) -> bytes:
+        """
+        Encodes with the stdlib encoder, reusing the values orjson's `default` made
+        """
+
+        def converted_default(obj: typing.Any) -> typing.Any:
+            if id(obj) in converted:
+                return converted[id(obj)][1]
+
+            return default(obj)
+
+        encoder = json.JSONEncoder(
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=SHORT_SEPARATORS,
+            default=converted_default,
+        )
+
+        return escape_line_separators(encoder.encode(data)).encode()
+
+
+BACKENDS = {
+    StdlibBackend.name: StdlibBackend,
+    OrjsonBackend.name: OrjsonBackend,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_backend(name: str):
+    if name == "auto":
+        name = OrjsonBackend.name if orjson else StdlibBackend.name
+
+    if name == OrjsonBackend.name and not orjson:
+        raise ImportError("JSON_ENCODER_BACKEND=orjson requires orjson")
+
+    backend_cls = BACKENDS.get(name) or import_string(name)
+
+    return backend_cls()
+
+
+def get_backend(name: str = None) -> StdlibBackend:
+    """
+    Returns the encoder backend with the given name or the configured one
+    """
+    if name is None:
+        name = getattr(settings, "JSON_ENCODER_BACKEND", "auto")
+
+    return _get_backend(name)
+
+
+def encode(
+    data: typing.Any,
+    indent: int = None,
+    ensure_ascii: bool = False,
+    allow_nan: bool = False,
+    separators: typing.Tuple[str, str] = SHORT_SEPARATORS,
+) -> bytes:
+    """
+    Encodes the given data with the configured backend
+
+    Args:
+        data: the thing to encode
+        indent: the indent, None for no newlines
+        ensure_ascii: whether to escape non-ASCII characters
+        allow_nan: whether to write NaN and infinite floats instead of raising
+        separators: the item and key separators
+
+    Returns:
+        bytes: the JSON document
+    """
+    return get_backend().encode(
+        data,
+        indent=indent,
+        ensure_ascii=ensure_ascii,
+        allow_nan=allow_nan,
+        separators=separators,
+    )
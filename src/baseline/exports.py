@@ -0,0 +1,182 @@
+"""
+helpers for streaming whole querysets as NDJSON or CSV
+
+The number of exports running at once is capped across every process sharing the
+cache with `EXPORT_MAX_CONCURRENCY`; further exports are turned away with a 429.
+The count is a cache counter that expires `EXPORT_SLOT_TIMEOUT` seconds after the
+last export was let through, so slots held by a worker that died are eventually given back.
+"""
+import csv
+import io
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+
+from baseline import encoders
+from baseline.json import iter_lines
+from baseline.streaming import STREAM_CHUNK_SIZE, iter_batches
+
+EXPORT_SLOTS_KEY = "export-slots"
+
+# the number of exports allowed to run at once
+EXPORT_MAX_CONCURRENCY = 2
+
+# the number of seconds the slot counter lives for
+EXPORT_SLOT_TIMEOUT = 3600
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+CONTENT_TYPES = {
+    NDJSON: "application/x-ndjson",
+    CSV: "text/csv",
+}
+
+
+class ExportsFull(Throttled):
+    default_detail = "Too many exports in progress, try again later."
+
+
+def get_max_concurrency() -> int:
+    return getattr(settings, "EXPORT_MAX_CONCURRENCY", EXPORT_MAX_CONCURRENCY)
+
+
+def get_slot_timeout() -> int:
+    return getattr(settings, "EXPORT_SLOT_TIMEOUT", EXPORT_SLOT_TIMEOUT)
+
+
+def acquire_slot(max_concurrency: int = None) -> None:
+    """
+    Takes one of the export slots
+
+    Raises:
+        ExportsFull: when every slot is taken
+    """
+    if max_concurrency is None:
+        max_concurrency = get_max_concurrency()
+
+    timeout = get_slot_timeout()
+
+    cache.add(EXPORT_SLOTS_KEY, 0, timeout)
+    try:
+        in_flight = cache.incr(EXPORT_SLOTS_KEY)
+    except ValueError:
+        # the counter expired in between
+        cache.add(EXPORT_SLOTS_KEY, 1, timeout)
+        in_flight = 1
+
+    if in_flight > max_concurrency:
+        release_slot()
+
+        raise ExportsFull(wait=5)
+
+    # keep the counter alive while exports keep starting; not for turned away ones,
+    # so slots leaked by a dead worker still expire while clients retry
+    cache.touch(EXPORT_SLOTS_KEY, timeout)
+
+
+def release_slot() -> None:
+    """
+    Gives back an export slot
+    """
+    try:
+        in_flight = cache.decr(EXPORT_SLOTS_KEY)
+    except ValueError:
+        # the counter expired while the export ran
+        return
+
+    # the counter expired and was started again while the export ran, so it did not
+    # include this slot; undo the decrement rather than setting it to 0, which would
+    # lose a concurrent change
+    if in_flight < 0:
+        cache.incr(EXPORT_SLOTS_KEY)
+
+
+class SlotIterator:
+    """
+    Iterates over the given chunks and gives back the export slot when closed
+
+    Django closes the response, and with it this iterator, whether or not the
+    content was sent in full.
+    """
+
+    def __init__(self, chunks: typing.Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        return next(self.chunks)
+
+    def close(self) -> None:
+        if self.released:
+            return
+
+        self.released = True
+
+        try:
+            close = getattr(self.chunks, "close", None)
+            if close:
+                close()
+        finally:
+            release_slot()
+
+
+def get_csv_value(value: typing.Any) -> typing.Any:
+    # nested data does not fit in a cell; write it as JSON
+    if isinstance(value, (dict, list)):
+        return encoders.encode(value).decode()
+
+    return value
+
+
+def iter_csv(
+    rows: typing.Iterable[dict],
+    fields: typing.List[str],
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> typing.Iterator[bytes]:
+    """
+    Yields the given rows as CSV with a header line, a chunk of rows at a time
+
+    Args:
+        rows: the serialized rows
+        fields: the columns
+        chunk_size: the number of rows in each chunk
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(fields)
+
+    for batch in iter_batches(rows, chunk_size):
+        writer.writerows(
+            [get_csv_value(row.get(field)) for field in fields] for row in batch
+        )
+
+        yield buffer.getvalue().encode()
+
+        buffer.seek(0)
+        buffer.truncate()
+
+    # the header of an empty export
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def iter_export(
+    rows: typing.Iterable[dict],
+    export_format: str,
+    fields: typing.List[str],
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> typing.Iterator[bytes]:
+    """
+    Yields the given rows in the given format
+    """
+    if export_format == CSV:
+        return iter_csv(rows, fields, chunk_size=chunk_size)
+
+    return iter_lines(rows, chunk_size=chunk_size)
@@ -1,8 +1,14 @@
+import io
 import typing
 
 from json import load, loads
 
-from rest_framework.renderers import JSONRenderer
+from baseline import encoders
+from baseline.renderers import JSONRenderer
+from baseline.streaming import STREAM_CHUNK_SIZE, iter_batches
+
+# renderers hold no per-call state, so one is shared by every call
+_renderer = JSONRenderer()
 
 
 def dumps(obj: typing.Any, as_str=True, **kwargs) -> typing.Union[str, bytes]:
@@ -14,9 +20,61 @@ def dumps(obj: typing.Any, as_str=True, **kwargs) -> typing.Union[str, bytes]:
         as_str: whether to return a string or bytes
         kwargs: additional options to pass to the renderer
     """
-    dumped = JSONRenderer().render(obj, renderer_context=kwargs)
+    dumped = dumps_bytes(obj, **kwargs)
 
     if as_str:
         dumped = dumped.decode()
 
     return dumped
+
+
+def dumps_bytes(obj: typing.Any, **kwargs) -> bytes:
+    """
+    Same as dumps() but always returns the encoded bytes
+
+    Args:
+        obj: the thing to serialize
+        kwargs: additional options to pass to the renderer
+    """
+    return _renderer.render(obj, renderer_context=kwargs)
+
+
+def iter_lines(
+    objs: typing.Iterable, chunk_size: int = STREAM_CHUNK_SIZE
+) -> typing.Iterator[bytes]:
+    """
+    Yields the given objects as NDJSON, a chunk of lines at a time
+
+    This is the generator behind `dump_lines()`; use it to stream the lines to
+    something other than a file, e.g. a response.
+
+    Args:
+        objs: the things to serialize, one per line
+        chunk_size: the number of lines in each chunk
+    """
+    for batch in iter_batches(objs, chunk_size):
+        lines = [encoders.encode(obj) for obj in batch]
+        lines.append(b"")
+
+        yield b"\n".join(lines)
+
+
+def dump_lines(
+    objs: typing.Iterable, fp: typing.IO, chunk_size: int = STREAM_CHUNK_SIZE
+) -> None:
+    """
+    Writes the given objects to the file as NDJSON
+
+    Like `json.dump()` this writes to `fp` and returns nothing.  The output is written
+    a chunk of lines at a time, see `iter_lines()`, so the whole document is never
+    held in memory.
+
+    Args:
+        objs: the things to serialize, one per line
+        fp: a binary or text file-like object
+        chunk_size: the number of lines written at once
+    """
+    as_str = isinstance(fp, io.TextIOBase)
+
+    for chunk in iter_lines(objs, chunk_size=chunk_size):
+        fp.write(chunk.decode() if as_str else chunk)
@@ -0,0 +1,149 @@
+"""
+Compares serving page cache hits through the WSGI and the ASGI handlers
+
+Requests are made in-process with the Django test clients, so the numbers reflect
+the middleware stack and cache round-trips rather than the network.  The WSGI
+requests are made from a gevent pool when gevent is installed, like the gunicorn
+gevent workers, and from a thread pool otherwise.
+"""
+import asyncio
+import concurrent.futures
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+UPDATE_CACHE_MIDDLEWARE = "django.middleware.cache.UpdateCacheMiddleware"
+FETCH_CACHE_MIDDLEWARE = "baseline.middleware.cache.BustableFetchFromCacheMiddleware"
+
+
+def get_cache_middleware() -> list:
+    """
+    Returns the MIDDLEWARE setting with the page cache middleware enabled
+    """
+    middleware = [
+        x
+        for x in settings.MIDDLEWARE
+        if x not in (UPDATE_CACHE_MIDDLEWARE, FETCH_CACHE_MIDDLEWARE)
+    ]
+
+    return [UPDATE_CACHE_MIDDLEWARE] + middleware + [FETCH_CACHE_MIDDLEWARE]
+
+
+def get_summary(timings: list, total: float) -> str:
+    """
+    Returns a line summarizing the given request timings
+    """
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+
+    return (
+        f"requests={len(timings)}, rps={len(timings) / total:.1f}, "
+        f"mean={statistics.mean(timings) * 1000:.3f}ms, "
+        f"median={statistics.median(timings) * 1000:.3f}ms, p99={p99 * 1000:.3f}ms"
+    )
+
+
+class Command(BaseCommand):
+    help = "Benchmarks page cache hits through the WSGI and the ASGI handlers"
+
+    def add_arguments(self, parser):
+        """
+        Adds an argument to the parser
+        """
+        parser.add_argument(
+            "path",
+            help="URL path to request, e.g. /widgets",
+        )
+
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=1000,
+            help="the number of requests to make per handler",
+        )
+
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="the maximum number of requests in flight at once",
+        )
+
+    def run_wsgi(self, path: str, num_requests: int, concurrency: int) -> tuple:
+        """
+        Makes the requests through the WSGI handler
+
+        Returns:
+            tuple: the name of the pool, the request timings and the total number of seconds
+        """
+        client = Client()
+
+        def request(_):
+            start = time.perf_counter()
+            client.get(path)
+
+            return time.perf_counter() - start
+
+        # fill the cache
+        request(None)
+
+        try:
+            import gevent.pool
+        except ImportError:
+            gevent = None
+
+        start = time.perf_counter()
+        if gevent:
+            pool_name = "gevent"
+            timings = list(
+                gevent.pool.Pool(concurrency).imap(request, range(num_requests))
+            )
+        else:
+            pool_name = "threads"
+            with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+                timings = list(executor.map(request, range(num_requests)))
+
+        return pool_name, timings, time.perf_counter() - start
+
+    async def run_asgi(self, path: str, num_requests: int, concurrency: int) -> tuple:
+        """
+        Makes the requests through the ASGI handler
+
+        Returns:
+            tuple: the request timings and the total number of seconds
+        """
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request():
+            async with semaphore:
+                start = time.perf_counter()
+                await client.get(path)
+
+                return time.perf_counter() - start
+
+        # fill the cache
+        await request()
+
+        start = time.perf_counter()
+        timings = await asyncio.gather(*[request() for _ in range(num_requests)])
+
+        return list(timings), time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        num_requests = options["requests"]
+        concurrency = options["concurrency"]
+
+        if num_requests < 1 or concurrency < 1:
+            raise CommandError("--requests and --concurrency must be at least 1")
+
+        with override_settings(MIDDLEWARE=get_cache_middleware()):
+            pool_name, timings, total = self.run_wsgi(path, num_requests, concurrency)
+            self.stdout.write(f"wsgi+{pool_name}: {get_summary(timings, total)}")
+
+            timings, total = asyncio.run(self.run_asgi(path, num_requests, concurrency))
+            self.stdout.write(f"asgi: {get_summary(timings, total)}")
@@ -0,0 +1,116 @@
+"""
+Compares the JSON encoder backends with DRF's JSONRenderer
+
+Each backend renders the same payloads as DRF's renderer; the command fails when
+any output differs by a single byte, then times the renderers.  The payloads are
+list responses of rows with the types a serializer typically emits: ints, strings,
+decimals, UUIDs, datetimes and nested objects.
+"""
+import datetime
+import decimal
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from baseline import encoders
+
+
+def get_payload(rows: int) -> dict:
+    """
+    Returns a paginated list response with the given number of rows
+    """
+    now = datetime.datetime(2023, 6, 8, 12, 30, tzinfo=datetime.timezone.utc)
+
+    results = [
+        {
+            "id": x,
+            "uuid": uuid.UUID(int=x),
+            "name": f"widget {x} ünïcode",
+            "quantity": x % 17,
+            "price": decimal.Decimal(x) / 100,
+            "ratio": x / 7,
+            "active": bool(x % 2),
+            "created": now - datetime.timedelta(minutes=x),
+            "day": now.date(),
+            "tags": ["a", "b", str(x)],
+            "owner": {"id": x % 5, "email": f"user{x % 5}@example.com"},
+            "notes": None,
+        }
+        for x in range(rows)
+    ]
+
+    return {"count": rows, "next": None, "previous": None, "results": results}
+
+
+def get_summary(timings: list) -> str:
+    """
+    Returns a line summarizing the given render timings
+    """
+    return (
+        f"mean={statistics.mean(timings) * 1000:.3f}ms, "
+        f"median={statistics.median(timings) * 1000:.3f}ms, "
+        f"min={min(timings) * 1000:.3f}ms"
+    )
+
+
+class Command(BaseCommand):
+    help = "Verifies and benchmarks the JSON encoder backends against DRF"
+
+    def add_arguments(self, parser):
+        """
+        Adds an argument to the parser
+        """
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1000,
+            help="the number of rows in the rendered list",
+        )
+
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=50,
+            help="the number of times each renderer renders the payload",
+        )
+
+    def get_renderers(self) -> dict:
+        """
+        Returns name -> render function for DRF and every available backend
+        """
+        renderers = {"drf": JSONRenderer().render}
+
+        for name in encoders.BACKENDS:
+            try:
+                renderers[name] = encoders.get_backend(name).encode
+            except ImportError:
+                self.stdout.write(f"{name}: not installed, skipped")
+
+        return renderers
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        iterations = options["iterations"]
+
+        if rows < 0 or iterations < 1:
+            raise CommandError("--rows must be positive and --iterations at least 1")
+
+        payload = get_payload(rows)
+        renderers = self.get_renderers()
+
+        expected = renderers["drf"](payload)
+        for name, render in renderers.items():
+            if render(payload) != expected:
+                raise CommandError(f"{name}: output differs from DRF's JSONRenderer")
+
+        for name, render in renderers.items():
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                render(payload)
+                timings.append(time.perf_counter() - start)
+
+            self.stdout.write(f"{name}: bytes={len(expected)}, {get_summary(timings)}")
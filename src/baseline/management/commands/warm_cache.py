@@ -0,0 +1,177 @@
+"""
+Fills the page cache and method caches before traffic arrives
+
+URLs are requested in-process with the Django test client, so they go through the
+full middleware stack, including the page cache middleware, without a round-trip
+through the load balancer.
+"""
+import concurrent.futures
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.utils.module_loading import import_string
+
+from baseline.middleware.cache import BUST_MAGIC_CACHE_CONTROL
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests the given URL paths and calls the given callables to fill the caches"
+    )
+
+    def add_arguments(self, parser):
+        """
+        Adds an argument to the parser
+        """
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            help="URL paths to request, e.g. /widgets",
+        )
+
+        parser.add_argument(
+            "--callable",
+            dest="callables",
+            action="append",
+            default=[],
+            help="dotted path to a callable to call, e.g. myapp.cache.warm_widgets; can be given more than once",
+        )
+
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="the maximum number of requests in flight at once",
+        )
+
+        parser.add_argument(
+            "--bust",
+            action="store_true",
+            default=False,
+            help="refresh entries that are already in the page cache",
+        )
+
+        parser.add_argument(
+            "--host",
+            default=None,
+            help="the Host header to send; defaults to the first ALLOWED_HOSTS entry",
+        )
+
+        parser.add_argument(
+            "--username",
+            default=None,
+            help="make the requests as this user",
+        )
+
+    def get_client(self, options: dict) -> "Client":
+        """
+        Returns a test client configured per the command options
+        """
+        host = options["host"]
+        if not host:
+            allowed_hosts = [x for x in settings.ALLOWED_HOSTS if x != "*"]
+            host = allowed_hosts[0].lstrip(".") if allowed_hosts else "testserver"
+
+        headers = {"HTTP_HOST": host}
+        if options["bust"]:
+            headers["HTTP_CACHE_CONTROL"] = BUST_MAGIC_CACHE_CONTROL
+
+        # a view that raises is counted as an error instead of ending the run
+        client = Client(raise_request_exception=False, **headers)
+
+        username = options["username"]
+        if username:
+            User = get_user_model()
+            try:
+                user = User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"user username={username} not found")
+
+            client.force_login(user)
+
+        return client
+
+    def warm_path(self, path: str, options: dict) -> tuple:
+        """
+        Requests the given path
+
+        Returns:
+            tuple: the path, the response status and the number of seconds it took
+        """
+        client = self.get_client(options)
+
+        start = time.perf_counter()
+        response = client.get(path)
+        delta = time.perf_counter() - start
+
+        return path, response.status_code, delta
+
+    def warm_path_in_thread(self, path: str, options: dict) -> tuple:
+        """
+        Requests the given path from a worker thread
+        """
+        try:
+            return self.warm_path(path, options)
+        finally:
+            # each worker thread opens its own database connections
+            connections.close_all()
+
+    def warm_callable(self, path: str) -> tuple:
+        """
+        Calls the callable at the given dotted path
+
+        Returns:
+            tuple: the path, the callable's return value and the number of seconds it took
+        """
+        fn = import_string(path)
+
+        start = time.perf_counter()
+        result = fn()
+        delta = time.perf_counter() - start
+
+        return path, result, delta
+
+    def handle(self, *args, **options):
+        paths = options["paths"]
+        callables = options["callables"]
+        concurrency = options["concurrency"]
+
+        if not paths and not callables:
+            raise CommandError("provide at least one path or --callable")
+
+        if concurrency < 1:
+            raise CommandError("--concurrency must be at least 1")
+
+        errors = 0
+        total_start = time.perf_counter()
+
+        for path in callables:
+            path, _, delta = self.warm_callable(path)
+            self.stdout.write(f"callable={path}, time={delta:.3f}")
+
+        if concurrency == 1:
+            results = [self.warm_path(path, options) for path in paths]
+        else:
+            with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+                results = list(
+                    executor.map(
+                        lambda path: self.warm_path_in_thread(path, options), paths
+                    )
+                )
+
+        for path, status_code, delta in results:
+            if status_code >= 400:
+                errors += 1
+
+            self.stdout.write(f"path={path}, status={status_code}, time={delta:.3f}")
+
+        self.stdout.write(
+            f"warmed paths={len(paths)}, callables={len(callables)}, errors={errors}, time={time.perf_counter() - total_start:.3f}"
+        )
+
+        if errors:
+            raise CommandError(f"{errors} paths returned an error status")
@@ -1,9 +1,10 @@
 """
 Middleware to authenticate with a GET parameter
 """
-import json
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 
-from rest_framework.authtoken.models import Token
+from baseline.authentication import aget_token_user_id, get_token_user_id
+from baseline.parsers import get_json_body
 
 AUTHORIZATION_HEADER = "HTTP_AUTHORIZATION"
 
@@ -11,34 +12,65 @@ AUTHORIZATION_HEADER = "HTTP_AUTHORIZATION"
 class AuthParamMiddleware:
     """
     Middleware to check for auth param
+
+    This middleware is sync and async capable; under ASGI the token is looked up
+    with the async ORM API instead of running the whole middleware in a thread.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
 
-    def __call__(self, request):
-        # Code to be executed for each request before
-        # the view (and later middleware) are called.
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def get_auth_token(self, request) -> str:
+        """
+        Returns the auth token passed in the request, if any
+
+        The JSON body is only looked at when neither an Authorization header nor a cookie
+        supplies the token, and only when it's no larger than `JSON_BODY_MAX_SIZE`; the
+        parsed body is cached on the request for `baseline.parsers.JSONParser`.
+        """
         auth_token = request.GET.get("auth_token")
+        cookie_token = request.COOKIES.get("auth_token")
+
         if (
-            request.content_type == "application/json"
-            and request.method.upper() == "POST"
-            and request.body
+            request.method.upper() == "POST"
+            and AUTHORIZATION_HEADER not in request.META
+            and not cookie_token
         ):
-            data = json.loads(request.body)
-            auth_token = data.get("auth_token")
+            data = get_json_body(request)
+            if isinstance(data, dict) and data.get("auth_token"):
+                auth_token = data["auth_token"]
 
         if not auth_token:  # check cookie
-            auth_token = request.COOKIES.get("auth_token")
+            auth_token = cookie_token
+
+        return auth_token
+
+    def set_authorization_header(self, request, auth_token: str) -> None:
+        request.META[AUTHORIZATION_HEADER] = f"Token {auth_token}"
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        # Code to be executed for each request before
+        # the view (and later middleware) are called.
+        auth_token = self.get_auth_token(request)
 
         if auth_token:
-            # if the token does not exist in the database, do not update the authorization header
-            try:
-                Token.objects.get(key=auth_token)
-                request.META[AUTHORIZATION_HEADER] = f"Token {auth_token}"
-            except Token.DoesNotExist:
+            # if the token does not exist in the database or its user is inactive, do not update
+            # the authorization header; the lookup is cached and memoized on the request for the
+            # authentication class
+            if get_token_user_id(auth_token, request):
+                self.set_authorization_header(request, auth_token)
+            else:
                 print("bad token, not updating auth header")
-                pass
 
         response = self.get_response(request)
 
@@ -46,3 +78,17 @@ class AuthParamMiddleware:
         # the view is called.
 
         return response
+
+    async def __acall__(self, request):
+        """
+        Async version of __call__
+        """
+        auth_token = self.get_auth_token(request)
+
+        if auth_token:
+            if await aget_token_user_id(auth_token, request):
+                self.set_authorization_header(request, auth_token)
+            else:
+                print("bad token, not updating auth header")
+
+        return await self.get_response(request)
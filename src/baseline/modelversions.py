@@ -0,0 +1,304 @@
+"""
+a registry of model versions for answering conditional requests without SQL
+
+Every registered model has a version and a last modified timestamp stored in cache,
+and optionally one per row.  They are bumped from the model signals, so the
+`etag_func` and `last_modified_func` given to `combined_cache_control` can be
+answered with a single cache read:
+
+    @combined_cache_control(
+        60,
+        etag_func=get_etag_func(Widget),
+        last_modified_func=get_last_modified_func(Widget),
+    )
+    def list(self, request, *args, **kwargs):
+        ...
+
+The versions are bumped once the transaction commits, so a request that runs
+before then does not pair the new version with the old rows.  `QuerySet.update()`,
+`bulk_create()` and `bulk_update()` send no signals and do not bump the versions;
+call `bump_model_version()` after using them.
+
+Row versions expire after `MODEL_ROW_VERSION_TIMEOUT` seconds and are dropped when
+the row is deleted, so they do not pile up; an expired version starts over at now,
+which only costs the clients one full response.
+
+Models are registered when the functions are created.  Processes that write to a
+model without importing the views, e.g. task workers, should call `register()` in
+an `AppConfig.ready()` so their writes bump the version too.
+"""
+import datetime
+import time
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from baseline.cachetags import new_version
+
+if typing.TYPE_CHECKING:
+    from django.db.models import Model
+
+ModelType = typing.Type["Model"]
+
+MODEL_VERSION_KEY = "model-version-{label}"
+ROW_VERSION_KEY = "model-version-{label}-{pk}"
+
+# the number of seconds a row version is kept for
+MODEL_ROW_VERSION_TIMEOUT = 86400
+
+# registered model label -> whether rows are versioned individually
+_registry = {}
+
+
+class ModelVersion(typing.NamedTuple):
+    version: int
+    last_modified: float
+
+    @property
+    def last_modified_datetime(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(
+            self.last_modified, tz=datetime.timezone.utc
+        )
+
+
+def get_model_label(model: typing.Union["Model", ModelType]) -> str:
+    """
+    Returns the label for the given model class or instance
+    """
+    return model._meta.label_lower
+
+
+def get_version_key(model: typing.Union["Model", ModelType], pk=None) -> str:
+    """
+    Returns the cache key for the version of the given model or row
+    """
+    label = get_model_label(model)
+    if pk is None:
+        return MODEL_VERSION_KEY.format(label=label)
+
+    return ROW_VERSION_KEY.format(label=label, pk=pk)
+
+
+def get_version_timeout(pk=None) -> typing.Optional[int]:
+    """
+    Returns the timeout for a model version, or for a row version when pk is given
+    """
+    if pk is None:
+        return None
+
+    return getattr(settings, "MODEL_ROW_VERSION_TIMEOUT", MODEL_ROW_VERSION_TIMEOUT)
+
+
+def make_version() -> ModelVersion:
+    return ModelVersion(new_version(), time.time())
+
+
+def register(model: ModelType, per_row: bool = False) -> None:
+    """
+    Starts versioning the given model
+
+    Args:
+        model: the model class
+        per_row: whether to also keep a version for each row
+    """
+    label = get_model_label(model)
+    _registry[label] = _registry.get(label, False) or per_row
+
+
+def is_registered(model: typing.Union["Model", ModelType]) -> bool:
+    return get_model_label(model) in _registry
+
+
+def bump_model_version(
+    model: typing.Union["Model", ModelType], *pks, deleted: bool = False
+) -> None:
+    """
+    Bumps the version of the given model and, when it is versioned per row, of the rows
+
+    Args:
+        model: the model class or instance
+        pks: the primary keys of the rows that changed
+        deleted: whether the rows were deleted, which drops their versions
+    """
+    version = make_version()
+
+    cache.set(get_version_key(model), version, timeout=get_version_timeout())
+
+    if not pks or not _registry.get(get_model_label(model)):
+        return
+
+    row_keys = [get_version_key(model, pk) for pk in pks]
+    if deleted:
+        cache.delete_many(row_keys)
+    else:
+        cache.set_many(
+            dict.fromkeys(row_keys, version), timeout=get_version_timeout(pks[0])
+        )
+
+
+def get_model_versions(
+    keys: typing.Iterable[typing.Tuple[ModelType, typing.Any]]
+) -> typing.Dict[typing.Tuple[ModelType, typing.Any], ModelVersion]:
+    """
+    Returns the versions of the given models or rows with a single cache read
+
+    Versions that are not in cache yet are initialized to now, so a response that
+    was generated before the version existed is never considered fresh.
+
+    Args:
+        keys: (model, pk) tuples; the pk is None for the model as a whole
+
+    Returns:
+        dict: a mapping of (model, pk) to its version
+    """
+    version_keys = {get_version_key(model, pk): (model, pk) for model, pk in keys}
+
+    versions = {
+        version_keys[k]: ModelVersion(*v)
+        for k, v in cache.get_many(list(version_keys)).items()
+    }
+
+    for version_key, key in version_keys.items():
+        if key in versions:
+            continue
+
+        version = make_version()
+
+        # another process may have initialized the version in the meantime
+        if not cache.add(version_key, version, timeout=get_version_timeout(key[1])):
+            version = ModelVersion(*cache.get(version_key, version))
+
+        versions[key] = version
+
+    return versions
+
+
+def get_model_version(model: typing.Union["Model", ModelType], pk=None) -> ModelVersion:
+    """
+    Returns the version of the given model, or of one of its rows
+    """
+    return get_model_versions([(model, pk)])[(model, pk)]
+
+
+def _get_request_versions(
+    models: typing.Sequence[ModelType],
+    per_row: bool,
+    lookup_kwarg: str,
+    request,
+    kwargs: dict,
+) -> typing.List[ModelVersion]:
+    """
+    Returns the versions relevant to the request
+
+    The versions are memoized on the request so the etag and last modified
+    functions share one cache read.
+    """
+    # only the first model is looked up by row
+    pk = kwargs.get(lookup_kwarg) if per_row else None
+
+    keys = [(models[0], pk)] + [(model, None) for model in models[1:]]
+
+    memo = getattr(request, "_model_versions", None)
+    if memo is None:
+        memo = {}
+        try:
+            request._model_versions = memo
+        except AttributeError:
+            pass
+
+    missing = [key for key in keys if key not in memo]
+    if missing:
+        memo.update(get_model_versions(missing))
+
+    return [memo[key] for key in keys]
+
+
+def get_etag_func(
+    *models: ModelType, per_row: bool = False, lookup_kwarg: str = "pk"
+) -> typing.Callable:
+    """
+    Returns an `etag_func` for the given models
+
+    Args:
+        models: the models the response is generated from
+        per_row: whether the first model is versioned per row; the row is looked up
+            by the view kwarg named `lookup_kwarg`
+        lookup_kwarg: the view kwarg holding the primary key
+
+    Returns:
+        Callable: to pass as `etag_func` to `combined_cache_control`
+    """
+    _register(models, per_row)
+
+    def etag_func(request, *args, **kwargs) -> str:
+        versions = _get_request_versions(models, per_row, lookup_kwarg, request, kwargs)
+
+        return "-".join(str(x.version) for x in versions)
+
+    return etag_func
+
+
+def get_last_modified_func(
+    *models: ModelType, per_row: bool = False, lookup_kwarg: str = "pk"
+) -> typing.Callable:
+    """
+    Returns a `last_modified_func` for the given models
+
+    Args:
+        models: the models the response is generated from
+        per_row: whether the first model is versioned per row
+        lookup_kwarg: the view kwarg holding the primary key
+
+    Returns:
+        Callable: to pass as `last_modified_func` to `combined_cache_control`
+    """
+    _register(models, per_row)
+
+    def last_modified_func(request, *args, **kwargs) -> datetime.datetime:
+        versions = _get_request_versions(models, per_row, lookup_kwarg, request, kwargs)
+
+        return max(versions, key=lambda x: x.last_modified).last_modified_datetime
+
+    return last_modified_func
+
+
+def _register(models: typing.Sequence[ModelType], per_row: bool) -> None:
+    for idx, model in enumerate(models):
+        register(model, per_row=per_row and idx == 0)
+
+
+def handle_save(sender, instance, using=None, **kwargs) -> None:
+    if is_registered(sender):
+        pk = instance.pk
+        transaction.on_commit(lambda: bump_model_version(sender, pk), using=using)
+
+
+def handle_delete(sender, instance, using=None, **kwargs) -> None:
+    if is_registered(sender):
+        pk = instance.pk
+        transaction.on_commit(
+            lambda: bump_model_version(sender, pk, deleted=True), using=using
+        )
+
+
+def handle_m2m_changed(
+    sender, instance, action, model, pk_set, using=None, **kwargs
+) -> None:
+    if not action.startswith("post_"):
+        return
+
+    if is_registered(instance):
+        model_class, pk = type(instance), instance.pk
+        transaction.on_commit(lambda: bump_model_version(model_class, pk), using=using)
+
+    if is_registered(model):
+        pks = tuple(pk_set or ())
+        transaction.on_commit(lambda: bump_model_version(model, *pks), using=using)
+
+
+post_save.connect(handle_save, dispatch_uid="baseline-model-versions-save")
+post_delete.connect(handle_delete, dispatch_uid="baseline-model-versions-delete")
+m2m_changed.connect(handle_m2m_changed, dispatch_uid="baseline-model-versions-m2m")
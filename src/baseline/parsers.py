@@ -0,0 +1,87 @@
+"""
+Parsers that share the parsed request body with the middleware
+
+`AuthParamMiddleware` looks for the auth token in JSON bodies.  The body it parses
+is cached on the Django request, and `JSONParser` returns the cached copy instead
+of parsing the same bytes again.
+"""
+import io
+import typing
+
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+if typing.TYPE_CHECKING:
+    from django.http import HttpRequest
+
+# the attribute the parsed body is cached in on the Django request
+JSON_BODY_ATTR = "_baseline_json_body"
+
+# the largest body, in bytes, that is parsed ahead of the view
+JSON_BODY_MAX_SIZE = 64 * 1024
+
+
+def get_content_length(request: "HttpRequest") -> int:
+    try:
+        return int(request.META.get("CONTENT_LENGTH") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def get_json_body(request: "HttpRequest", max_size: int = None) -> typing.Any:
+    """
+    Returns the parsed JSON body of the given request
+
+    The result is cached on the request for `JSONParser`.
+
+    Args:
+        request: the Django request
+        max_size: bodies larger than this many bytes are not parsed; defaults to the
+            `JSON_BODY_MAX_SIZE` setting
+
+    Returns:
+        the parsed body, or None when the body is not JSON, too large or malformed
+    """
+    if hasattr(request, JSON_BODY_ATTR):
+        return getattr(request, JSON_BODY_ATTR)
+
+    if request.content_type != "application/json":
+        return None
+
+    if max_size is None:
+        max_size = getattr(settings, "JSON_BODY_MAX_SIZE", JSON_BODY_MAX_SIZE)
+
+    content_length = get_content_length(request)
+    if not content_length or content_length > max_size:
+        return None
+
+    try:
+        data = JSONParser().parse(
+            io.BytesIO(request.body),
+            parser_context={"encoding": request.encoding or settings.DEFAULT_CHARSET},
+        )
+    except ParseError:
+        # leave it to the view's parser to report the error
+        return None
+
+    setattr(request, JSON_BODY_ATTR, data)
+
+    return data
+
+
+class JSONParser(parsers.JSONParser):
+    """
+    JSONParser that reuses a body already parsed by `get_json_body()`
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = (parser_context or {}).get("request")
+        django_request = getattr(request, "_request", None)
+
+        if django_request is not None and hasattr(django_request, JSON_BODY_ATTR):
+            return getattr(django_request, JSON_BODY_ATTR)
+
+        return super().parse(
+            stream, media_type=media_type, parser_context=parser_context
+        )
@@ -0,0 +1,246 @@
+"""
+helpers for verifying passwords off the request's thread or greenlet
+
+Password hashing is CPU-bound on purpose.  Under the gevent worker a login blocks the
+whole hub for the duration of the hash, so every other request handled by the worker
+stalls.  With `PASSWORD_HASH_POOL` set, the hash runs in a bounded pool instead:
+
+    thread: native threads; hashlib releases the GIL while hashing, so the hub keeps
+        running other greenlets
+    process: a process pool, for hashers that hold the GIL
+
+Logins still go through `django.contrib.auth.authenticate()` and the configured
+`AUTHENTICATION_BACKENDS`; backends that include `PooledPasswordMixin`, such as
+`baseline.backends.auth.CachedModelBackend`, run the hashing in the pool and other
+backends work as usual.  Only the hashing runs in the pool; the user is looked up on
+the request's thread.  When more than `PASSWORD_HASH_POOL_MAX_QUEUE` hashes are waiting, logins are turned
+away with a 429 right away rather than piling up.
+"""
+import collections
+import concurrent.futures
+import os
+import threading
+import typing
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    check_password,
+    get_hasher,
+    identify_hasher,
+    make_password,
+)
+from rest_framework.exceptions import Throttled
+
+if typing.TYPE_CHECKING:
+    from django.http import HttpRequest
+
+# the number of recent logins the latency percentiles are computed from
+LOGIN_LATENCY_SAMPLES = 1000
+
+User = get_user_model()
+
+
+class PoolFull(Throttled):
+    default_detail = "Too many logins in progress, try again shortly."
+
+
+class HashPool:
+    """
+    A bounded pool to run password hashing in
+
+    Args:
+        kind: `thread` or `process`
+        size: the number of workers
+        max_queue: the number of hashes allowed to wait for a worker
+    """
+
+    def __init__(self, kind: str, size: int, max_queue: int):
+        self.kind = kind
+        self.size = size
+        self.max_queue = max_queue
+
+        self.in_flight = 0
+
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def get_executor(self):
+        # gunicorn forks the workers after the app is loaded; every process gets its own pool
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            if self.kind == "process":
+                self._executor = concurrent.futures.ProcessPoolExecutor(self.size)
+            elif is_gevent_patched():
+                import gevent.threadpool
+
+                # gevent's pool runs on native threads even when threading is patched
+                self._executor = gevent.threadpool.ThreadPoolExecutor(self.size)
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    self.size, thread_name_prefix="baseline-hash"
+                )
+
+            self._pid = pid
+
+        return self._executor
+
+    def run(self, fn: typing.Callable, *args) -> typing.Any:
+        """
+        Runs the given function in the pool and waits for its result
+
+        Raises:
+            PoolFull: when too many hashes are already waiting
+        """
+        with self._lock:
+            if self.in_flight >= self.size + self.max_queue:
+                raise PoolFull(wait=1)
+
+            self.in_flight += 1
+
+        try:
+            return self.get_executor().submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+login_latencies = collections.deque(maxlen=LOGIN_LATENCY_SAMPLES)
+login_stats = collections.Counter()
+
+
+def is_gevent_patched() -> bool:
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+
+    return monkey.is_module_patched("threading")
+
+
+def get_pool() -> typing.Optional[HashPool]:
+    """
+    Returns the hash pool, or None when `PASSWORD_HASH_POOL` is not set
+    """
+    global _pool
+
+    kind = getattr(settings, "PASSWORD_HASH_POOL", "")
+    if not kind:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashPool(
+                kind,
+                size=getattr(settings, "PASSWORD_HASH_POOL_SIZE", 2),
+                max_queue=getattr(settings, "PASSWORD_HASH_POOL_MAX_QUEUE", 16),
+            )
+
+    return _pool
+
+
+def must_update(encoded: str) -> bool:
+    """
+    Returns whether the given hash is rehashed on login, like `check_password()` does
+    """
+    preferred = get_hasher("default")
+
+    return identify_hasher(encoded).algorithm != preferred.algorithm or (
+        preferred.must_update(encoded)
+    )
+
+
+class PooledPasswordMixin:
+    """
+    ModelBackend mixin that verifies passwords in the hash pool
+
+    Without `PASSWORD_HASH_POOL` the backend's own `authenticate()` is used.  With it,
+    this mirrors `ModelBackend.authenticate()`, including `user_can_authenticate()`
+    and hashing a password for unknown users so they cannot be told apart by timing.
+    """
+
+    def authenticate(
+        self,
+        request: "HttpRequest",
+        username: str = None,
+        password: str = None,
+        **kwargs,
+    ) -> typing.Optional["User"]:
+        pool = get_pool()
+        if pool is None:
+            return super().authenticate(
+                request, username=username, password=password, **kwargs
+            )
+
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+
+        if username is None or password is None:
+            return None
+
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            pool.run(make_password, password)
+
+            return None
+
+        if not pool.run(check_password, password, user.password):
+            return None
+
+        # upgrade the hash like `user.check_password()` does when the hasher settings change
+        if must_update(user.password):
+            user.password = pool.run(make_password, password)
+            user.save(update_fields=["password"])
+
+        if not self.user_can_authenticate(user):
+            return None
+
+        return user
+
+
+def record_login(latency: float, success: bool) -> None:
+    """
+    Records how long a login took
+    """
+    login_latencies.append(latency)
+    login_stats["success" if success else "failure"] += 1
+
+
+def record_login_rejected() -> None:
+    login_stats["rejected"] += 1
+
+
+def get_login_stats() -> dict:
+    """
+    Returns the login counters and latency percentiles for this process
+
+    Returns:
+        dict: with the following keys
+            success: the number of successful logins
+            failure: the number of failed logins
+            rejected: the number of logins turned away because the pool was full
+            in_flight: the number of hashes running or waiting in the pool
+            p50, p90, p99: the login latency percentiles, in milliseconds, over the
+                most recent logins
+    """
+    stats = {
+        "success": login_stats["success"],
+        "failure": login_stats["failure"],
+        "rejected": login_stats["rejected"],
+        "in_flight": _pool.in_flight if _pool else 0,
+    }
+
+    latencies = sorted(login_latencies)
+    for name, percentile in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+        if latencies:
+            idx = min(len(latencies) - 1, int(len(latencies) * percentile))
+            stats[name] = latencies[idx] * 1000
+        else:
+            stats[name] = None
+
+    return stats
@@ -1,31 +1,153 @@
-from rest_framework import permissions
+import typing
+
+from rest_framework import exceptions, permissions
+
+if typing.TYPE_CHECKING:
+    from django.db.models import Model
+
+# the actions the routers map for a model viewset
+STANDARD_ACTIONS = (
+    "list",
+    "create",
+    "retrieve",
+    "update",
+    "partial_update",
+    "destroy",
+)
+
+
+class PermissionPlan(typing.NamedTuple):
+    """
+    The permissions required by a viewset, worked out ahead of the requests
+    """
+
+    model: typing.Type["Model"]
+
+    # action -> the permissions required for the action
+    actions: typing.Dict[str, typing.FrozenSet[str]]
+
+    # HTTP method -> the permissions required for the method
+    methods: typing.Dict[str, typing.FrozenSet[str]]
+
+
+def compile_permission_plans(viewset) -> None:
+    """
+    Compiles the plans of the viewset's permission classes that support them
+
+    Called by `baseline.routers.PrefixBasenameSimpleRouter.register()`.
+    """
+    for permission_cls in getattr(viewset, "permission_classes", ()):
+        compile_plan = getattr(permission_cls, "compile_plan", None)
+        if compile_plan:
+            compile_plan(viewset)
 
 
 class FullDjangoModelPermissions(permissions.DjangoModelPermissions):
     """
     Permission class that also enforces get calls for listing objects and getting object details
+
+    The permissions for each of a viewset's actions and HTTP methods are compiled once per
+    viewset class, when the viewset is registered with the router or on its first request,
+    so a check is a subset test against the user's permissions.
     """
 
     perms_map = permissions.DjangoModelPermissions.perms_map.copy()
     perms_map.update({"GET": ["%(app_label)s.view_%(model_name)s"]})
 
-    def has_permission(self, request, view):
-        # when there is no queryset in the view, bail
-        try:
-            model_cls = view.queryset.model
-        except AttributeError:
-            return
+    # viewset class -> PermissionPlan; every subclass gets its own, see __init_subclass__
+    plans = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
 
+        # subclasses may require different permissions for the same viewset
+        cls.plans = {}
+
+    @classmethod
+    def get_action_perms(cls, model_cls, action: str) -> typing.FrozenSet[str]:
         kwargs = {
-            "action": view.action,
+            "action": action,
             "app_label": model_cls._meta.app_label,
             "model_name": model_cls._meta.model_name,
         }
 
-        perms = ["{app_label}.{action}_{model_name}".format(**kwargs)]
+        return frozenset(["{app_label}.{action}_{model_name}".format(**kwargs)])
+
+    @classmethod
+    def compile_plan(cls, viewset) -> typing.Optional[PermissionPlan]:
+        """
+        Returns the permission plan for the given viewset class
+
+        Returns:
+            the plan, or None when the viewset has no queryset
+        """
+        if viewset in cls.plans:
+            return cls.plans[viewset]
+
+        # when there is no queryset in the view, there is no plan
+        try:
+            model_cls = viewset.queryset.model
+        except AttributeError:
+            cls.plans[viewset] = None
+
+            return None
+
+        action_names = [x for x in STANDARD_ACTIONS if hasattr(viewset, x)]
+        if hasattr(viewset, "get_extra_actions"):
+            action_names += [x.__name__ for x in viewset.get_extra_actions()]
+
+        instance = cls()
+
+        plan = PermissionPlan(
+            model=model_cls,
+            actions={
+                action: cls.get_action_perms(model_cls, action)
+                for action in action_names
+            },
+            methods={
+                method: frozenset(instance.get_required_permissions(method, model_cls))
+                for method in cls.perms_map
+            },
+        )
+
+        cls.plans[viewset] = plan
+
+        return plan
+
+    def has_permission(self, request, view):
+        plan = self.compile_plan(view.__class__)
+
+        # when there is no queryset in the view, bail
+        if plan is None:
+            return
+
+        user = request.user
+        if user and user.is_active and user.is_superuser:
+            return True
+
+        action_perms = plan.actions.get(view.action)
+        if action_perms is None:
+            # actions added to the view on the fly
+            action_perms = plan.actions[view.action] = self.get_action_perms(
+                plan.model, view.action
+            )
+
+        user_perms = user.get_all_permissions() if user else set()
+        if action_perms <= user_perms:
+            return True
+
+        # fall back to the permissions for the HTTP method, checked against the same
+        # permission set
+        if not user or (not user.is_authenticated and self.authenticated_users_only):
+            return False
+
+        # workaround to ensure DjangoModelPermissions are not applied
+        # to the root view when using DefaultRouter.
+        if getattr(view, "_ignore_model_permissions", False):
+            return True
 
-        has_perms = request.user.has_perms(perms)
-        if not has_perms:
-            return super().has_permission(request, view)
+        method_perms = plan.methods.get(request.method)
+        if method_perms is None:
+            raise exceptions.MethodNotAllowed(request.method)
 
-        return has_perms
+        return method_perms <= user_perms
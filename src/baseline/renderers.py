@@ -1,28 +1,76 @@
-from rest_framework.renderers import JSONRenderer
+from rest_framework import renderers
+
+from baseline import encoders
+
+COMPACT_ENVELOPE_PREFIX = b'{"result":'
+ENVELOPE_PREFIX = b'{"result": '
+ENVELOPE_SUFFIX = b"}"
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer that encodes with the backend configured in `baseline.encoders`
+
+    The output is byte for byte the same as DRF's renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # a custom encoder class is only honored by DRF's renderer
+        if self.encoder_class is not renderers.JSONRenderer.encoder_class:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+
+        if indent is None:
+            separators = (
+                encoders.SHORT_SEPARATORS if self.compact else encoders.LONG_SEPARATORS
+            )
+        else:
+            separators = encoders.INDENT_SEPARATORS
+
+        return encoders.encode(
+            data,
+            indent=indent,
+            ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict,
+            separators=separators,
+        )
 
 
 class EnvelopeJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that wraps the data in a `result` key
+
+    Paginated responses, which are envelopes of their own, and responses with
+    `envelope = False` are rendered as they are.  The envelope is written around the
+    rendered data, so the response's data is neither copied nor modified.
+    """
+
     def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+
         add_envelope = True
 
-        # do not wrap when the respnse says not to
+        # do not wrap when the response says not to
         response = renderer_context.get("response")
         if response:
             add_envelope = getattr(response, "envelope", True)
 
         # create the envelope when this isn't a paginated response, which is in itself an envelope
-        if add_envelope and data and "results" not in data:
-            # create a copy of the data as the result and clear out the
-            # existing dictionary in order to continue referencing the
-            # same object that's referenced in the upstream Response object
-            enveloped_data = {"result": data.copy()}
-
-            if isinstance(data, dict):
-                data.clear()
-                data.update(enveloped_data)
-            else:
-                data = enveloped_data
+        if not (add_envelope and data and "results" not in data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # indented data is nested one level deeper, which only the encoder can do
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(
+                {"result": data}, accepted_media_type, renderer_context
+            )
 
         rendered = super().render(data, accepted_media_type, renderer_context)
+        prefix = COMPACT_ENVELOPE_PREFIX if self.compact else ENVELOPE_PREFIX
 
-        return rendered
+        return b"".join((prefix, rendered, ENVELOPE_SUFFIX))
@@ -1,6 +1,8 @@
 from django.conf import settings
 from rest_framework import routers
 
+from baseline.permissions import compile_permission_plans
+
 
 class PrefixBasenameSimpleRouter(routers.SimpleRouter):
     def __init__(self, trailing_slash=None):
@@ -13,3 +15,6 @@ class PrefixBasenameSimpleRouter(routers.SimpleRouter):
         basename = basename or prefix
 
         super().register(prefix, viewset, basename)
+
+        # work out the permissions needed by each action ahead of the requests
+        compile_permission_plans(viewset)
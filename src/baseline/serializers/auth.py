@@ -1,9 +1,11 @@
+import typing
+
 from django.contrib.auth import authenticate, get_user_model
-from django.core.cache import cache
 from django_otp.plugins.otp_totp.models import TOTPDevice
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from ..cachestore import cache_pop
 from ..utils import get_mfa_cache_key
 
 User = get_user_model()
@@ -25,6 +27,9 @@ class LoginSerializer(serializers.Serializer):
         # if the required fields were passed in, check to see if the password is correct
         if is_valid:
             request = self.context["request"]
+
+            # with a hash pool the backend verifies the password off the request's
+            # greenlet, see `baseline.passwords`
             try:
                 user = authenticate(
                     request,
@@ -57,6 +62,22 @@ class MFASerializer(serializers.Serializer):
     challenge_response = serializers.CharField()
     mfa_state = serializers.CharField()
 
+    def get_device(self, cache_data: dict) -> typing.Optional["TOTPDevice"]:
+        """
+        Returns the MFA device referenced by the MFA state, with its user, in one query
+        """
+        devices = TOTPDevice.objects.select_related("user")
+
+        try:
+            if cache_data.get("device_id"):
+                return devices.get(
+                    pk=cache_data["device_id"], user_id=cache_data["user_id"]
+                )
+
+            return devices.get(user_id=cache_data["user_id"], name="default")
+        except TOTPDevice.DoesNotExist:
+            return None
+
     def is_valid(self, *, raise_exception=False):
         is_valid = super().is_valid(raise_exception=raise_exception)
 
@@ -65,17 +86,21 @@ class MFASerializer(serializers.Serializer):
 
         # if the required fields were passed in, check to see if the password is correct
         if is_valid:
+            # the state is consumed on the first attempt so that it cannot be replayed
             cache_key = get_mfa_cache_key(self.validated_data["mfa_state"])
-            cache_data = cache.get(cache_key)
+            cache_data = cache_pop(cache_key)
             if cache_data:
-                user = User.objects.get(pk=cache_data["user_id"])
-                device = TOTPDevice.objects.get(user=user, name="default")
-                verified = device.verify_token(
-                    self.validated_data["challenge_response"]
-                )
-
-                if not verified:
-                    errors.append("incorrect challenge response")
+                device = self.get_device(cache_data)
+                if device:
+                    user = device.user
+                    verified = device.verify_token(
+                        self.validated_data["challenge_response"]
+                    )
+
+                    if not verified:
+                        errors.append("incorrect challenge response")
+                else:
+                    errors.append("device not found")
             else:
                 errors.append("state not found")
 
@@ -140,6 +140,10 @@ if POSTGRES_SET_ROLE:
 DATABASES = {"default": database}
 
 
+AUTHENTICATION_BACKENDS = [
+    "baseline.backends.auth.CachedModelBackend",
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -153,6 +157,30 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# verify passwords in a bounded pool instead of on the request's thread or greenlet;
+# one of "thread" or "process"; used by the authentication backends that include
+# `baseline.passwords.PooledPasswordMixin`, e.g. CachedModelBackend, see
+# `baseline.passwords`
+PASSWORD_HASH_POOL = get_setting("PASSWORD_HASH_POOL", default="")
+
+PASSWORD_HASH_POOL_SIZE = int(get_setting("PASSWORD_HASH_POOL_SIZE", default="2"))
+
+# the number of hashes that can wait for a worker before logins get a 429
+PASSWORD_HASH_POOL_MAX_QUEUE = int(
+    get_setting("PASSWORD_HASH_POOL_MAX_QUEUE", default="16")
+)
+
+
+# issue stateless, signed auth tokens instead of Token rows, see `baseline.signedtokens`
+AUTH_SIGNED_TOKENS = conversion.convert_bool(
+    get_setting("AUTH_SIGNED_TOKENS", default="false")
+)
+
+AUTH_SIGNED_TOKEN_MAX_AGE = int(
+    get_setting("AUTH_SIGNED_TOKEN_MAX_AGE", default=str(14 * 86400))
+)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -181,7 +209,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "baseline.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.BasicAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
@@ -192,7 +220,7 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        "baseline.parsers.JSONParser",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "baseline.permissions.FullDjangoModelPermissions",
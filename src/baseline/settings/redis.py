@@ -1,6 +1,8 @@
 """
 Settings module to configure a basic Redis cache
 """
+from conversion import convert_bool
+
 from .utils import get_setting
 
 REDIS_CACHE_URL = get_setting(
@@ -15,10 +17,62 @@ REDIS_CACHE_TIMEOUT = int(
     )
 )
 
+# put a per-process LRU cache in front of Redis for read-mostly keys
+REDIS_CACHE_L1_ENABLED = convert_bool(
+    get_setting("REDIS_CACHE_L1_ENABLED", default="false")
+)
+
+REDIS_CACHE_L1_MAX_ENTRIES = int(
+    get_setting("REDIS_CACHE_L1_MAX_ENTRIES", default="1000")
+)
+
+# the maximum amount of time an entry can be served from process memory in case an
+# invalidation message is missed
+REDIS_CACHE_L1_TIMEOUT = float(get_setting("REDIS_CACHE_L1_TIMEOUT", default="5"))
+
+# record hits, misses, bytes and latency per key prefix, see `baseline.cachestats`
+REDIS_CACHE_STATS_ENABLED = convert_bool(
+    get_setting("REDIS_CACHE_STATS_ENABLED", default="false")
+)
+
+# compress large values with `baseline.backends.serializers.CompressedPickleSerializer`
+REDIS_CACHE_COMPRESS_ENABLED = convert_bool(
+    get_setting("REDIS_CACHE_COMPRESS_ENABLED", default="false")
+)
+
+CACHE_COMPRESS_MIN_SIZE = int(get_setting("CACHE_COMPRESS_MIN_SIZE", default="1024"))
+
+CACHE_COMPRESS_ALGORITHM = get_setting("CACHE_COMPRESS_ALGORITHM", default="zlib")
+
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "BACKEND": "baseline.backends.cache.AsyncRedisCache",
         "LOCATION": REDIS_CACHE_URL,
         "TIMEOUT": REDIS_CACHE_TIMEOUT,
     }
 }
+
+if REDIS_CACHE_L1_ENABLED:
+    CACHES["default"].update(
+        {
+            "BACKEND": "baseline.backends.cache.TwoTierRedisCache",
+            "OPTIONS": {
+                "L1_MAX_ENTRIES": REDIS_CACHE_L1_MAX_ENTRIES,
+                "L1_TIMEOUT": REDIS_CACHE_L1_TIMEOUT,
+            },
+        }
+    )
+
+if REDIS_CACHE_STATS_ENABLED:
+    CACHES["default"]["BACKEND"] = (
+        "baseline.backends.cache.InstrumentedTwoTierRedisCache"
+        if REDIS_CACHE_L1_ENABLED
+        else "baseline.backends.cache.InstrumentedRedisCache"
+    )
+
+if REDIS_CACHE_COMPRESS_ENABLED:
+    CACHES["default"].setdefault("OPTIONS", {}).update(
+        {
+            "serializer": "baseline.backends.serializers.CompressedPickleSerializer",
+        }
+    )
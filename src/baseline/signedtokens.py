@@ -0,0 +1,226 @@
+"""
+stateless, signed auth tokens
+
+With `AUTH_SIGNED_TOKENS` enabled, logins issue an HMAC-signed token carrying the
+user id, the user's auth version and a token id instead of a row in the Token
+table.  Verifying one needs no database: the signature and age are checked locally
+and a single cache read fetches the auth version, the revocation marker and whether
+the user is active.  The user is loaded lazily, see `LazyTokenUser`, so only a
+request that reads the user's fields queries the database.
+
+Nothing but the user's active flag is cached, and only for
+`AUTH_SIGNED_TOKEN_USER_CACHE_TIMEOUT` seconds, so user rows and their password
+hashes never end up in the cache.
+
+Tokens are revoked one at a time by adding their id to the revocation set, which
+is a cache key per token that expires with the token, or all at once for a user by
+bumping the user's auth version, which happens when the user is deactivated.
+"""
+import secrets
+import typing
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from baseline.cachetags import (
+    get_tag_version_key,
+    get_tag_versions,
+    get_user_tag,
+    invalidate_tag,
+)
+
+SIGNED_TOKEN_SALT = "baseline.signedtokens"
+
+REVOKED_TOKEN_KEY = "revoked-token-{token_id}"
+SIGNED_TOKEN_USER_STATE_KEY = "signed-token-user-state-{user_id}"
+
+# the number of seconds a signed token is valid for
+AUTH_SIGNED_TOKEN_MAX_AGE = 14 * 86400
+
+# the number of seconds whether a user is active is cached for
+AUTH_SIGNED_TOKEN_USER_CACHE_TIMEOUT = 60
+
+User = get_user_model()
+
+
+def is_enabled() -> bool:
+    return getattr(settings, "AUTH_SIGNED_TOKENS", False)
+
+
+def get_max_age() -> int:
+    return getattr(settings, "AUTH_SIGNED_TOKEN_MAX_AGE", AUTH_SIGNED_TOKEN_MAX_AGE)
+
+
+def get_user_cache_timeout() -> int:
+    return getattr(
+        settings,
+        "AUTH_SIGNED_TOKEN_USER_CACHE_TIMEOUT",
+        AUTH_SIGNED_TOKEN_USER_CACHE_TIMEOUT,
+    )
+
+
+def get_auth_tag(user_id) -> str:
+    """
+    Returns the tag whose version every signed token of the user carries
+    """
+    return f"auth:{user_id}"
+
+
+def is_signed_token(key: str) -> bool:
+    """
+    Returns whether the given key is a signed token rather than a Token table key
+    """
+    return ":" in key
+
+
+def uses_signed_token(key: str) -> bool:
+    """
+    Returns whether the given key should be verified as a signed token
+    """
+    return is_enabled() and is_signed_token(key)
+
+
+def issue_token(user) -> str:
+    """
+    Returns a new signed token for the given user
+    """
+    tag = get_auth_tag(user.pk)
+    version = get_tag_versions([tag])[tag]
+
+    payload = {"u": user.pk, "v": version, "j": secrets.token_urlsafe(12)}
+
+    return signing.dumps(payload, salt=SIGNED_TOKEN_SALT, compress=True)
+
+
+def load_token(key: str) -> typing.Optional[dict]:
+    """
+    Returns the payload of the given token or None when it's forged or expired
+    """
+    try:
+        return signing.loads(key, salt=SIGNED_TOKEN_SALT, max_age=get_max_age())
+    except signing.BadSignature:
+        return None
+
+
+def revoke_token(key: str) -> None:
+    """
+    Revokes the given token
+    """
+    payload = load_token(key)
+    if payload is None:
+        return
+
+    cache.set(REVOKED_TOKEN_KEY.format(token_id=payload["j"]), 1, get_max_age())
+
+
+def revoke_user_tokens(user_id) -> None:
+    """
+    Revokes every signed token issued to the given user
+    """
+    invalidate_tag(get_auth_tag(user_id))
+
+
+def get_token_user_id(key: str) -> typing.Optional[typing.Any]:
+    """
+    Returns the id of the active user the given token belongs to
+
+    Whether the user is active is cached along with the version of the user's tag,
+    which is bumped whenever the user is saved, so only the first request after a
+    change, or after the short cache timeout, hits the database.
+
+    Returns:
+        the user id or None when the token is not valid
+    """
+    payload = load_token(key)
+    if payload is None:
+        return None
+
+    user_id = payload["u"]
+
+    auth_tag = get_auth_tag(user_id)
+    user_tag = get_user_tag(user_id)
+
+    auth_version_key = get_tag_version_key(auth_tag)
+    user_version_key = get_tag_version_key(user_tag)
+    revoked_key = REVOKED_TOKEN_KEY.format(token_id=payload["j"])
+    state_key = SIGNED_TOKEN_USER_STATE_KEY.format(user_id=user_id)
+
+    data = cache.get_many([auth_version_key, user_version_key, revoked_key, state_key])
+
+    if revoked_key in data:
+        return None
+
+    # when the version was evicted a new one is started, which fails closed
+    auth_version = data.get(auth_version_key)
+    if auth_version is None:
+        auth_version = get_tag_versions([auth_tag])[auth_tag]
+
+    if auth_version != payload["v"]:
+        return None
+
+    user_version = data.get(user_version_key)
+    if user_version is None:
+        user_version = get_tag_versions([user_tag])[user_tag]
+
+    state = data.get(state_key)
+    if state is not None and state[0] == user_version:
+        is_active = state[1]
+    else:
+        is_active = (
+            User.objects.filter(pk=user_id).values_list("is_active", flat=True).first()
+        )
+
+        # a deleted user is cached as inactive
+        is_active = bool(is_active)
+
+        cache.set(state_key, (user_version, is_active), get_user_cache_timeout())
+
+    if not is_active:
+        return None
+
+    return user_id
+
+
+class LazyTokenUser(SimpleLazyObject):
+    """
+    The user of a verified signed token, loaded from the database on first use
+
+    The id and the flags permission classes check are known once the token is
+    verified, so e.g. `IsAuthenticated` and throttling by `request.user.pk` do not
+    load the user.
+    """
+
+    is_active = True
+    is_anonymous = False
+    is_authenticated = True
+
+    def __init__(self, user_id):
+        # set on the instance dict; other attributes are set on the wrapped user
+        self.__dict__["_user_id"] = user_id
+
+        super().__init__(lambda: User.objects.get(pk=user_id))
+
+    @property
+    def pk(self):
+        return self.__dict__["_user_id"]
+
+    def __bool__(self) -> bool:
+        # `IsAuthenticated` checks `request.user` before `is_authenticated`
+        return True
+
+
+def get_token_user(key: str) -> typing.Optional[LazyTokenUser]:
+    """
+    Returns the active user the given token belongs to, loaded on first use
+
+    Returns:
+        the user or None when the token is not valid
+    """
+    user_id = get_token_user_id(key)
+    if user_id is None:
+        return None
+
+    return LazyTokenUser(user_id)
@@ -0,0 +1,58 @@
+"""
+helpers for streaming JSON arrays
+
+Rows are rendered a batch at a time and the batches are spliced into one JSON array,
+so the memory needed to write a response depends on the batch size rather than the
+number of rows.
+"""
+import itertools
+import typing
+
+# the number of rows rendered at once
+STREAM_CHUNK_SIZE = 500
+
+
+def iter_batches(items: typing.Iterable, size: int) -> typing.Iterator[list]:
+    """
+    Yields lists of up to `size` items
+    """
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def stream_json_array(
+    rows: typing.Iterable,
+    render: typing.Callable[[list], bytes],
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    prefix: bytes = b"",
+    suffix: bytes = b"",
+    empty: bytes = None,
+) -> typing.Iterator[bytes]:
+    """
+    Yields the given rows as a JSON array, a batch at a time
+
+    Args:
+        rows: the items of the array
+        render: renders a list into a compact JSON array
+        chunk_size: the number of rows rendered at once
+        prefix: the bytes written before the array
+        suffix: the bytes written after the array
+        empty: the whole document to write when there are no rows, by default the
+            prefix and suffix around an empty array
+    """
+    batches = iter_batches(rows, chunk_size)
+
+    batch = next(batches, None)
+    if batch is None:
+        yield prefix + b"[]" + suffix if empty is None else empty
+
+        return
+
+    # each batch renders as `[...]`; drop the brackets and join them with commas
+    yield prefix + render(batch)[:-1]
+
+    for batch in batches:
+        yield b"," + render(batch)[1:-1]
+
+    yield b"]" + suffix
@@ -59,7 +59,7 @@ def test_login(get_api_client, get_user):
     user, client, response = get_login_response(get_user, get_api_client)
     username = user.username
 
-    result = response.data["result"]
+    result = response.json()["result"]
     assert result["username"] == username
 
     assert response.cookies["auth_token"].value == user.auth_token.key
@@ -70,7 +70,8 @@ def test_login_with_mfa(get_api_client, get_user, monkeypatch):
     ensure we get an accepted status and no cookie when MFA is enabled for a user
     """
     totp_mock = mock.MagicMock()
-    verify_token = totp_mock.objects.get.return_value.verify_token
+    device = totp_mock.objects.select_related.return_value.get.return_value
+    verify_token = device.verify_token
 
     monkeypatch.setattr("baseline.serializers.auth.TOTPDevice", totp_mock)
 
@@ -84,7 +85,7 @@ def test_login_with_mfa(get_api_client, get_user, monkeypatch):
     # make sure the auth token cookie is not set
     assert "auth_token" not in response.cookies
 
-    result = response.data["result"]
+    result = response.json()["result"]
 
     assert result["mfa_required"] == True
 
@@ -106,13 +107,25 @@ def test_login_with_mfa(get_api_client, get_user, monkeypatch):
     response = client.post(url, data=data, format="json")
     assert response.status_code == status.HTTP_400_BAD_REQUEST, response.data
 
-    # now check when verification is good
+    # the state was consumed by the failed attempt, so it cannot be replayed
     verify_token.return_value = True
     response = client.post(url, data=data, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST, response.data
+
+    # now check when verification is good with a fresh state
+    response = client.post(
+        reverse("auth-login"),
+        data={"username": user.username, "password": "test123"},
+        format="json",
+    )
+    data["mfa_state"] = response.json()["result"]["mfa_state"]
+
+    device.user = user
+    response = client.post(url, data=data, format="json")
 
     assert response.status_code == status.HTTP_200_OK, response.data
 
-    result = response.data["result"]
+    result = response.json()["result"]
     assert result["username"] == user.username
 
     assert response.cookies["auth_token"].value == user.auth_token.key
@@ -129,3 +142,22 @@ def test_logout(get_api_client, get_user):
 
     assert response.status_code == status.HTTP_200_OK
     assert response.cookies["auth_token"].value == ""
+
+
+def test_mfa_device_single_query(get_user, django_assert_num_queries):
+    """
+    ensure the MFA device and its user are loaded in one query
+    """
+    from django_otp.plugins.otp_totp.models import TOTPDevice
+
+    from baseline.serializers.auth import MFASerializer
+
+    user = get_user(_setup_mfa=True)
+    device = TOTPDevice.objects.get(user=user)
+
+    with django_assert_num_queries(1):
+        loaded = MFASerializer().get_device(
+            {"user_id": user.pk, "device_id": device.pk}
+        )
+
+        assert loaded.user.username == user.username
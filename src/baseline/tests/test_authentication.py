@@ -0,0 +1,123 @@
+import pytest
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+
+from baseline.authentication import (
+    CachedTokenAuthentication,
+    get_token_cache_key,
+    get_token_user_id,
+)
+
+
+def test_token_lookup_cached(get_user, django_assert_num_queries):
+    """
+    ensure the token is only looked up in the database once
+    """
+    token = Token.objects.create(user=get_user())
+
+    assert get_token_user_id(token.key) == token.user_id
+
+    with django_assert_num_queries(0):
+        assert get_token_user_id(token.key) == token.user_id
+
+
+def test_bad_token_cached(db, django_assert_num_queries):
+    """
+    ensure an unknown token is not looked up over and over
+    """
+    assert get_token_user_id("nope") is None
+
+    with django_assert_num_queries(0):
+        assert get_token_user_id("nope") is None
+
+
+def test_token_delete_invalidates(get_user):
+    """
+    ensure a deleted token stops working right away
+    """
+    token = Token.objects.create(user=get_user())
+    key = token.key
+    assert get_token_user_id(key) == token.user_id
+
+    token.delete()
+
+    assert get_token_user_id(key) is None
+
+
+def test_user_deactivation_invalidates(get_user):
+    """
+    ensure a deactivated user's token stops working right away
+    """
+    user = get_user()
+    token = Token.objects.create(user=user)
+    assert get_token_user_id(token.key) == user.pk
+
+    user.is_active = False
+    user.save()
+
+    assert get_token_user_id(token.key) is None
+
+    # saving other fields keeps the lookup
+    user.save(update_fields=["last_login"])
+    assert cache.get(get_token_cache_key(token.key)) is not None
+
+    # reactivating drops the cached invalid lookup
+    user.is_active = True
+    user.save()
+
+    assert get_token_user_id(token.key) == user.pk
+
+
+def test_deactivation_in_transaction(get_user, django_capture_on_commit_callbacks):
+    """
+    ensure a lookup cached by a request running before the commit is dropped
+    """
+    user = get_user()
+    token = Token.objects.create(user=user)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            user.is_active = False
+            user.save()
+
+            # a concurrent request still reads the old rows
+            cache.set(get_token_cache_key(token.key), user.pk)
+
+    assert get_token_user_id(token.key) is None
+
+
+def test_authentication_uses_request_memo(get_user, django_assert_num_queries):
+    """
+    ensure the lookup made by the middleware is reused by the authentication class
+    """
+    token = Token.objects.create(user=get_user())
+
+    django_request = RequestFactory().get(
+        "/widgets", HTTP_AUTHORIZATION=f"Token {token.key}"
+    )
+    get_token_user_id(token.key, django_request)
+
+    # only the user is loaded
+    with django_assert_num_queries(1):
+        user, auth = CachedTokenAuthentication().authenticate(Request(django_request))
+
+    assert user == token.user
+
+    # the token row, as with TokenAuthentication
+    assert auth.pk == token.pk
+    assert auth.created == token.created
+
+
+def test_authentication_bad_token(db):
+    """
+    ensure a bad token is rejected
+    """
+    request = Request(RequestFactory().get("/widgets", HTTP_AUTHORIZATION="Token nope"))
+
+    with pytest.raises(exceptions.AuthenticationFailed):
+        CachedTokenAuthentication().authenticate(request)
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import transaction
+
+from baseline.backends.auth import (
+    USER_PERMISSIONS_CACHE_KEY,
+    get_permission_tags,
+)
+from baseline.cachetags import get_tag_versions
+
+User = get_user_model()
+
+PERM = "bltestapp.view_widget"
+
+
+def get_permission() -> "Permission":
+    return Permission.objects.get(
+        content_type__app_label="bltestapp", codename="view_widget"
+    )
+
+
+def test_permissions_cached(get_user, django_assert_num_queries):
+    """
+    ensure a freshly loaded user's permissions come from cache
+    """
+    user = get_user(_permissions=[get_permission()])
+    assert User.objects.get(pk=user.pk).has_perm(PERM)
+
+    user = User.objects.get(pk=user.pk)
+    with django_assert_num_queries(0):
+        assert user.has_perm(PERM)
+
+
+def test_group_permission_change(get_user, get_group):
+    """
+    ensure a permission added to a group applies to its members right away
+    """
+    group = get_group()
+    user = get_user(groups=[group])
+
+    assert not User.objects.get(pk=user.pk).has_perm(PERM)
+
+    group.permissions.add(get_permission())
+
+    assert User.objects.get(pk=user.pk).has_perm(PERM)
+
+
+def test_group_membership_change(get_user, get_group):
+    """
+    ensure joining and leaving a group applies right away
+    """
+    group = get_group(_permissions=[get_permission()])
+    user = get_user()
+
+    assert not User.objects.get(pk=user.pk).has_perm(PERM)
+
+    user.groups.add(group)
+    assert User.objects.get(pk=user.pk).has_perm(PERM)
+
+    group.user_set.remove(user)
+    assert not User.objects.get(pk=user.pk).has_perm(PERM)
+
+
+def test_deactivated_user(get_user):
+    """
+    ensure an inactive user has no permissions
+    """
+    user = get_user(_permissions=[get_permission()])
+    assert User.objects.get(pk=user.pk).has_perm(PERM)
+
+    user.is_active = False
+    user.save()
+
+    assert not User.objects.get(pk=user.pk).has_perm(PERM)
+
+
+def test_revoke_in_transaction(get_user, get_group, django_capture_on_commit_callbacks):
+    """
+    ensure permissions cached by a request running before the commit are dropped
+    """
+    group = get_group(_permissions=[get_permission()])
+    user = get_user(groups=[group])
+
+    assert User.objects.get(pk=user.pk).has_perm(PERM)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            group.permissions.clear()
+
+            # a concurrent request still reads the old rows and caches them under the
+            # version bumped by the signal
+            tags = get_permission_tags(user.pk)
+            versions = get_tag_versions(tags)
+            cache.set(
+                USER_PERMISSIONS_CACHE_KEY.format(user_id=user.pk),
+                ([versions[tag] for tag in tags], {PERM}),
+            )
+
+    assert not User.objects.get(pk=user.pk).has_perm(PERM)
@@ -0,0 +1,19 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+
+def test_benchmark_cache_hits(transactional_db):
+    """
+    ensure both handlers are benchmarked
+    """
+    stdout = StringIO()
+
+    call_command(
+        "benchmark_cache_hits", "/widgets", requests=5, concurrency=2, stdout=stdout
+    )
+
+    output = stdout.getvalue()
+
+    assert "wsgi+" in output
+    assert "asgi: requests=5" in output
@@ -0,0 +1,17 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+
+def test_benchmark_json():
+    """
+    ensure every backend is verified against DRF and timed
+    """
+    stdout = StringIO()
+
+    call_command("benchmark_json", rows=20, iterations=2, stdout=stdout)
+
+    output = stdout.getvalue()
+
+    assert "drf: bytes=" in output
+    assert "stdlib: bytes=" in output
@@ -0,0 +1,283 @@
+import asyncio
+import json
+import threading
+
+from unittest import mock
+
+import pytest
+
+from django.core.cache.backends.redis import RedisSerializer
+
+from baseline.backends.cache import (
+    MISSING,
+    AsyncRedisCache,
+    AsyncRedisCacheMixin,
+    InstrumentedRedisCache,
+    InstrumentedTwoTierRedisCache,
+    LocalTier,
+    LRUCache,
+    TwoTierRedisCache,
+    close_local_tiers,
+)
+
+
+def get_two_tier_cache() -> TwoTierRedisCache:
+    """
+    Returns a two-tier cache with the Redis client mocked out
+    """
+    backend = TwoTierRedisCache("redis://redis:6379/0", {"OPTIONS": {}})
+
+    client_mock = mock.Mock()
+    client_mock._serializer = RedisSerializer()
+    backend.__dict__["_cache"] = client_mock
+
+    return backend
+
+
+@pytest.fixture(autouse=True)
+def local_tiers():
+    """
+    Ensures every test starts with empty local tiers
+    """
+    close_local_tiers()
+
+    yield
+
+    close_local_tiers(timeout=5)
+
+
+@pytest.fixture()
+def two_tier_cache(monkeypatch):
+    backend = get_two_tier_cache()
+
+    monkeypatch.setattr(backend, "_ensure_listener", lambda: None)
+
+    return backend
+
+
+def test_lru_evicts_least_recently_used():
+    """
+    ensure the oldest entry is dropped when the cache is full
+    """
+    lru = LRUCache(max_entries=2)
+
+    lru.set("a", 1, 60)
+    lru.set("b", 2, 60)
+
+    # touch a so that b is the least recently used
+    lru.get("a")
+
+    lru.set("c", 3, 60)
+
+    assert lru.get("a") == 1
+    assert lru.get("b") is MISSING
+    assert lru.get("c") == 3
+
+
+def test_lru_expires(monkeypatch):
+    """
+    ensure entries are not returned past their timeout
+    """
+    lru = LRUCache()
+
+    lru.set("a", 1, 5)
+
+    monkeypatch.setattr("time.monotonic", lambda: 10**12)
+
+    assert lru.get("a") is MISSING
+
+
+def test_get_served_from_l1(two_tier_cache):
+    """
+    ensure a second read does not go to Redis
+    """
+    two_tier_cache._cache.get.return_value = {"foo": "bar"}
+
+    assert two_tier_cache.get("key") == {"foo": "bar"}
+    assert two_tier_cache.get("key") == {"foo": "bar"}
+
+    assert two_tier_cache._cache.get.call_count == 1
+
+    stats = two_tier_cache.get_stats()
+    assert stats["l1_hits"] == 1
+    assert stats["l2_hits"] == 1
+    assert stats["l1_hit_ratio"] == 0.5
+
+
+def test_set_publishes_invalidation(two_tier_cache):
+    """
+    ensure a write tells other processes to drop the key
+    """
+    two_tier_cache.set("key", 1)
+
+    publish = two_tier_cache._cache.get_client.return_value.publish
+    channel, message = publish.call_args[0]
+
+    assert json.loads(message)["keys"] == [two_tier_cache.make_key("key")]
+
+
+def test_touch_publishes_invalidation(two_tier_cache):
+    """
+    ensure other processes drop their copy when the expiry changes
+    """
+    two_tier_cache.set("key", 1)
+
+    publish = two_tier_cache._cache.get_client.return_value.publish
+    publish.reset_mock()
+
+    two_tier_cache.touch("key", 10)
+
+    full_key = two_tier_cache.make_key("key")
+
+    channel, message = publish.call_args[0]
+    assert json.loads(message)["keys"] == [full_key]
+    assert two_tier_cache._l1.get(full_key) is MISSING
+
+
+def test_listener_logs_errors(caplog):
+    """
+    ensure listener errors are logged and local entries are dropped
+    """
+    stopped = threading.Event()
+
+    def get_client():
+        stopped.set()
+
+        raise ConnectionError("down")
+
+    tier = LocalTier(10, "channel")
+    tier.l1.set("key", b"value", 60)
+
+    with caplog.at_level("ERROR", logger="baseline.backends.cache"):
+        tier._listen(get_client, stopped)
+
+    assert "cache invalidation listener error" in caplog.text
+    assert tier.l1.get("key") is MISSING
+
+
+def test_handle_invalidation(two_tier_cache):
+    """
+    ensure a message from another process drops the local entry
+    """
+    two_tier_cache.set("key", 1)
+
+    full_key = two_tier_cache.make_key("key")
+
+    # messages from this process are ignored
+    two_tier_cache.handle_invalidation(
+        json.dumps({"origin": two_tier_cache.node_id, "keys": [full_key]})
+    )
+    assert two_tier_cache._l1.get(full_key) is not MISSING
+
+    two_tier_cache.handle_invalidation(
+        json.dumps({"origin": "other", "keys": [full_key]})
+    )
+    assert two_tier_cache._l1.get(full_key) is MISSING
+
+
+def test_local_tier_shared_across_threads(monkeypatch):
+    """
+    ensure the backends Django creates per thread share L1 and one listener
+    """
+    listeners = []
+
+    def listen(self, get_client, stopped):
+        listeners.append(threading.current_thread())
+        stopped.wait()
+
+    monkeypatch.setattr(LocalTier, "_listen", listen)
+
+    backends = []
+
+    def run():
+        backend = get_two_tier_cache()
+        backend._cache.get.return_value = "value"
+        backend.get("key")
+
+        backends.append(backend)
+
+    # one after the other so that only the first read goes to Redis
+    for _ in range(5):
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+
+    assert len({id(x) for x in backends}) == 5
+    assert len({id(x._tier) for x in backends}) == 1
+
+    # the first read went to Redis, the rest were served from the shared L1
+    stats = backends[0].get_stats()
+    assert stats["l2_hits"] == 1
+    assert stats["l1_hits"] == 4
+
+    assert len(listeners) == 1
+
+    tier = backends[0]._tier
+    close_local_tiers(timeout=5)
+
+    assert not listeners[0].is_alive()
+    assert tier.pid is None
+
+
+def test_listener_unsubscribes_on_close():
+    """
+    ensure a stopped listener unsubscribes and closes its connection
+    """
+    pubsub = mock.Mock()
+    pubsub.get_message.side_effect = lambda timeout: None
+
+    client = mock.Mock()
+    client.pubsub.return_value = pubsub
+
+    subscribed = threading.Event()
+    pubsub.subscribe.side_effect = lambda channel: subscribed.set()
+
+    tier = LocalTier(10, "channel")
+    tier.ensure_listener(lambda: client)
+
+    assert subscribed.wait(5)
+
+    tier.close(timeout=5)
+
+    pubsub.subscribe.assert_called_with("channel")
+    pubsub.unsubscribe.assert_called_once_with()
+    pubsub.close.assert_called_once_with()
+
+
+def test_instrumented_backends_are_async():
+    """
+    ensure enabling the stats keeps the native async methods
+    """
+    for backend_class in (InstrumentedRedisCache, InstrumentedTwoTierRedisCache):
+        assert issubclass(backend_class, AsyncRedisCacheMixin)
+
+    assert InstrumentedRedisCache.aset is AsyncRedisCacheMixin.aset
+
+
+def test_async_client_uses_options(monkeypatch):
+    """
+    ensure the async client is built with the pool options and shared per loop
+    """
+    from_url = mock.Mock()
+    monkeypatch.setattr("redis.asyncio.ConnectionPool.from_url", from_url)
+
+    options = {
+        "db": 2,
+        "max_connections": 5,
+        "serializer": "baseline.backends.serializers.CompressedPickleSerializer",
+        "pool_class": "redis.ConnectionPool",
+    }
+
+    async def get_clients():
+        return [
+            AsyncRedisCache(
+                "redis://redis:6379", {"OPTIONS": options}
+            ).get_async_client()
+            for _ in range(2)
+        ]
+
+    clients = asyncio.run(get_clients())
+
+    from_url.assert_called_once_with("redis://redis:6379", db=2, max_connections=5)
+    assert clients[0] is clients[1]
+    assert clients[0].connection_pool is from_url.return_value
@@ -0,0 +1,254 @@
+import time
+
+import pytest
+
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+
+from baseline.decorators.cache import (
+    NOT_CACHED,
+    CacheEntry,
+    NegativeResult,
+    cached,
+    cached_many,
+    get_single_flight_stats,
+)
+
+
+class Thing:
+    """
+    A class with cached methods
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.batches = []
+
+    def get_cache_key(self, name, *args, **kwargs):
+        return "-".join(["thing", name] + [str(x) for x in args])
+
+    @cached()
+    def plain(self, value):
+        self.calls += 1
+
+        return value
+
+    @cached(negative_timeout=60, negative_exceptions=(ObjectDoesNotExist,))
+    def negative(self, value):
+        self.calls += 1
+
+        if value == "missing":
+            raise ObjectDoesNotExist(value)
+
+        return value
+
+    @cached_many("plain")
+    def plain_many(self, args_list):
+        self.calls += 1
+        self.batches.append(args_list)
+
+        return [value for (value,) in args_list]
+
+    @cached(single_flight=True, wait_timeout=0)
+    def flight(self, value):
+        self.calls += 1
+
+        return value
+
+
+def test_cached():
+    """
+    ensure the second call comes from cache
+    """
+    thing = Thing()
+
+    assert thing.plain(1) == 1
+    assert thing.plain(1) == 1
+
+    assert thing.calls == 1
+
+
+def test_single_flight_hit():
+    """
+    ensure a fresh entry is served without recomputing
+    """
+    thing = Thing()
+
+    assert thing.flight(1) == 1
+    assert thing.flight(1) == 1
+
+    assert thing.calls == 1
+    assert isinstance(cache.get("thing-flight-1"), CacheEntry)
+
+
+def test_single_flight_serves_stale_while_leased():
+    """
+    ensure the stale value is served while another caller holds the lease
+    """
+    thing = Thing()
+
+    cache.set("thing-flight-2", CacheEntry("stale", 0.1, time.time() - 1))
+    cache.add("thing-flight-2:lease", 1)
+
+    assert thing.flight(2) == "stale"
+    assert thing.calls == 0
+
+    stats = get_single_flight_stats()["flight"]
+    assert stats["stale_serves"] >= 1
+
+
+def test_single_flight_recomputes_expired():
+    """
+    ensure an expired entry is recomputed when the lease is available
+    """
+    thing = Thing()
+
+    cache.set("thing-flight-3", CacheEntry("stale", 0.1, time.time() - 1))
+
+    assert thing.flight(3) == 3
+    assert thing.calls == 1
+
+    # the lease is released once the value is computed
+    assert cache.get("thing-flight-3:lease") is None
+
+
+def test_single_flight_wait_timeout():
+    """
+    ensure the value is computed when the lease holder does not finish in time
+    """
+    thing = Thing()
+
+    cache.add("thing-flight-4:lease", 1)
+
+    assert thing.flight(4) == 4
+    assert thing.calls == 1
+
+    stats = get_single_flight_stats()["flight"]
+    assert stats["wait_timeouts"] >= 1
+
+
+def test_falsy_not_cached_by_default():
+    """
+    ensure falsy results are recomputed when negative caching is not enabled
+    """
+    thing = Thing()
+
+    assert thing.plain(0) == 0
+    assert thing.plain(0) == 0
+
+    assert thing.calls == 2
+    assert Thing.plain.get_cached(thing, 0) is NOT_CACHED
+
+
+@pytest.mark.parametrize("method", ["plain", "flight"])
+def test_falsy_not_cached_in_any_mode(method):
+    """
+    ensure falsy results are recomputed with and without single-flight
+    """
+    thing = Thing()
+
+    for _ in range(3):
+        assert getattr(thing, method)(None) is None
+
+    assert thing.calls == 3
+    assert getattr(Thing, method).get_cached(thing, None) is NOT_CACHED
+    assert cache.get(f"thing-{method}-None") is None
+
+
+def test_single_flight_serves_plain_entries():
+    """
+    ensure values written by the other modes are hits in single-flight mode
+    """
+
+    class FlightThing(Thing):
+        @cached("plain", single_flight=True)
+        def flight_plain(self, value):
+            self.calls += 1
+
+            return value
+
+    thing = FlightThing()
+
+    # stored as a raw value by the batch method
+    thing.plain_many([(5,)])
+
+    # held by another caller, so a miss would wait and then recompute
+    cache.add("thing-plain-5:lease", 1)
+
+    assert thing.flight_plain(5) == 5
+    assert thing.calls == 1
+
+    # and the other way around
+    assert thing.flight_plain(6) == 6
+    assert thing.plain(6) == 6
+    assert thing.plain_many([(6,)]) == [6]
+
+    assert thing.calls == 2
+
+
+def test_negative_cached():
+    """
+    ensure falsy results are cached with the negative timeout
+    """
+    thing = Thing()
+
+    for value in (None, 0, [], {}, False):
+        assert Thing.negative.get_cached(thing, value) is NOT_CACHED
+
+        assert thing.negative(value) == value
+        assert thing.negative(value) == value
+
+        assert Thing.negative.get_cached(thing, value) == NegativeResult(value)
+
+    assert thing.calls == 5
+
+
+def test_negative_exception_cached():
+    """
+    ensure the expected exception is cached and re-raised
+    """
+    thing = Thing()
+
+    for _ in range(2):
+        with pytest.raises(ObjectDoesNotExist):
+            thing.negative("missing")
+
+    assert thing.calls == 1
+
+    result = Thing.negative.get_cached(thing, "missing")
+    assert isinstance(result.exception, ObjectDoesNotExist)
+
+
+def test_cached_many_only_computes_misses():
+    """
+    ensure the batch function is called once with the keys not in cache
+    """
+    thing = Thing()
+
+    # this is stored with the same key as the batch method uses
+    thing.plain(1)
+
+    assert thing.plain_many([(1,), (2,), (3,)]) == [1, 2, 3]
+
+    assert thing.calls == 2
+    assert thing.batches == [[(2,), (3,)]]
+
+    # everything is in cache now, including for the single-item method
+    assert thing.plain_many([(3,), (2,), (1,)]) == [3, 2, 1]
+    assert thing.plain(2) == 2
+
+    assert thing.calls == 2
+
+
+def test_cached_many_wrong_number_of_results():
+    """
+    ensure a batch function that does not return a result for each item blows up
+    """
+
+    class BadThing(Thing):
+        @cached_many()
+        def bad_many(self, args_list):
+            return []
+
+    with pytest.raises(ValueError):
+        BadThing().bad_many([(1,)])
@@ -0,0 +1,55 @@
+import pickle
+
+import pytest
+
+from baseline.backends.serializers import (
+    LZMA_HEADER,
+    ZLIB_HEADER,
+    CompressedPickleSerializer,
+    get_compression_stats,
+)
+
+LARGE_VALUE = {"results": ["the same thing over and over"] * 100}
+
+
+@pytest.mark.parametrize(
+    "algorithm,header", [("zlib", ZLIB_HEADER), ("lzma", LZMA_HEADER)]
+)
+def test_compress_large_values(algorithm, header):
+    """
+    ensure values above the threshold are compressed and can be read back
+    """
+    serializer = CompressedPickleSerializer(min_size=100, algorithm=algorithm)
+
+    data = serializer.dumps(LARGE_VALUE)
+
+    assert data[:1] == header
+    assert len(data) < len(pickle.dumps(LARGE_VALUE, 5))
+
+    assert serializer.loads(data) == LARGE_VALUE
+
+    assert get_compression_stats()["bytes_saved"] > 0
+
+
+def test_small_values_not_compressed():
+    """
+    ensure values below the threshold are plain pickles
+    """
+    serializer = CompressedPickleSerializer(min_size=100)
+
+    data = serializer.dumps({"small": True})
+
+    assert pickle.loads(data) == {"small": True}
+
+
+def test_read_uncompressed_entries():
+    """
+    ensure entries written without compression can still be read
+    """
+    serializer = CompressedPickleSerializer(min_size=100)
+
+    assert serializer.loads(pickle.dumps(LARGE_VALUE)) == LARGE_VALUE
+
+    # integers are stored as is for incr() and decr()
+    assert serializer.dumps(10) == 10
+    assert serializer.loads(b"10") == 10
@@ -0,0 +1,78 @@
+from unittest import mock
+
+import pytest
+
+from django.core.cache import cache
+
+from baseline.cachescan import (
+    UnsupportedBackend,
+    delete_prefix,
+    get_delete_prefix_job,
+    get_match_pattern,
+    start_delete_prefix,
+)
+from baseline.tests.utils import SyncThread
+
+
+@pytest.fixture()
+def redis_client(monkeypatch):
+    client = mock.Mock()
+    client.scan_iter.return_value = [f":1:widgets-{i}".encode() for i in range(5)]
+
+    monkeypatch.setattr(
+        "baseline.cachescan.get_redis_client", mock.Mock(return_value=client)
+    )
+
+    return client
+
+
+def test_match_pattern_escapes_glob():
+    """
+    ensure glob characters in the prefix are matched literally
+    """
+    assert get_match_pattern(cache, "key:tags[a*") == r":1:key:tags\[a\**"
+
+
+def test_delete_prefix_batches(redis_client):
+    """
+    ensure the keys are unlinked in batches
+    """
+    assert delete_prefix("widgets", batch_size=2) == 5
+
+    redis_client.scan_iter.assert_called_with(match=":1:widgets*", count=2)
+    assert redis_client.unlink.call_count == 3
+
+
+def test_delete_prefix_dry_run(redis_client):
+    """
+    ensure a dry run only counts the keys
+    """
+    assert delete_prefix("widgets", dry_run=True) == 5
+
+    redis_client.unlink.assert_not_called()
+
+
+def test_delete_prefix_not_redis():
+    """
+    ensure other backends are rejected
+    """
+    with pytest.raises(UnsupportedBackend):
+        delete_prefix("widgets")
+
+    # the job is not started
+    with pytest.raises(UnsupportedBackend):
+        start_delete_prefix("widgets")
+
+
+def test_start_delete_prefix(redis_client, monkeypatch):
+    """
+    ensure the job status is recorded
+    """
+    monkeypatch.setattr("baseline.cachescan.threading.Thread", SyncThread)
+
+    job_id = start_delete_prefix("widgets")
+
+    job = get_delete_prefix_job(job_id)
+
+    assert job["status"] == "done"
+    assert job["count"] == 5
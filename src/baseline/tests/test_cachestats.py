@@ -0,0 +1,66 @@
+import pickle
+
+from unittest import mock
+
+import pytest
+
+from baseline.backends.cache import InstrumentedRedisCacheClient
+from baseline.cachestats import CacheStatsRecorder, get_key_prefix
+
+
+@pytest.mark.parametrize(
+    "key,prefix",
+    [
+        (":1:user-mfa-state-1234", "user-mfa-state"),
+        (":1:0b6ab4ee-7b8a-4a4e-9d39-1c2a0f8b6f0e", "cachestore"),
+        (
+            "site:1:views.decorators.cache.cache_page..GET.abc",
+            "views.decorators.cache.cache_page",
+        ),
+        (b":1:widget-1:tags[model:bltestapp.widget=1]", "widget"),
+    ],
+)
+def test_get_key_prefix(key, prefix):
+    """
+    ensure keys are grouped by their logical prefix
+    """
+    assert get_key_prefix(key) == prefix
+
+
+def test_recorder_without_redis():
+    """
+    ensure counters are kept in process when there is no Redis client
+    """
+    recorder = CacheStatsRecorder()
+
+    recorder.record("get", [":1:widget-1"], 0.002, hits=1, bytes_read=10)
+    recorder.record("get", [":1:widget-2"], 0.004, misses=1)
+
+    stats = recorder.get_stats()["widget"]
+
+    assert stats["ops"] == 2
+    assert stats["hit_ratio"] == 0.5
+    assert stats["bytes_read"] == 10
+    assert stats["avg_latency_ms"] == pytest.approx(3)
+
+
+def test_instrumented_client():
+    """
+    ensure the instrumented client records reads
+    """
+    recorder = CacheStatsRecorder()
+
+    client = InstrumentedRedisCacheClient(["redis://redis:6379/0"], recorder=recorder)
+
+    redis_mock = mock.Mock()
+    redis_mock.get.side_effect = [pickle.dumps("value"), None]
+    client.get_client = lambda *args, **kwargs: redis_mock
+
+    assert client.get(":1:widget-1", None) == "value"
+    assert client.get(":1:widget-2", "default") == "default"
+
+    stats = recorder.get_stats()["widget"]
+
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["bytes_read"] == len(pickle.dumps("value"))
@@ -0,0 +1,66 @@
+import pytest
+
+from baseline.cachestore import CacheStore, PayloadTooLarge
+
+
+def test_set_get():
+    """
+    ensure data can be retrieved more than once with get
+    """
+    nonce = CacheStore.set({"foo": "bar"})
+
+    assert CacheStore.get(nonce) == {"foo": "bar"}
+    assert CacheStore.get(nonce) == {"foo": "bar"}
+
+
+def test_pop():
+    """
+    ensure popped data is only returned once
+    """
+    nonce = CacheStore.set({"foo": "bar"})
+
+    assert CacheStore.pop(nonce) == {"foo": "bar"}
+    assert CacheStore.pop(nonce) is None
+    assert CacheStore.get(nonce) is None
+
+
+def test_set_many_get_many():
+    """
+    ensure items are stored in order and retrieved together
+    """
+    nonces = CacheStore.set_many(["one", "two"])
+
+    assert len(nonces) == 2
+
+    assert CacheStore.get_many(nonces + ["missing"]) == dict(
+        zip(nonces, ["one", "two"])
+    )
+
+
+def test_timeout(settings, monkeypatch):
+    """
+    ensure data is stored with the configured timeout
+    """
+    settings.CACHESTORE_TIMEOUT = 10
+
+    calls = []
+    monkeypatch.setattr(
+        "baseline.cachestore.cache.set", lambda *args, **kwargs: calls.append(kwargs)
+    )
+
+    CacheStore.set("data")
+    CacheStore.set("data", timeout=5)
+
+    assert calls == [{"timeout": 10}, {"timeout": 5}]
+
+
+def test_max_size(settings):
+    """
+    ensure data larger than the configured maximum is rejected
+    """
+    settings.CACHESTORE_MAX_SIZE = 100
+
+    CacheStore.set("small")
+
+    with pytest.raises(PayloadTooLarge):
+        CacheStore.set("x" * 1000)
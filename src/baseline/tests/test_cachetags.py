@@ -0,0 +1,68 @@
+from baseline.cachetags import get_tagged_key, get_tag_versions, invalidate_tag
+from baseline.decorators.cache import cached
+
+
+class Thing:
+    """
+    A class with a tagged cached method
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_cache_key(self, name, *args, **kwargs):
+        return "-".join(["thing", name] + [str(x) for x in args])
+
+    @cached(tags=lambda self, user_id: ["things", f"user:{user_id}"])
+    def tagged(self, user_id):
+        self.calls += 1
+
+        return user_id
+
+
+def test_tagged_key_changes_on_invalidate():
+    """
+    ensure invalidating a tag changes the keys that include it
+    """
+    key = get_tagged_key("key", ["a", "b"])
+
+    assert key == get_tagged_key("key", ["b", "a"])
+
+    invalidate_tag("b")
+
+    assert key != get_tagged_key("key", ["a", "b"])
+
+
+def test_invalidate_unused_tag():
+    """
+    ensure a tag that was never used can be invalidated
+    """
+    version = invalidate_tag("never-used")
+
+    assert get_tag_versions(["never-used"]) == {"never-used": version}
+
+
+def test_cached_with_tags():
+    """
+    ensure only the entries with the invalidated tag are recomputed
+    """
+    thing = Thing()
+
+    thing.tagged(1)
+    thing.tagged(2)
+
+    assert thing.calls == 2
+
+    invalidate_tag("user:1")
+
+    thing.tagged(1)
+    thing.tagged(2)
+
+    assert thing.calls == 3
+
+    invalidate_tag("things")
+
+    thing.tagged(1)
+    thing.tagged(2)
+
+    assert thing.calls == 5
@@ -0,0 +1,192 @@
+import collections
+import datetime
+import decimal
+import enum
+import ipaddress
+import uuid
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from baseline import encoders
+
+
+# orjson is optional
+BACKENDS = [
+    "stdlib",
+    pytest.param(
+        "orjson",
+        marks=pytest.mark.skipif(
+            encoders.orjson is None, reason="orjson is not installed"
+        ),
+    ),
+]
+
+
+class Color(enum.IntEnum):
+    RED = 1
+
+
+PAYLOADS = [
+    None,
+    True,
+    [],
+    {},
+    "plain",
+    "é and \u2028 and \u2029",
+    ' quote" backslash\\ control\x00\x1f\x7f',
+    0,
+    2**70,
+    1.5,
+    -0.0,
+    1e16,
+    0.00001,
+    1e-7,
+    123456789.123,
+    decimal.Decimal("1.10"),
+    decimal.Decimal("0.000001"),
+    {"key": ErrorDetail("bad", code="invalid")},
+    ReturnDict({"a": 1}, serializer=None),
+    ReturnList([1, 2], serializer=None),
+    collections.OrderedDict(b=1, a=2),
+    {1: "int key", None: "none key"},
+    {
+        "datetime": datetime.datetime(
+            2023, 6, 8, 1, 2, 3, tzinfo=datetime.timezone.utc
+        ),
+        "naive": datetime.datetime(2023, 6, 8, 1, 2, 3, 456),
+        "date": datetime.date(2023, 6, 8),
+        "time": datetime.time(1, 2, 3),
+        "timedelta": datetime.timedelta(days=1, seconds=1.5),
+    },
+    uuid.UUID("2b6e8d6c-1a36-4a5b-8d59-1f2c6f6d5e4a"),
+    ipaddress.ip_address("10.0.0.1"),
+    Color.RED,
+    gettext_lazy("lazy"),
+    {"set": {1}, "bytes": b"raw", "tuple": (1, "2")},
+    [{"id": x, "name": f"widget {x}", "price": decimal.Decimal(x)} for x in range(50)],
+]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_matches_drf(backend, payload):
+    """
+    ensure every backend renders the same bytes as DRF
+    """
+    expected = JSONRenderer().render(payload)
+
+    assert encoders.get_backend(backend).encode(payload) == (expected or b"null")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize(
+    "options",
+    [
+        dict(indent=4, separators=encoders.INDENT_SEPARATORS),
+        dict(separators=encoders.LONG_SEPARATORS),
+        dict(ensure_ascii=True),
+    ],
+)
+def test_matches_drf_options(backend, options):
+    """
+    ensure the encoder options are honored
+    """
+    payload = {"today": datetime.date(2023, 6, 8), "name": "é", "items": [1, 2]}
+
+    expected = encoders.json.dumps(
+        payload,
+        cls=encoders.JSONEncoder,
+        **dict(
+            dict(
+                ensure_ascii=False,
+                allow_nan=False,
+                separators=encoders.SHORT_SEPARATORS,
+            ),
+            **options,
+        ),
+    ).encode()
+
+    assert encoders.get_backend(backend).encode(payload, **options) == expected
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_rejects_unknown_types(backend):
+    """
+    ensure types DRF cannot encode still raise
+    """
+    with pytest.raises(TypeError):
+        encoders.get_backend(backend).encode({"object": object()})
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize(
+    "payload",
+    [
+        float("nan"),
+        {"a": None, "b": [1.5, float("inf")]},
+        [None, {"c": -float("inf")}],
+        {"a": None, "d": decimal.Decimal("NaN")},
+    ],
+)
+def test_rejects_non_finite(backend, payload):
+    """
+    ensure NaN and infinities raise like DRF's strict renderer instead of becoming null
+    """
+    with pytest.raises(ValueError):
+        JSONRenderer().render(payload)
+
+    with pytest.raises(ValueError):
+        encoders.get_backend(backend).encode(payload)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize(
+    "get_payload",
+    [
+        lambda: {"a": (x for x in [1, 2]), "b": 1e16},
+        lambda: [iter([1, 2]), 2**70],
+        lambda: {"a": iter([{"b": iter(["c"])}]), 1: "int key"},
+    ],
+)
+def test_iterators_in_fallback(backend, get_payload):
+    """
+    ensure iterators read by orjson are not written empty when it falls back
+    """
+    expected = JSONRenderer().render(get_payload())
+
+    assert encoders.get_backend(backend).encode(get_payload()) == expected
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize(
+    "get_payload",
+    [
+        lambda: {"a": iter([1.5, float("nan")])},
+        lambda: [None, (x for x in [decimal.Decimal("-Infinity")])],
+    ],
+)
+def test_rejects_non_finite_in_iterators(backend, get_payload):
+    """
+    ensure NaN and infinities inside iterators raise like DRF's strict renderer
+    """
+    with pytest.raises(ValueError):
+        JSONRenderer().render(get_payload())
+
+    with pytest.raises(ValueError):
+        encoders.get_backend(backend).encode(get_payload())
+
+
+def test_has_float_mismatch():
+    """
+    ensure only numbers orjson writes differently are flagged
+    """
+    assert encoders.has_float_mismatch(b"1e16")
+    assert encoders.has_float_mismatch(b'{"a":[1,-1e-7]}')
+    assert encoders.has_float_mismatch(b'{"a":0.00001}')
+
+    assert not encoders.has_float_mismatch(b'{"uuid":"0001e3a-0.00001","b":true}')
+    assert not encoders.has_float_mismatch(b'{"a":[1.5,0.0001,-20]}')
@@ -1,4 +1,5 @@
 import datetime
+import io
 
 from baseline import json
 
@@ -34,3 +35,44 @@ def test_dump_fancy_types_indented():
     content = json.dumps(stuff, indent=4)
 
     assert content == '{\n    "today": "2023-06-08"\n}'
+
+
+def test_dumps_bytes():
+    """
+    ensure bytes are returned without going through a string
+    """
+    stuff = {"today": datetime.date(2023, 6, 8), "name": "é"}
+
+    content = json.dumps_bytes(stuff)
+
+    assert content == '{"today":"2023-06-08","name":"é"}'.encode()
+
+
+def test_dump_lines():
+    """
+    ensure objects are written one per line
+    """
+    stuff = [{"today": datetime.date(2023, 6, 8)}, None, [1, 2], "é"]
+
+    fp = io.BytesIO()
+    json.dump_lines(iter(stuff), fp, chunk_size=3)
+
+    content = fp.getvalue()
+
+    assert content == '{"today":"2023-06-08"}\nnull\n[1,2]\n"é"\n'.encode()
+    assert [json.loads(x) for x in content.splitlines()][1:] == [None, [1, 2], "é"]
+
+
+def test_dump_lines_text():
+    """
+    ensure strings are written to text files
+    """
+    fp = io.StringIO()
+    json.dump_lines([{"a": 1}, {"b": 2}], fp)
+
+    assert fp.getvalue() == '{"a":1}\n{"b":2}\n'
+
+    fp = io.StringIO()
+    json.dump_lines([], fp)
+
+    assert fp.getvalue() == ""
@@ -0,0 +1,38 @@
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.authtoken.models import Token
+
+from baseline.middleware.auth_param import AUTHORIZATION_HEADER, AuthParamMiddleware
+
+
+async def get_response(request):
+    return HttpResponse("view")
+
+
+def test_async_sets_header(get_user):
+    """
+    ensure the async path sets the authorization header for a valid token
+    """
+    token = Token.objects.create(user=get_user())
+
+    middleware = AuthParamMiddleware(get_response)
+    assert middleware.async_mode
+
+    request = RequestFactory().get("/widgets", {"auth_token": token.key})
+    response = async_to_sync(middleware)(request)
+
+    assert response.content == b"view"
+    assert request.META[AUTHORIZATION_HEADER] == f"Token {token.key}"
+
+
+def test_async_bad_token(db):
+    """
+    ensure the async path leaves the header alone for an unknown token
+    """
+    middleware = AuthParamMiddleware(get_response)
+
+    request = RequestFactory().get("/widgets", {"auth_token": "nope"})
+    async_to_sync(middleware)(request)
+
+    assert AUTHORIZATION_HEADER not in request.META
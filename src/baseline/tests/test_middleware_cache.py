@@ -0,0 +1,136 @@
+import asyncio
+
+from unittest import mock
+
+import pytest
+
+from django.http import HttpResponse
+from django.middleware.cache import UpdateCacheMiddleware
+from django.test import RequestFactory
+
+from baseline.middleware.cache import (
+    BUST_MAGIC_CACHE_CONTROL,
+    BustableFetchFromCacheMiddleware,
+)
+
+
+@pytest.fixture()
+def fetch_mock(monkeypatch):
+    """
+    Mocks out the upstream cache fetch
+    """
+    _mock = mock.Mock(return_value=HttpResponse("cached"))
+    monkeypatch.setattr(
+        "django.middleware.cache.FetchFromCacheMiddleware.process_request", _mock
+    )
+
+    return _mock
+
+
+def get_request(bust: bool = False):
+    headers = {}
+    if bust:
+        headers["HTTP_CACHE_CONTROL"] = BUST_MAGIC_CACHE_CONTROL
+
+    return RequestFactory().get("/widgets", **headers)
+
+
+def test_cached_response(fetch_mock):
+    """
+    ensure the cached response is returned without the bust header
+    """
+    middleware = BustableFetchFromCacheMiddleware(lambda request: None)
+
+    response = middleware.process_request(get_request())
+
+    assert response.content == b"cached"
+
+
+def test_bust_skips_fetch(fetch_mock):
+    """
+    ensure the cache is not read when busting and the fresh response is saved
+    """
+    middleware = BustableFetchFromCacheMiddleware(lambda request: None)
+
+    request = get_request(bust=True)
+    response = middleware.process_request(request)
+
+    assert response is None
+    assert request._cache_update_cache is True
+
+    fetch_mock.assert_not_called()
+
+
+def test_bust_rate_limited(fetch_mock):
+    """
+    ensure a path cannot be busted again within the interval
+    """
+    middleware = BustableFetchFromCacheMiddleware(lambda request: None)
+
+    assert middleware.process_request(get_request(bust=True)) is None
+
+    response = middleware.process_request(get_request(bust=True))
+
+    assert response.content == b"cached"
+
+
+def test_bust_rate_limit_disabled(fetch_mock, settings):
+    """
+    ensure the rate limit can be disabled
+    """
+    settings.CACHE_MIDDLEWARE_BUST_INTERVAL = 0
+
+    middleware = BustableFetchFromCacheMiddleware(lambda request: None)
+
+    for _ in range(2):
+        assert middleware.process_request(get_request(bust=True)) is None
+
+    fetch_mock.assert_not_called()
+
+
+def test_async_cache_hit():
+    """
+    ensure the async path serves a response saved by the update middleware
+    """
+    request = get_request()
+    request._cache_update_cache = True
+
+    UpdateCacheMiddleware(lambda request: None).process_response(
+        request, HttpResponse("fresh")
+    )
+
+    async def get_response(request):
+        return HttpResponse("view")
+
+    middleware = BustableFetchFromCacheMiddleware(get_response)
+    assert middleware.async_mode
+
+    request = get_request()
+    response = asyncio.run(middleware(request))
+
+    assert response.content == b"fresh"
+    assert request._cache_update_cache is False
+
+
+def test_async_cache_miss_and_bust():
+    """
+    ensure the async path calls the view on a miss and when busting
+    """
+
+    async def get_response(request):
+        return HttpResponse("view")
+
+    middleware = BustableFetchFromCacheMiddleware(get_response)
+
+    request = get_request()
+    response = asyncio.run(middleware(request))
+
+    assert response.content == b"view"
+    assert request._cache_update_cache is True
+
+    request = get_request(bust=True)
+    assert asyncio.run(middleware.aprocess_request(request)) is None
+    assert request._cache_update_cache is True
+
+    # the second bust is rate limited
+    assert not asyncio.run(middleware.ashould_bust(get_request(bust=True)))
@@ -0,0 +1,118 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils.http import http_date
+from rest_framework import views
+
+from baseline.decorators.cache import combined_cache_control
+from baseline.modelversions import (
+    MODEL_ROW_VERSION_TIMEOUT,
+    get_etag_func,
+    get_last_modified_func,
+    get_model_version,
+    get_version_key,
+)
+from bltestapp.models import Widget
+
+
+class WidgetView(views.APIView):
+    permission_classes = []
+
+    @combined_cache_control(
+        60,
+        etag_func=get_etag_func(Widget, per_row=True),
+        last_modified_func=get_last_modified_func(Widget, per_row=True),
+    )
+    def get(self, request, *args, **kwargs):
+        return HttpResponse("widget")
+
+
+def test_save_bumps_version(db, django_capture_on_commit_callbacks):
+    """
+    ensure saving and deleting a row bumps the model and row versions on commit
+    """
+    widget = Widget.objects.create(name="test", quantity=1)
+
+    model_version = get_model_version(Widget)
+    row_version = get_model_version(Widget, widget.pk)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        widget.quantity = 2
+        widget.save()
+
+        # a request before the commit still gets the version of the old rows
+        assert get_model_version(Widget) == model_version
+
+    assert get_model_version(Widget).version > model_version.version
+    assert get_model_version(Widget, widget.pk).version > row_version.version
+
+    model_version = get_model_version(Widget)
+    with django_capture_on_commit_callbacks(execute=True):
+        widget.delete()
+
+    assert get_model_version(Widget).version > model_version.version
+
+
+def test_row_versions_expire_and_are_deleted(db, django_capture_on_commit_callbacks):
+    """
+    ensure row versions do not stay in cache forever
+    """
+    with mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+        with django_capture_on_commit_callbacks(execute=True):
+            widget = Widget.objects.create(name="test", quantity=1)
+
+    assert set_many.call_args.kwargs["timeout"] == MODEL_ROW_VERSION_TIMEOUT
+
+    row_key = get_version_key(Widget, widget.pk)
+    assert cache.get(row_key) is not None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        widget.delete()
+
+    assert cache.get(row_key) is None
+
+
+def test_conditional_get_without_queries(
+    db, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    """
+    ensure revalidating a response does not touch the database
+    """
+    widget = Widget.objects.create(name="test", quantity=1)
+    view = WidgetView.as_view()
+
+    response = view(RequestFactory().get("/widgets"), pk=widget.pk)
+    etag = response["ETag"]
+
+    assert response.status_code == 200
+
+    with django_assert_num_queries(0):
+        response = view(
+            RequestFactory().get("/widgets", HTTP_IF_NONE_MATCH=etag), pk=widget.pk
+        )
+
+    assert response.status_code == 304
+
+    # a change to the row makes the old etag stale
+    with django_capture_on_commit_callbacks(execute=True):
+        widget.save()
+
+    response = view(
+        RequestFactory().get("/widgets", HTTP_IF_NONE_MATCH=etag), pk=widget.pk
+    )
+
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_last_modified(db):
+    """
+    ensure the last modified header reflects the version timestamp
+    """
+    version = get_model_version(Widget)
+
+    response = WidgetView.as_view()(RequestFactory().get("/widgets"))
+
+    assert response["Last-Modified"] == http_date(version.last_modified)
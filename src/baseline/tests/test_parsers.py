@@ -0,0 +1,78 @@
+import json
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+
+from baseline.middleware.auth_param import AUTHORIZATION_HEADER, AuthParamMiddleware
+from baseline.parsers import JSON_BODY_ATTR, JSONParser, get_json_body
+
+
+def get_request(data: dict, **extra):
+    return RequestFactory().post(
+        "/widgets", json.dumps(data), content_type="application/json", **extra
+    )
+
+
+def test_body_parsed_once(get_user):
+    """
+    ensure the parser reuses the body parsed by the middleware
+    """
+    token = Token.objects.create(user=get_user())
+
+    request = get_request({"auth_token": token.key, "name": "widget"})
+    AuthParamMiddleware(lambda request: HttpResponse())(request)
+
+    assert request.META[AUTHORIZATION_HEADER] == f"Token {token.key}"
+
+    drf_request = Request(request, parsers=[JSONParser()])
+
+    assert drf_request.data is getattr(request, JSON_BODY_ATTR)
+
+
+def test_body_skipped_with_header(db):
+    """
+    ensure the body is not parsed when the header already has credentials
+    """
+    request = get_request({"auth_token": "nope"}, HTTP_AUTHORIZATION="Token abc")
+    AuthParamMiddleware(lambda request: HttpResponse())(request)
+
+    assert not hasattr(request, JSON_BODY_ATTR)
+    assert request.META[AUTHORIZATION_HEADER] == "Token abc"
+
+
+def test_body_skipped_with_cookie(db):
+    """
+    ensure the body is not parsed when a cookie supplies the token
+    """
+    request = get_request({"auth_token": "nope"})
+    request.COOKIES["auth_token"] = "abc"
+
+    AuthParamMiddleware(lambda request: HttpResponse())(request)
+
+    assert not hasattr(request, JSON_BODY_ATTR)
+
+
+def test_body_size_cap(settings):
+    """
+    ensure bodies above the cap are left to the view's parser
+    """
+    settings.JSON_BODY_MAX_SIZE = 10
+
+    request = get_request({"auth_token": "a-long-enough-token"})
+
+    assert get_json_body(request) is None
+    assert not hasattr(request, JSON_BODY_ATTR)
+
+
+def test_malformed_body():
+    """
+    ensure a malformed body is not cached
+    """
+    request = RequestFactory().post(
+        "/widgets", "{nope", content_type="application/json"
+    )
+
+    assert get_json_body(request) is None
+    assert not hasattr(request, JSON_BODY_ATTR)
@@ -0,0 +1,108 @@
+import pytest
+
+from django.contrib.auth import authenticate
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from baseline import passwords
+from baseline.backends.auth import CachedModelBackend
+from baseline.tests.test_auth import get_login_response
+
+
+class StaffOnlyBackend(CachedModelBackend):
+    def user_can_authenticate(self, user):
+        return user.is_staff
+
+
+@pytest.fixture()
+def hash_pool(settings, monkeypatch):
+    """
+    Enables the thread hash pool
+    """
+    settings.PASSWORD_HASH_POOL = "thread"
+    settings.PASSWORD_HASH_POOL_SIZE = 1
+    settings.PASSWORD_HASH_POOL_MAX_QUEUE = 0
+
+    monkeypatch.setattr(passwords, "_pool", None)
+
+    return passwords.get_pool()
+
+
+def test_login_in_pool(hash_pool, get_api_client, get_user):
+    """
+    ensure a login verifies the password in the pool
+    """
+    user, client, response = get_login_response(get_user, get_api_client)
+
+    assert response.cookies["auth_token"].value == user.auth_token.key
+    assert hash_pool._executor is not None
+
+
+def test_bad_password_in_pool(hash_pool, get_api_client, get_user):
+    """
+    ensure a bad password is rejected
+    """
+    get_user(username="test@test.com", password="test123")
+
+    response = get_api_client().post(
+        reverse("auth-login"),
+        data={"username": "test@test.com", "password": "nope"},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_pool_full(hash_pool, get_api_client, get_user):
+    """
+    ensure logins are turned away when the pool is full
+    """
+    hash_pool.in_flight = 1
+
+    response = get_api_client().post(
+        reverse("auth-login"),
+        data={"username": "test@test.com", "password": "test123"},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert passwords.get_login_stats()["rejected"] >= 1
+
+
+def test_login_stats(get_api_client, get_user):
+    """
+    ensure the latency percentiles are reported
+    """
+    get_login_response(get_user, get_api_client)
+
+    client = get_api_client(user=get_user(username="admin", is_staff=True))
+    response = client.get(reverse("auth-login-stats"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["result"]["p50"] > 0
+
+
+def test_pool_uses_configured_backends(hash_pool, get_user, settings):
+    """
+    ensure logins with the pool go through the configured backends
+    """
+    user = get_user(username="test@test.com", password="test123")
+
+    authenticated = authenticate(None, username="test@test.com", password="test123")
+
+    assert authenticated == user
+    assert authenticated.backend == "baseline.backends.auth.CachedModelBackend"
+    assert hash_pool._executor is not None
+
+    # the backend's user_can_authenticate() is honored
+    settings.AUTHENTICATION_BACKENDS = [
+        "baseline.tests.test_passwords.StaffOnlyBackend"
+    ]
+
+    assert authenticate(None, username="test@test.com", password="test123") is None
+
+    user.is_staff = True
+    user.save()
+
+    authenticated = authenticate(None, username="test@test.com", password="test123")
+    assert authenticated.backend == "baseline.tests.test_passwords.StaffOnlyBackend"
@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, Permission
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.test import APIRequestFactory
+
+from baseline.permissions import FullDjangoModelPermissions
+from baseline.routers import PrefixBasenameSimpleRouter
+from bltestapp.models import Widget
+
+
+class WidgetViewSet(viewsets.ModelViewSet):
+    queryset = Widget.objects.all()
+    permission_classes = [FullDjangoModelPermissions]
+
+    @action(detail=False)
+    def export(self, request):
+        pass
+
+
+def get_view(method: str = "get", action_name: str = "list"):
+    view = WidgetViewSet()
+    view.action = action_name
+
+    request = getattr(APIRequestFactory(), method)("/widgets")
+
+    return request, view
+
+
+def test_plan_compiled_on_register():
+    """
+    ensure registering the viewset works out the permissions for every action
+    """
+    router = PrefixBasenameSimpleRouter()
+    router.register("widgets", WidgetViewSet)
+
+    plan = FullDjangoModelPermissions.plans[WidgetViewSet]
+
+    assert plan.actions["list"] == frozenset(["bltestapp.list_widget"])
+    assert plan.actions["export"] == frozenset(["bltestapp.export_widget"])
+    assert plan.methods["GET"] == frozenset(["bltestapp.view_widget"])
+
+
+def test_subclass_plans_are_separate():
+    """
+    ensure a subclass with different permissions does not share the plans
+    """
+
+    class ManagePermissions(FullDjangoModelPermissions):
+        @classmethod
+        def get_action_perms(cls, model_cls, action):
+            return frozenset([f"bltestapp.manage_{model_cls._meta.model_name}"])
+
+    plan = FullDjangoModelPermissions.compile_plan(WidgetViewSet)
+    subclass_plan = ManagePermissions.compile_plan(WidgetViewSet)
+
+    assert plan.actions["list"] == frozenset(["bltestapp.list_widget"])
+    assert subclass_plan.actions["list"] == frozenset(["bltestapp.manage_widget"])
+
+    assert ManagePermissions.plans is not FullDjangoModelPermissions.plans
+
+
+def test_method_fallback(get_user):
+    """
+    ensure the method permissions are checked against the same permission set
+    """
+    user = get_user(
+        _permissions=[
+            Permission.objects.get(
+                content_type__app_label="bltestapp", codename="view_widget"
+            )
+        ]
+    )
+    request, view = get_view()
+    request.user = user
+
+    with mock.patch.object(
+        user, "get_all_permissions", wraps=user.get_all_permissions
+    ) as get_all_permissions:
+        assert FullDjangoModelPermissions().has_permission(request, view)
+
+    get_all_permissions.assert_called_once()
+
+    request, view = get_view("post", "create")
+    request.user = user
+
+    assert not FullDjangoModelPermissions().has_permission(request, view)
+
+
+def test_anonymous_denied(db):
+    """
+    ensure an anonymous user is denied
+    """
+    request, view = get_view()
+    request.user = AnonymousUser()
+
+    assert not FullDjangoModelPermissions().has_permission(request, view)
@@ -1,6 +1,10 @@
+import datetime
+
+from rest_framework.response import Response
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
+from baseline.renderers import EnvelopeJSONRenderer
 from bltestapp.models import Widget
 
 
@@ -15,7 +19,10 @@ def test_detail_envelope(db):
     url = reverse("widgets-detail", kwargs=dict(pk=widget.pk))
     response = client.get(url)
 
-    assert "result" in response.data.keys()
+    assert "result" in response.json().keys()
+
+    # the envelope is only in the rendered content
+    assert "result" not in response.data
 
 
 def test_list_envelope(db):
@@ -29,8 +36,8 @@ def test_list_envelope(db):
     url = reverse("widgets-list")
     response = client.get(url)
 
-    assert "result" not in response.data.keys()
-    assert "results" in response.data.keys()
+    assert "result" not in response.json().keys()
+    assert "results" in response.json().keys()
 
 
 def test_handle_empty_response(db):
@@ -43,3 +50,37 @@ def test_handle_empty_response(db):
 
     url = reverse("widgets-detail", kwargs=dict(pk=widget.pk))
     response = client.delete(url)
+
+
+def test_render_envelope():
+    """
+    ensure the envelope matches wrapping the data before rendering
+    """
+    renderer = EnvelopeJSONRenderer()
+    data = {"today": datetime.date(2023, 6, 8), "items": [1, 2]}
+
+    content = renderer.render(data, renderer_context={})
+
+    assert content == b'{"result":{"today":"2023-06-08","items":[1,2]}}'
+    assert data == {"today": datetime.date(2023, 6, 8), "items": [1, 2]}
+
+    content = renderer.render(data, renderer_context={"indent": 2})
+
+    assert content == (
+        b'{\n  "result": {\n    "today": "2023-06-08",\n    "items": [\n'
+        b"      1,\n      2\n    ]\n  }\n}"
+    )
+
+
+def test_render_without_envelope():
+    """
+    ensure a response can opt out of the envelope
+    """
+    response = Response()
+    response.envelope = False
+
+    content = EnvelopeJSONRenderer().render(
+        {"a": 1}, renderer_context={"response": response}
+    )
+
+    assert content == b'{"a":1}'
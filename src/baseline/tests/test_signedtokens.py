@@ -0,0 +1,127 @@
+import pytest
+
+from django.core.cache import cache
+from rest_framework import status, views
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+
+from baseline import signedtokens
+from baseline.authentication import CachedTokenAuthentication
+from baseline.tests.test_auth import get_login_response
+
+
+class UserIdView(views.APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response({"user_id": request.user.pk})
+
+
+@pytest.fixture(autouse=True)
+def signed_tokens(settings):
+    settings.AUTH_SIGNED_TOKENS = True
+
+
+def test_login_issues_signed_token(get_api_client, get_user):
+    """
+    ensure the login cookie holds a signed token and no Token row is created
+    """
+    user, client, response = get_login_response(get_user, get_api_client)
+
+    key = response.cookies["auth_token"].value
+
+    assert signedtokens.is_signed_token(key)
+    assert signedtokens.get_token_user(key) == user
+    assert not Token.objects.filter(user=user).exists()
+
+
+def test_verify_without_db(get_user, django_assert_num_queries):
+    """
+    ensure an authenticated request does not query the database
+    """
+    user = get_user()
+    key = signedtokens.issue_token(user)
+
+    assert signedtokens.get_token_user_id(key) == user.pk
+
+    with django_assert_num_queries(0):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Token {key}")
+        response = UserIdView.as_view()(request)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {"user_id": user.pk}
+
+    # the user is loaded once its fields are used
+    user_obj = signedtokens.get_token_user(key)
+    with django_assert_num_queries(1):
+        assert user_obj.username == user.username
+        assert user_obj == user
+
+
+def test_user_not_cached(get_user):
+    """
+    ensure only the user's active flag is cached, not the user row
+    """
+    user = get_user()
+    key = signedtokens.issue_token(user)
+
+    signedtokens.get_token_user(key)
+
+    state_key = signedtokens.SIGNED_TOKEN_USER_STATE_KEY.format(user_id=user.pk)
+    version, is_active = cache.get(state_key)
+
+    assert isinstance(version, int)
+    assert is_active is True
+
+
+def test_tampered_token(get_user):
+    """
+    ensure a token that was changed is rejected
+    """
+    key = signedtokens.issue_token(get_user())
+
+    assert signedtokens.get_token_user(key[:-1] + "x") is None
+
+
+def test_logout_revokes(get_api_client, get_user):
+    """
+    ensure logging out revokes the token
+    """
+    user, client, response = get_login_response(get_user, get_api_client)
+    key = response.cookies["auth_token"].value
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {key}")
+
+    response = client.post(reverse("auth-logout"))
+    assert response.status_code == status.HTTP_200_OK
+
+    assert signedtokens.get_token_user(key) is None
+
+    # the revoked token no longer authenticates
+    response = client.post(reverse("auth-logout"))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_deactivation_revokes(get_user):
+    """
+    ensure deactivating a user revokes all their tokens
+    """
+    user = get_user()
+    key = signedtokens.issue_token(user)
+    assert signedtokens.get_token_user(key) == user
+
+    user.is_active = False
+    user.save()
+
+    assert signedtokens.get_token_user(key) is None
+
+    # reactivating does not bring the old tokens back
+    user.is_active = True
+    user.save()
+
+    assert signedtokens.get_token_user(key) is None
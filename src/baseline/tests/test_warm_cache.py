@@ -0,0 +1,75 @@
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.http import HttpResponse
+from django.urls import path
+
+calls = []
+
+
+def ok_view(request):
+    return HttpResponse("ok")
+
+
+def failing_view(request):
+    raise RuntimeError("boom")
+
+
+urlpatterns = [
+    path("ok", ok_view),
+    path("fails", failing_view),
+]
+
+
+def warm_things():
+    """
+    callable for the command to call
+    """
+    calls.append(True)
+
+
+def test_warm_cache(db):
+    """
+    ensure the paths are requested and the callables are called
+    """
+    stdout = StringIO()
+
+    call_command(
+        "warm_cache",
+        "/widgets",
+        callables=["baseline.tests.test_warm_cache.warm_things"],
+        concurrency=1,
+        stdout=stdout,
+    )
+
+    output = stdout.getvalue()
+
+    assert "path=/widgets, status=200" in output
+    assert calls == [True]
+
+
+def test_warm_cache_error_status(db):
+    """
+    ensure the command fails when a path returns an error
+    """
+    with pytest.raises(CommandError):
+        call_command("warm_cache", "/does-not-exist", concurrency=1, stdout=StringIO())
+
+
+@pytest.mark.urls("baseline.tests.test_warm_cache")
+def test_warm_cache_view_raises(db):
+    """
+    ensure a view that raises is counted as an error and the other paths still run
+    """
+    stdout = StringIO()
+
+    with pytest.raises(CommandError, match="1 paths"):
+        call_command("warm_cache", "/fails", "/ok", concurrency=1, stdout=stdout)
+
+    output = stdout.getvalue()
+
+    assert "path=/fails, status=500" in output
+    assert "path=/ok, status=200" in output
@@ -58,3 +58,15 @@ def get_lines(path: str) -> List[str]:
         a list of strings
     """
     return get_content(path, _stack_depth=2).splitlines(keepends=False)
+
+
+class SyncThread:
+    """
+    runs the thread target when started
+    """
+
+    def __init__(self, target, **kwargs):
+        self.target = target
+
+    def start(self):
+        self.target()
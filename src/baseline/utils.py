@@ -202,7 +202,8 @@ def set_cookie(
     domain = domain or settings.SESSION_COOKIE_DOMAIN
     path = path or settings.SESSION_COOKIE_PATH
 
-    if not expires:
+    # django does not allow both; max_age is used for cookies that expire with their value
+    if not expires and max_age is None:
         expires = timezone.now() + datetime.timedelta(
             seconds=settings.SESSION_COOKIE_AGE
         )
@@ -1,4 +1,5 @@
 import datetime
+import time
 import uuid
 
 from django.contrib.auth import get_user_model
@@ -8,11 +9,14 @@ from rest_framework import status
 from rest_framework import viewsets
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 
+from django_otp.plugins.otp_totp.models import TOTPDevice
 from two_factor import utils
 
+from baseline import passwords, signedtokens
 from baseline.serializers.auth import LoginSerializer, MFASerializer
 from baseline.utils import get_user_serializer, set_cookie
 
@@ -30,13 +34,20 @@ def get_logged_in_response(user: "User", mfa_verified: bool = None):
         user: the user that is logged in
         mfa_verified: whether mfa was verified
     """
-    auth_token, _ = Token.objects.get_or_create(user=user)
-    key = auth_token.key
+    cookie_kwargs = {}
+    if signedtokens.is_enabled():
+        key = signedtokens.issue_token(user)
+
+        # the cookie goes away when the token expires
+        cookie_kwargs["max_age"] = signedtokens.get_max_age()
+    else:
+        auth_token, _ = Token.objects.get_or_create(user=user)
+        key = auth_token.key
 
     user_serializer = UserSerializer(instance=user)
 
     response = Response(user_serializer.data)
-    set_cookie(response, "auth_token", key)
+    set_cookie(response, "auth_token", key, **cookie_kwargs)
 
     message = f"login, user={user}, user.pk={user.pk}"
     if mfa_verified:
@@ -61,20 +72,38 @@ class AuthViewSet(viewsets.ModelViewSet):
         Override the create endpoint
         """
 
+        start = time.perf_counter()
+
         serializer = LoginSerializer(data=request.data, context={"request": request})
-        serializer.is_valid(raise_exception=True)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except passwords.PoolFull:
+            passwords.record_login_rejected()
 
-        # get or create the user's auth token
-        user = serializer.user
+            raise
+        except ValidationError:
+            passwords.record_login(time.perf_counter() - start, success=False)
 
-        cache_uuid = str(uuid.uuid4())
-        cache_key = get_mfa_cache_key(cache_uuid)
+            raise
 
-        cache.set(cache_key, {"user_id": user.pk}, 300)
+        passwords.record_login(time.perf_counter() - start, success=True)
+
+        # get or create the user's auth token
+        user = serializer.user
 
         # check to see if this user has a MFA device setup and enabled
         mfa_device = utils.default_device(user)
         if mfa_device and mfa_device.confirmed:
+            cache_uuid = str(uuid.uuid4())
+            cache_key = get_mfa_cache_key(cache_uuid)
+
+            # the device id lets verify_mfa load the device and user in one query
+            cache_data = {"user_id": user.pk}
+            if isinstance(mfa_device, TOTPDevice):
+                cache_data["device_id"] = mfa_device.pk
+
+            cache.set(cache_key, cache_data, 300)
+
             response_body = {
                 "mfa_required": True,
                 "mfa_devices": [mfa_device._meta.object_name],
@@ -88,8 +117,25 @@ class AuthViewSet(viewsets.ModelViewSet):
 
         return get_logged_in_response(user)
 
+    @action(
+        methods=["get"],
+        detail=False,
+        permission_classes=[IsAdminUser],
+        url_path="login-stats",
+        url_name="login-stats",
+    )
+    def login_stats(self, request, *args, **kwargs):
+        """
+        Returns the login counters and latency percentiles for this process
+        """
+        return Response(passwords.get_login_stats())
+
     @action(methods=["post"], detail=False, permission_classes=[AllowAny])
     def logout(self, request, *args, **kwargs):
+        # signed tokens stay valid until they expire unless they are revoked
+        if isinstance(request.auth, str) and signedtokens.is_signed_token(request.auth):
+            signedtokens.revoke_token(request.auth)
+
         response = Response({"message": "ok"})
 
         soon = timezone.now() + datetime.timedelta(seconds=1)
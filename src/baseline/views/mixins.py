@@ -0,0 +1,196 @@
+import functools
+import typing
+
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+
+from baseline import encoders, exports
+from baseline.renderers import (
+    COMPACT_ENVELOPE_PREFIX,
+    ENVELOPE_SUFFIX,
+    EnvelopeJSONRenderer,
+    JSONRenderer,
+)
+from baseline.streaming import STREAM_CHUNK_SIZE, stream_json_array
+
+
+class StreamingListMixin:
+    """
+    ModelViewSet mixin that streams large list responses
+
+    Pages of at least `stream_list_threshold` rows, and every list of a view that is
+    not paginated, are serialized from `queryset.iterator()` in batches of
+    `stream_chunk_size` rows and sent as they are rendered.  The content is the same
+    as the regular list response's, including the pagination metadata and the
+    envelope.
+
+    Only compact JSON is streamed with LimitOffsetPagination or no pagination; other
+    responses are handled by `list()`.  Once the response has started an error can
+    no longer change its status.
+
+    The page cache does not store streaming responses, so lists the page cache
+    middleware or `cache_page` would store are not streamed either.
+    """
+
+    stream_chunk_size = STREAM_CHUNK_SIZE
+    stream_list_threshold = 500
+
+    def list(self, request, *args, **kwargs):
+        response = self.get_streaming_list_response(request)
+        if response is None:
+            return super().list(request, *args, **kwargs)
+
+        return response
+
+    def get_streaming_list_response(
+        self, request
+    ) -> typing.Optional[StreamingHttpResponse]:
+        """
+        Returns the streaming response for the list, or None when it's not streamed
+        """
+        if self.is_page_cached(request):
+            return None
+
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, JSONRenderer) or not renderer.compact:
+            return None
+
+        if renderer.get_indent(request.accepted_media_type, {}) is not None:
+            return None
+
+        render = functools.partial(
+            encoders.encode,
+            ensure_ascii=renderer.ensure_ascii,
+            allow_nan=not renderer.strict,
+        )
+
+        paginator = self.paginator
+        if paginator is not None and not isinstance(paginator, LimitOffsetPagination):
+            return None
+
+        limit = paginator.get_limit(request) if paginator else None
+        if limit is not None and limit < self.stream_list_threshold:
+            return None
+
+        # after the checks above, since `list()` filters the queryset itself
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if limit is None:
+            # an unpaginated list is enveloped unless it's empty
+            prefix = suffix = b""
+            if isinstance(renderer, EnvelopeJSONRenderer):
+                prefix, suffix = COMPACT_ENVELOPE_PREFIX, ENVELOPE_SUFFIX
+
+            empty = b"[]"
+        else:
+            paginator.request = request
+            paginator.limit = limit
+            paginator.count = paginator.get_count(queryset)
+            paginator.offset = paginator.get_offset(request)
+
+            queryset = queryset[paginator.offset : paginator.offset + paginator.limit]
+
+            metadata = {
+                "count": paginator.count,
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+            }
+
+            # write the results in place of the metadata's closing brace
+            prefix = render(metadata)[:-1] + b',"results":'
+            suffix = b"}"
+            empty = None
+
+        serializer = self.get_serializer()
+        rows = map(
+            serializer.to_representation,
+            queryset.iterator(chunk_size=self.stream_chunk_size),
+        )
+
+        return StreamingHttpResponse(
+            stream_json_array(
+                rows,
+                render,
+                chunk_size=self.stream_chunk_size,
+                prefix=prefix,
+                suffix=suffix,
+                empty=empty,
+            ),
+            content_type=renderer.media_type,
+        )
+
+    def is_page_cached(self, request) -> bool:
+        """
+        Returns whether the page cache is going to store the response
+        """
+        # set by FetchFromCacheMiddleware, which `cache_page` uses as well, on a miss
+        return getattr(request._request, "_cache_update_cache", False)
+
+
+class ExportMixin:
+    """
+    ModelViewSet mixin with an `export` action that streams the whole queryset
+
+    `GET <prefix>/export?export_format=ndjson|csv` writes every row matching the
+    view's filters, with the serializer's field selection, e.g. the `fields` param of
+    a DynamicFieldSerializer.  Rows are read with `queryset.iterator()`, which uses a
+    server-side cursor on PostgreSQL, instead of page after page of OFFSET queries.
+
+    The number of exports running at once is capped, see `baseline.exports`.
+    """
+
+    export_chunk_size = STREAM_CHUNK_SIZE
+
+    # the number of exports allowed to run at once, `EXPORT_MAX_CONCURRENCY` when None
+    export_max_concurrency = None
+
+    @action(detail=False, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        export_format = request.query_params.get("export_format", exports.NDJSON)
+        if export_format not in exports.CONTENT_TYPES:
+            formats = ", ".join(exports.CONTENT_TYPES)
+
+            raise ValidationError({"export_format": f"must be one of {formats}"})
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        serializer = self.get_serializer()
+        fields = self.get_export_fields(serializer)
+
+        rows = map(
+            serializer.to_representation,
+            queryset.iterator(chunk_size=self.export_chunk_size),
+        )
+
+        chunks = exports.iter_export(
+            rows, export_format, fields, chunk_size=self.export_chunk_size
+        )
+
+        # nothing after this can fail, so the slot is always given back on close
+        exports.acquire_slot(self.export_max_concurrency)
+
+        response = StreamingHttpResponse(
+            exports.SlotIterator(chunks),
+            content_type=exports.CONTENT_TYPES[export_format],
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{self.basename}.{export_format}"'
+
+        return response
+
+    def get_export_fields(self, serializer) -> typing.List[str]:
+        """
+        Returns the names of the fields in an exported row
+        """
+        excluded = set()
+        if hasattr(serializer, "get_excluded_fields"):
+            excluded = set(serializer.get_excluded_fields())
+
+        return [
+            name
+            for name, field in serializer.fields.items()
+            if not field.write_only and name not in excluded
+        ]
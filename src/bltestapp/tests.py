@@ -1,6 +1,15 @@
-from rest_framework import status
+import csv
+import io
+import json
+
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from rest_framework import status, viewsets
 from rest_framework.reverse import reverse
 
+from baseline import exports
 from bltestapp.fixtures import *
 
 
@@ -61,3 +70,242 @@ def test_widget_search(get_api_client, get_widget):
     results = response.data["results"]
 
     assert len(results) == 1, results
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        dict(limit=600),
+        dict(limit=600, offset=1, name="thing"),
+        dict(limit=600, name="nothing"),
+    ],
+)
+def test_widget_streaming_list(get_api_client, get_widget, monkeypatch, params):
+    """
+    ensure a streamed list has the same content as the regular one
+    """
+    from bltestapp.views import WidgetViewSet
+
+    for i in range(5):
+        get_widget(name=f"thing {i}")
+
+    client = get_api_client()
+
+    url = reverse("widgets-list")
+
+    # stream one row at a time to exercise joining the batches
+    monkeypatch.setattr(WidgetViewSet, "stream_chunk_size", 2)
+
+    response = client.get(url, data=params)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    assert response["Content-Type"] == "application/json"
+
+    streamed = b"".join(response.streaming_content)
+
+    monkeypatch.setattr(WidgetViewSet, "stream_list_threshold", 1000)
+    response = client.get(url, data=params)
+
+    assert not response.streaming
+    assert streamed == response.content
+
+
+@pytest.mark.parametrize("limit, streaming", [(600, True), (10, False)])
+def test_widget_streaming_filters_once(
+    get_api_client, get_widget, monkeypatch, limit, streaming
+):
+    """
+    ensure the queryset is filtered once whether or not the list is streamed
+    """
+    from bltestapp.views import WidgetViewSet
+
+    get_widget(name="thing")
+
+    filter_queryset = mock.Mock(side_effect=lambda queryset: queryset)
+    monkeypatch.setattr(WidgetViewSet, "filter_queryset", filter_queryset)
+
+    response = get_api_client().get(reverse("widgets-list"), data=dict(limit=limit))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming is streaming
+    assert filter_queryset.call_count == 1
+
+
+def test_widget_streaming_page_cached(get_api_client, get_widget, settings):
+    """
+    ensure a list the page cache stores is not streamed
+    """
+    settings.MIDDLEWARE = [
+        "django.middleware.cache.UpdateCacheMiddleware",
+        *settings.MIDDLEWARE,
+        "baseline.middleware.cache.BustableFetchFromCacheMiddleware",
+    ]
+
+    get_widget(name="thing")
+
+    client = get_api_client()
+    url = reverse("widgets-list")
+
+    response = client.get(url, data=dict(limit=600))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert not response.streaming
+
+    # the second request is served from the page cache
+    cached = client.get(url, data=dict(limit=600))
+
+    assert cached.content == response.content
+    assert "Age" in cached
+
+
+@pytest.mark.parametrize("count", [0, 3])
+def test_widget_streaming_unpaginated(get_api_client, get_widget, monkeypatch, count):
+    """
+    ensure an unpaginated list is streamed with the envelope
+    """
+    from bltestapp.views import WidgetViewSet
+
+    for i in range(count):
+        get_widget(name=f"thing {i}")
+
+    client = get_api_client()
+
+    url = reverse("widgets-list")
+
+    monkeypatch.setattr(WidgetViewSet, "pagination_class", None)
+    response = client.get(url)
+
+    assert response.streaming
+
+    streamed = b"".join(response.streaming_content)
+
+    monkeypatch.setattr(WidgetViewSet, "list", viewsets.ModelViewSet.list)
+    response = client.get(url)
+
+    assert streamed == response.content
+
+
+def test_widget_export_ndjson(get_api_client, get_widget):
+    """
+    ensure the filtered queryset is exported one row per line
+    """
+    for i in range(5):
+        get_widget(name=f"thing {i}", quantity=i)
+
+    get_widget(name="other")
+
+    client = get_api_client()
+
+    url = reverse("widgets-export")
+    response = client.get(url, data=dict(name="thing", fields="widget_quantity"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "application/x-ndjson"
+    assert 'filename="widgets.ndjson"' in response["Content-Disposition"]
+
+    lines = b"".join(response.streaming_content).splitlines()
+    rows = [json.loads(x) for x in lines]
+
+    assert len(rows) == 5
+    assert set(rows[0]) == {"id", "name", "quantity"}
+    assert sorted(x["quantity"] for x in rows) == [0, 1, 2, 3, 4]
+
+    # the slot was given back once the response was sent
+    assert cache.get(exports.EXPORT_SLOTS_KEY) == 0
+
+
+def test_widget_export_csv(get_api_client, get_widget):
+    """
+    ensure the export can be written as CSV
+    """
+    get_widget(name="thing, with a comma")
+
+    client = get_api_client()
+
+    url = reverse("widgets-export")
+    response = client.get(url, data=dict(export_format="csv"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "text/csv"
+
+    content = b"".join(response.streaming_content).decode()
+    rows = list(csv.reader(io.StringIO(content)))
+
+    assert rows[0] == ["id", "name"]
+    assert rows[1][1] == "thing, with a comma"
+    assert len(rows) == 2
+
+    response = client.get(url, data=dict(export_format="csv", name="nothing"))
+
+    assert b"".join(response.streaming_content) == b"id,name\r\n"
+
+    response = client.get(url, data=dict(export_format="xml"))
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_widget_export_concurrency(get_api_client, settings):
+    """
+    ensure exports are turned away when every slot is taken
+    """
+    settings.EXPORT_MAX_CONCURRENCY = 1
+
+    client = get_api_client()
+
+    url = reverse("widgets-export")
+
+    exports.acquire_slot()
+    try:
+        response = client.get(url)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    finally:
+        exports.release_slot()
+
+    response = client.get(url)
+
+    assert response.status_code == status.HTTP_200_OK
+
+    # the slot is given back even when the content is not read
+    response.close()
+
+    assert cache.get(exports.EXPORT_SLOTS_KEY) == 0
+
+
+def test_export_slots_never_negative():
+    """
+    ensure a slot given back after the counter expired does not drive it negative
+    """
+    exports.acquire_slot()
+
+    # the counter expires while the export runs and another export starts
+    cache.delete(exports.EXPORT_SLOTS_KEY)
+    exports.acquire_slot()
+
+    exports.release_slot()
+    exports.release_slot()
+
+    assert cache.get(exports.EXPORT_SLOTS_KEY) == 0
+
+
+def test_export_slots_timeout_refreshed(settings, monkeypatch):
+    """
+    ensure the counter's timeout is only refreshed when a slot is taken
+    """
+    settings.EXPORT_SLOT_TIMEOUT = 60
+    settings.EXPORT_MAX_CONCURRENCY = 1
+
+    touch = mock.Mock(wraps=cache.touch)
+    monkeypatch.setattr(cache, "touch", touch)
+
+    exports.acquire_slot()
+
+    try:
+        # a retry against a full, possibly leaked, slot does not keep it alive
+        with pytest.raises(exports.ExportsFull):
+            exports.acquire_slot()
+
+        assert touch.call_args_list == [mock.call(exports.EXPORT_SLOTS_KEY, 60)]
+    finally:
+        exports.release_slot()
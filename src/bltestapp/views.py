@@ -2,6 +2,8 @@ from django_filters import rest_framework as filters
 from rest_framework import viewsets
 from rest_framework.permissions import AllowAny
 
+from baseline.views.mixins import ExportMixin, StreamingListMixin
+
 from .models import Widget
 from .serializers import WidgetSerializer
 
@@ -14,7 +16,7 @@ class WidgetFilter(filters.FilterSet):
         fields = ("name", "quantity")
 
 
-class WidgetViewSet(viewsets.ModelViewSet):
+class WidgetViewSet(ExportMixin, StreamingListMixin, viewsets.ModelViewSet):
     queryset = Widget.objects.all()
     serializer_class = WidgetSerializer
     permission_classes = [AllowAny]
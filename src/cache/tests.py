@@ -1,3 +1,147 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+import pytest
+
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from baseline.cachetags import get_tag_versions
+from baseline.tests.utils import SyncThread
+
+from cache.views import CacheViewSet
+
+
+def get_view(action_name: str, method: str = "post"):
+    """
+    Returns the view for the given action configured the way the router does it
+    """
+    action_fn = getattr(CacheViewSet, action_name)
+
+    return CacheViewSet.as_view({method: action_name}, **action_fn.kwargs)
+
+
+def test_invalidate_tag(get_user):
+    """
+    ensure the tag's version is bumped
+    """
+    user = get_user(is_staff=True)
+    versions = get_tag_versions(["model:bltestapp.widget"])
+
+    view = get_view("invalidate_tag")
+
+    request = APIRequestFactory().post(
+        "/caches/invalidate-tag", {"tags": ["model:bltestapp.widget"]}, format="json"
+    )
+    force_authenticate(request, user=user)
+
+    response = view(request)
+
+    assert response.status_code == status.HTTP_200_OK, response.data
+
+    new_versions = get_tag_versions(["model:bltestapp.widget"])
+    assert new_versions != versions
+    assert response.data["versions"] == new_versions
+
+
+def test_invalidate_tag_requires_tags(get_user):
+    """
+    ensure a request without tags is rejected
+    """
+    user = get_user(is_staff=True)
+
+    view = get_view("invalidate_tag")
+
+    request = APIRequestFactory().post("/caches/invalidate-tag", {}, format="json")
+    force_authenticate(request, user=user)
+
+    response = view(request)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize("tags", [{"a": 1}, 1, ["a", 1], [["a"]]])
+def test_invalidate_tag_rejects_bad_tags(get_user, tags):
+    """
+    ensure tags that are not strings are rejected instead of failing
+    """
+    user = get_user(is_staff=True)
+
+    view = get_view("invalidate_tag")
+
+    request = APIRequestFactory().post(
+        "/caches/invalidate-tag", {"tags": tags}, format="json"
+    )
+    force_authenticate(request, user=user)
+
+    response = view(request)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "tags" in response.data
+
+
+def test_stats(get_user):
+    """
+    ensure the stats are returned to admins
+    """
+    user = get_user(is_staff=True)
+
+    view = get_view("stats", method="get")
+
+    request = APIRequestFactory().get("/caches/stats")
+    force_authenticate(request, user=user)
+
+    response = view(request)
+
+    assert response.status_code == status.HTTP_200_OK, response.data
+    assert "single_flight" in response.data["process"]
+
+
+def test_delete_prefix(get_user, monkeypatch):
+    """
+    ensure a job is started and its status can be read back
+    """
+    client = mock.Mock()
+    client.scan_iter.return_value = [b":1:widgets-1", b":1:widgets-2"]
+
+    get_client_mock = mock.Mock(return_value=client)
+    monkeypatch.setattr("baseline.cachescan.get_redis_client", get_client_mock)
+    monkeypatch.setattr("baseline.cachescan.threading.Thread", SyncThread)
+
+    user = get_user(is_staff=True)
+
+    request = APIRequestFactory().post(
+        "/caches/delete-prefix", {"prefix": "widgets"}, format="json"
+    )
+    force_authenticate(request, user=user)
+
+    response = get_view("delete_prefix")(request)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED, response.data
+
+    request = APIRequestFactory().get(
+        "/caches/delete-prefix", {"job_id": response.data["job_id"]}
+    )
+    force_authenticate(request, user=user)
+
+    response = get_view("delete_prefix", method="get")(request)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["status"] == "done"
+    assert response.data["count"] == 2
+
+    client.unlink.assert_called_once_with(b":1:widgets-1", b":1:widgets-2")
+
+
+def test_delete_prefix_not_supported(get_user):
+    """
+    ensure a backend without SCAN is rejected
+    """
+    request = APIRequestFactory().post(
+        "/caches/delete-prefix", {"prefix": "widgets"}, format="json"
+    )
+    force_authenticate(request, user=get_user(is_staff=True))
+
+    response = get_view("delete_prefix")(request)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "does not support deleting by prefix" in response.data["detail"]
@@ -1,10 +1,20 @@
 import typing
 
-from rest_framework import viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
+from baseline.backends.serializers import get_compression_stats
+from baseline.cachescan import (
+    UnsupportedBackend,
+    get_delete_prefix_job,
+    start_delete_prefix,
+)
+from baseline.cachetags import invalidate_tag
+from baseline.decorators.cache import get_single_flight_stats
+
 if typing.TYPE_CHECKING:
     from django.http import HttpRequest
 
@@ -23,7 +33,9 @@ class CacheViewSet(viewsets.ViewSet):
         """
         Flushes the entire cache
 
-        Note: this is a very heavy-handed thing to do and should only be done in extreme circumstances.
+        Note: this is a very heavy-handed thing to do and should only be done in extreme circumstances;
+        prefer `invalidate_tag`, which only drops the entries stored with the given tags,
+        or `delete_prefix`, which only drops the entries whose key has the given prefix.
         """
         from django.core.cache import caches
 
@@ -36,3 +48,119 @@ class CacheViewSet(viewsets.ViewSet):
         }
 
         return Response(response_data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAdminUser],
+    )
+    def stats(self, request: "HttpRequest", **kwargs) -> "Response":
+        """
+        Returns the cache statistics
+
+        `prefixes` holds the hits, misses, bytes and latency per key prefix, aggregated
+        across processes; it's only available with an instrumented cache backend.
+        `tiers` holds the two-tier backend hit ratios and `process` holds the counters
+        for the process handling this request.
+        """
+        from django.core.cache import caches
+
+        cache = caches["default"]
+
+        response_data = {
+            "backend": f"{cache.__class__.__module__}.{cache.__class__.__name__}",
+            "process": {
+                "compression": get_compression_stats(),
+                "single_flight": get_single_flight_stats(),
+            },
+        }
+
+        if hasattr(cache, "get_prefix_stats"):
+            response_data["prefixes"] = cache.get_prefix_stats()
+
+        if hasattr(cache, "get_stats"):
+            response_data["tiers"] = cache.get_stats()
+
+        return Response(response_data)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAdminUser],
+        url_path="invalidate-tag",
+        url_name="invalidate-tag",
+    )
+    def invalidate_tag(self, request: "HttpRequest", **kwargs) -> "Response":
+        """
+        Invalidates the cache entries stored with the given tags
+
+        The request body is `{"tags": ["model:app.model", ...]}`.  Each tag's version is
+        bumped, so old entries are no longer read and age out on their own.
+        """
+        tags = request.data.get("tags")
+        if isinstance(tags, str):
+            tags = [tags]
+
+        if not tags:
+            return Response(
+                {"tags": ["this field is required"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not isinstance(tags, list) or not all(isinstance(x, str) for x in tags):
+            raise ValidationError({"tags": ["must be a string or a list of strings"]})
+
+        response_data = {
+            "versions": {tag: invalidate_tag(tag) for tag in tags},
+        }
+
+        return Response(response_data)
+
+    @action(
+        detail=False,
+        methods=["get", "post"],
+        permission_classes=[IsAdminUser],
+        url_path="delete-prefix",
+        url_name="delete-prefix",
+    )
+    def delete_prefix(self, request: "HttpRequest", **kwargs) -> "Response":
+        """
+        Deletes the cache entries whose key starts with the given prefix
+
+        POST `{"prefix": "views.decorators.cache", "dry_run": true}` starts a background
+        job that walks the keys with SCAN and removes them with UNLINK; with `dry_run`
+        the keys are only counted.  The response holds the job id; GET with
+        `?job_id=<id>` returns the job's status and the number of keys matched so far.
+        """
+        if request.method == "GET":
+            job_id = request.query_params.get("job_id")
+            job = get_delete_prefix_job(job_id) if job_id else None
+            if job is None:
+                return Response(
+                    {"job_id": ["job not found"]},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+
+            return Response(job)
+
+        prefix = request.data.get("prefix")
+        if not prefix:
+            return Response(
+                {"prefix": ["this field is required"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        dry_run = request.data.get("dry_run") in (True, "true", "1", 1)
+
+        try:
+            job_id = start_delete_prefix(prefix, dry_run=dry_run)
+        except UnsupportedBackend as exc:
+            return Response(
+                {"detail": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            get_delete_prefix_job(job_id) or {"job_id": job_id},
+            status=status.HTTP_202_ACCEPTED,
+        )